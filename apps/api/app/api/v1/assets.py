@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import hashlib
+import logging
 import os
 import shutil
-from typing import Sequence
+from datetime import datetime
+from contextlib import nullcontext
+from typing import Literal, Sequence
 from uuid import uuid4
 
 from fastapi import (
@@ -13,10 +17,13 @@ from fastapi import (
     Form,
     HTTPException,
     Query,
+    Request,
     UploadFile,
 )
-from fastapi.responses import FileResponse
-from sqlalchemy import delete, func, or_, select
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.settings import settings
@@ -24,6 +31,7 @@ from app.db.session import get_db
 from packages.domain.models.assets import (
     Asset,
     AssetAutoTagJob,
+    AssetDerivativeJob,
     AssetRole,
     AssetTag,
     AssetVariant,
@@ -31,19 +39,90 @@ from packages.domain.models.assets import (
 )
 from packages.domain.schemas.assets import (
     AssetDerivativeRequest,
+    AssetDerivativeJobOut,
+    AssetDuplicateClusterOut,
     AssetAutoTagJobOut,
+    AssetBatchUploadOut,
+    AssetFacetsOut,
     AutoTagResponse,
     AssetFocalPointInput,
     AssetOut,
     AssetRatingInput,
     AssetRoleInput,
     AssetRolePublishInput,
+    AssetSemanticMatchOut,
+    AssetSimilarOut,
+    AssetSrcsetManifestOut,
+    AssetSrcsetOut,
+    AssetSummaryOut,
     AssetTagInput,
+    AssetTilesOut,
+    AssetUploadOut,
     TagTaxonomyOut,
     TagTaxonomyUpdate,
 )
 from app.services.ai_tagging import queue_auto_tagging_job, set_autotag_job_status
-from app.services.assets import ensure_dir, generate_variants
+from app.services.asset_embeddings import semantic_search
+from app.services.asset_facets import compute_facets, facet_cache, filter_signature
+from app.services.asset_listing import (
+    DEFAULT_SORT,
+    RELEVANCE_SORT,
+    AssetFilters,
+    after_cursor,
+    after_relevance_cursor,
+    apply_asset_filters,
+    count_assets,
+    decode_cursor,
+    encode_cursor,
+    load_options,
+    relevance_order,
+    resolve_sort,
+    sort_order,
+)
+from app.services.asset_ingest import (
+    BatchEntry,
+    UploadTooLargeError,
+    archive_entries,
+    client_error_message,
+    commit_staged_upload,
+    content_addressed_path,
+    discard_staged_path,
+    ingest_batch,
+    metadata_columns,
+    stage_chunks,
+    stage_upload,
+)
+from app.services.asset_search import refresh_search_documents, search_rank
+from app.services.assets import DERIVATIVE_FORMATS, ensure_dir
+from app.services.derivative_jobs import enqueue_derivative_job, upload_render_targets
+from app.services.derivatives import (
+    ensure_variant,
+    expected_variant_fingerprint,
+    refresh_variant_pointers,
+    sync_asset_variants,
+    thumbnail_width,
+)
+from app.services.image_metadata import extract_image_metadata
+from app.services.perceptual_hash import (
+    MAX_SEARCH_DISTANCE,
+    asset_dhash,
+    dhash_columns,
+    find_duplicate_clusters,
+    find_similar,
+)
+from app.services.render_cache import render_cache
+from app.services.srcset import build_srcset, thumbnail_url
+from app.services.thumbnail_cache import ThumbnailEntry, thumbnail_cache
+from app.services.tiles import (
+    TILE_FORMAT,
+    TILE_OVERLAP,
+    TILE_SIZE,
+    max_tile_level,
+    tile_fingerprint,
+    tile_path,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -55,59 +134,215 @@ def _get_asset_or_404(db: Session, asset_id: str) -> Asset:
     return asset
 
 
-@router.get("/assets", response_model=list[AssetOut])
-def list_assets(
-    db: Session = Depends(get_db),
+def _asset_filters(
     search: str | None = None,
     tags: list[str] | None = Query(None),
     roles: list[str] | None = Query(None),
     orientations: list[str] | None = Query(None),
     min_rating: int | None = None,
     starred: bool | None = None,
+    captured_after: datetime | None = None,
+    captured_before: datetime | None = None,
+) -> AssetFilters:
+    return AssetFilters(
+        search=search,
+        tags=tags,
+        roles=roles,
+        orientations=orientations,
+        min_rating=min_rating,
+        starred=starred,
+        captured_after=captured_after,
+        captured_before=captured_before,
+    )
+
+
+@router.get("/assets", response_model=list[AssetOut] | list[AssetSummaryOut])
+def list_assets(
+    response: Response,
+    db: Session = Depends(get_db),
+    filters: AssetFilters = Depends(_asset_filters),
     sort: str | None = "newest",
-) -> Sequence[Asset]:
-    stmt = select(Asset)
-
-    if search:
-        term = f"%{search.lower()}%"
-        stmt = stmt.where(
-            or_(
-                func.lower(Asset.original_filename).like(term),
-                Asset.tags.any(func.lower(AssetTag.tag).like(term)),
-            )
+    limit: int | None = Query(None, ge=1, le=settings.assets_list_max_limit),
+    cursor: str | None = None,
+    include_total: bool = False,
+    fields: Literal["full", "summary"] = "full",
+) -> Sequence[Asset] | list[AssetSummaryOut]:
+    dialect = db.get_bind().dialect.name
+    sort = resolve_sort(sort, filters.search)
+    stmt = apply_asset_filters(select(Asset), filters, dialect)
+    limit = min(limit or settings.assets_list_default_limit, settings.assets_list_max_limit)
+
+    if include_total:
+        response.headers["X-Total-Count"] = str(count_assets(db, stmt))
+
+    rank = search_rank(filters.search, dialect) if sort == RELEVANCE_SORT else None
+    if rank is None and sort == RELEVANCE_SORT:
+        # Nothing rankable in the search (only punctuation, say).
+        sort = DEFAULT_SORT
+
+    if rank is not None:
+        ranked = rank.label("relevance")
+        stmt = stmt.add_columns(ranked)
+        order = relevance_order(ranked)
+    else:
+        order = sort_order(sort)
+    if cursor:
+        try:
+            position = decode_cursor(cursor, sort)
+            if rank is not None:
+                stmt = stmt.where(after_relevance_cursor(db, rank, position))
+            else:
+                stmt = stmt.where(after_cursor(db, sort, position))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    stmt = stmt.options(*load_options(fields)).order_by(*order)
+    # One extra row tells us whether another page exists.
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    assets = [row[0] for row in rows[:limit]]
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            sort, last[0], rank=last[1] if rank is not None else None
         )
 
-    if tags:
-        stmt = stmt.where(Asset.tags.any(AssetTag.tag.in_(tags)))
-
-    if roles:
-        stmt = stmt.where(Asset.roles.any(AssetRole.role.in_(roles)))
-
-    if orientations:
-        orientation_filters = []
-        if "square" in orientations:
-            orientation_filters.append(Asset.width == Asset.height)
-        if "landscape" in orientations:
-            orientation_filters.append(Asset.width > Asset.height)
-        if "portrait" in orientations:
-            orientation_filters.append(Asset.height > Asset.width)
-        if orientation_filters:
-            stmt = stmt.where(or_(*orientation_filters))
-
-    if min_rating is not None:
-        stmt = stmt.where(Asset.rating >= min_rating)
-
-    if starred is not None:
-        stmt = stmt.where(Asset.starred == starred)
-
-    if sort == "oldest":
-        stmt = stmt.order_by(Asset.created_at.asc())
-    elif sort == "rating":
-        stmt = stmt.order_by(Asset.rating.desc())
-    else:
-        stmt = stmt.order_by(Asset.created_at.desc())
+    if fields == "summary":
+        return [_asset_summary(asset) for asset in assets]
+    return assets
+
+
+def _asset_summary(asset: Asset) -> AssetSummaryOut:
+    summary = AssetSummaryOut.model_validate(asset)
+    return summary.model_copy(
+        update={"thumbnail_url": thumbnail_url(asset.id, asset.thumbnail_fingerprint)}
+    )
+
 
-    return db.execute(stmt).scalars().all()
+def _asset_summaries(db: Session, asset_ids: list[str]) -> dict[str, AssetSummaryOut]:
+    if not asset_ids:
+        return {}
+    assets = db.execute(
+        select(Asset).where(Asset.id.in_(asset_ids)).options(*load_options("summary"))
+    ).scalars()
+    return {asset.id: _asset_summary(asset) for asset in assets}
+
+
+@router.get("/assets/facets", response_model=AssetFacetsOut)
+def get_asset_facets(
+    db: Session = Depends(get_db),
+    filters: AssetFilters = Depends(_asset_filters),
+) -> dict:
+    signature = filter_signature(filters)
+    facets = facet_cache.get(signature)
+    if facets is None:
+        generation = facet_cache.generation
+        facets = compute_facets(db, filters, db.get_bind().dialect.name)
+        facet_cache.put(signature, facets, generation)
+    return facets
+
+
+@router.get("/assets/semantic-search", response_model=list[AssetSemanticMatchOut])
+def semantic_search_assets(
+    q: str = Query(..., min_length=1),
+    db: Session = Depends(get_db),
+    filters: AssetFilters = Depends(_asset_filters),
+    limit: int = Query(24, ge=1, le=settings.assets_semantic_search_max_limit),
+) -> list[AssetSemanticMatchOut]:
+    try:
+        matches = semantic_search(db, q, filters, limit, db.get_bind().dialect.name)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return [
+        AssetSemanticMatchOut(**_asset_summary(asset).model_dump(), score=score)
+        for asset, score in matches
+    ]
+
+
+@router.get("/assets/duplicates", response_model=list[AssetDuplicateClusterOut])
+def list_duplicate_assets(
+    db: Session = Depends(get_db),
+    filters: AssetFilters = Depends(_asset_filters),
+    max_distance: int = Query(
+        settings.assets_duplicate_max_distance, ge=0, le=MAX_SEARCH_DISTANCE
+    ),
+    limit: int = Query(100, ge=1, le=settings.assets_list_max_limit),
+) -> list[AssetDuplicateClusterOut]:
+    clusters = find_duplicate_clusters(db, filters, max_distance, db.get_bind().dialect.name)
+    clusters = clusters[:limit]
+    summaries = _asset_summaries(db, [asset_id for cluster in clusters for asset_id, _ in cluster])
+    return [
+        AssetDuplicateClusterOut(
+            assets=[
+                AssetSimilarOut(**summaries[asset_id].model_dump(), distance=distance)
+                for asset_id, distance in cluster
+            ]
+        )
+        for cluster in clusters
+    ]
+
+
+@router.get("/assets/srcset", response_model=AssetSrcsetManifestOut)
+def get_asset_srcset(
+    request: Request,
+    ids: list[str] = Query(...),
+    ratio: str | None = None,
+    sizes: str = "100vw",
+    db: Session = Depends(get_db),
+) -> Response:
+    asset_ids = list(
+        dict.fromkeys(part.strip() for value in ids for part in value.split(",") if part.strip())
+    )
+    if not asset_ids:
+        raise HTTPException(status_code=400, detail="No asset ids provided")
+    if len(asset_ids) > settings.assets_srcset_max_ids:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.assets_srcset_max_ids} ids per request"
+        )
+    ratio = ratio or settings.assets_derivative_ratios[0]
+    if ratio not in settings.assets_derivative_ratios:
+        raise HTTPException(status_code=400, detail="Unsupported ratio")
+
+    published = select(AssetRole.asset_id).where(AssetRole.is_published.is_(True))
+    rows = db.execute(
+        select(
+            Asset.id,
+            Asset.width,
+            Asset.height,
+            Asset.focal_x,
+            Asset.focal_y,
+            Asset.content_hash,
+            Asset.orientation,
+            Asset.variant_manifest,
+            Asset.placeholder,
+            Asset.dominant_color,
+        ).where(Asset.id.in_(asset_ids), Asset.id.in_(published))
+    ).all()
+    by_id = {row.id: row for row in rows}
+
+    items: list[AssetSrcsetOut] = []
+    missing: list[str] = []
+    for asset_id in asset_ids:
+        row = by_id.get(asset_id)
+        entry = build_srcset(row, ratio) if row is not None else None
+        if entry is None:
+            missing.append(asset_id)
+            continue
+        items.append(
+            AssetSrcsetOut(
+                asset_id=asset_id,
+                sizes=sizes,
+                placeholder=row.placeholder,
+                dominant_color=row.dominant_color,
+                **entry,
+            )
+        )
+
+    payload = AssetSrcsetManifestOut(items=items, missing=missing).model_dump_json()
+    etag = _etag(hashlib.sha256(payload.encode("utf-8")).hexdigest())
+    headers = _cache_headers(etag, immutable=False)
+    if _etag_matches(request, etag):
+        return _not_modified(headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
 
 
 @router.get("/assets/{asset_id}", response_model=AssetOut)
@@ -116,12 +351,31 @@ def get_asset(asset_id: str, db: Session = Depends(get_db)) -> Asset:
 
 
 @router.get("/assets/{asset_id}/thumbnail")
-def get_asset_thumbnail(asset_id: str, db: Session = Depends(get_db)) -> FileResponse:
-    asset = _get_asset_or_404(db, asset_id)
-    variant = _select_thumbnail_variant(asset)
-    path = variant.path if variant else asset.original_path
+def get_asset_thumbnail(
+    asset_id: str,
+    request: Request,
+    v: str | None = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    # A versioned URL always names the same bytes, so a matching validator
+    # needs neither the asset row nor the file.
+    if v and _etag_matches(request, _etag(v)):
+        return _not_modified(_cache_headers(_etag(v), immutable=True))
+
+    entry = _resolve_thumbnail(db, asset_id)
+    etag = _etag(entry.etag_token) if entry.etag_token else None
+    headers = _cache_headers(etag, immutable=bool(v) and v == entry.etag_token)
+    if etag and _etag_matches(request, etag):
+        return _not_modified(headers)
+
+    safe_path = os.path.realpath(entry.path)
+    if not os.path.exists(safe_path):
+        # The pointer outlived its file (evicted or regenerated elsewhere).
+        entry = _resolve_thumbnail(db, asset_id, refresh=True)
+        etag = _etag(entry.etag_token) if entry.etag_token else None
+        headers = _cache_headers(etag, immutable=bool(v) and v == entry.etag_token)
+        safe_path = os.path.realpath(entry.path)
 
-    safe_path = os.path.realpath(path)
     storage_root = os.path.realpath(settings.assets_storage_root)
     if not safe_path.startswith(storage_root + os.sep) and safe_path != storage_root:
         raise HTTPException(status_code=400, detail="Invalid asset path")
@@ -129,16 +383,163 @@ def get_asset_thumbnail(asset_id: str, db: Session = Depends(get_db)) -> FileRes
     if not os.path.exists(safe_path):
         raise HTTPException(status_code=404, detail="Asset file missing")
 
-    return FileResponse(safe_path)
+    return FileResponse(safe_path, headers=headers)
+
+
+@router.get("/assets/{asset_id}/render")
+def render_asset_variant(
+    asset_id: str,
+    ratio: str,
+    width: int,
+    request: Request,
+    fmt: str = Query("webp", alias="format"),
+    v: str | None = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    if v and _etag_matches(request, _etag(v)):
+        return _not_modified(_cache_headers(_etag(v), immutable=True))
+
+    asset = _get_asset_or_404(db, asset_id)
+    if ratio not in settings.assets_derivative_ratios:
+        raise HTTPException(status_code=400, detail="Unsupported ratio")
+    if width not in settings.assets_derivative_widths:
+        raise HTTPException(status_code=400, detail="Unsupported width")
+    if fmt not in DERIVATIVE_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported format")
+
+    # The fingerprint is derivable from the asset row, so revalidation never renders.
+    if asset.content_hash:
+        expected = expected_variant_fingerprint(asset, asset.content_hash, ratio, width, fmt)
+        if _etag_matches(request, _etag(expected)):
+            return _not_modified(_cache_headers(_etag(expected), immutable=v == expected))
+
+    try:
+        variant = ensure_variant(db, asset, ratio, width, fmt)
+    except (OSError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Render failed: {exc}") from exc
+
+    safe_path = _safe_storage_path(variant.path)
+    if not os.path.exists(safe_path):
+        raise HTTPException(status_code=404, detail="Asset file missing")
+    etag = _etag(variant.fingerprint) if variant.fingerprint else None
+    headers = _cache_headers(etag, immutable=bool(v) and v == variant.fingerprint)
+    return FileResponse(safe_path, headers=headers)
 
 
 @router.get("/assets/{asset_id}/file")
-def get_asset_file(asset_id: str, db: Session = Depends(get_db)) -> FileResponse:
+@router.head("/assets/{asset_id}/file", include_in_schema=False)
+def get_asset_file(
+    asset_id: str,
+    request: Request,
+    v: str | None = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    if v and _etag_matches(request, _etag(v)):
+        return _not_modified(_cache_headers(_etag(v), immutable=True))
+
     asset = _get_asset_or_404(db, asset_id)
+    etag = _etag(asset.content_hash) if asset.content_hash else None
+    headers = _cache_headers(etag, immutable=bool(v) and v == asset.content_hash)
+    if etag and _etag_matches(request, etag):
+        return _not_modified(headers)
+
     safe_path = _safe_storage_path(asset.original_path)
     if not os.path.exists(safe_path):
         raise HTTPException(status_code=404, detail="Asset file missing")
-    return FileResponse(safe_path)
+    # FileResponse answers Range / If-Range requests against the ETag above.
+    return FileResponse(safe_path, headers=headers, media_type=asset.mime_type)
+
+
+@router.post("/assets/{asset_id}/tiles", response_model=AssetDerivativeJobOut)
+def request_asset_tiles(asset_id: str, db: Session = Depends(get_db)) -> AssetDerivativeJob:
+    _get_asset_or_404(db, asset_id)
+    # Empty targets: building tiles must not re-render (or widen) the variants.
+    return enqueue_derivative_job(db, asset_id, ratios=[], widths=[], tiles=True)
+
+
+@router.get("/assets/{asset_id}/similar", response_model=list[AssetSimilarOut])
+def get_similar_assets(
+    asset_id: str,
+    db: Session = Depends(get_db),
+    max_distance: int = Query(settings.assets_similar_max_distance, ge=0, le=MAX_SEARCH_DISTANCE),
+    limit: int = Query(24, ge=1, le=settings.assets_list_max_limit),
+) -> list[AssetSimilarOut]:
+    asset = _get_asset_or_404(db, asset_id)
+    value = asset_dhash(asset)
+    if value is None:
+        raise HTTPException(status_code=404, detail="Perceptual hash not computed")
+    matches = find_similar(db, value, max_distance, limit, exclude_id=asset.id)
+    summaries = _asset_summaries(db, [match_id for match_id, _ in matches])
+    return [
+        AssetSimilarOut(**summaries[match_id].model_dump(), distance=distance)
+        for match_id, distance in matches
+    ]
+
+
+@router.get("/assets/{asset_id}/tiles", response_model=AssetTilesOut)
+def get_asset_tiles(asset_id: str, db: Session = Depends(get_db)) -> AssetTilesOut:
+    asset = _get_asset_or_404(db, asset_id)
+    current = (
+        asset.tiles_fingerprint
+        if asset.content_hash
+        and asset.tiles_fingerprint == tile_fingerprint(asset.content_hash, asset.orientation)
+        else None
+    )
+    if current:
+        status = "ready"
+    else:
+        job = asset.derivative_job
+        pending = job is not None and job.tiles and job.status in {"queued", "running"}
+        status = "pending" if pending else "missing"
+    # A stale pyramid is still served until its replacement lands.
+    fingerprint = current or asset.tiles_fingerprint
+    url_template = (
+        f"{settings.api_v1_prefix}/assets/{asset.id}/tiles/{{level}}/{{col}}_{{row}}"
+        f".{TILE_FORMAT}?v={fingerprint}"
+        if fingerprint
+        else None
+    )
+    return AssetTilesOut(
+        asset_id=asset.id,
+        status=status,
+        width=asset.width,
+        height=asset.height,
+        tile_size=TILE_SIZE,
+        overlap=TILE_OVERLAP,
+        format=TILE_FORMAT,
+        max_level=max_tile_level(asset.width, asset.height),
+        fingerprint=fingerprint,
+        url_template=url_template,
+    )
+
+
+@router.get("/assets/{asset_id}/tiles/{level:int}/{col:int}_{row:int}.webp")
+def get_asset_tile(
+    asset_id: str,
+    level: int,
+    col: int,
+    row: int,
+    request: Request,
+    v: str | None = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    if v and _etag_matches(request, _tile_etag(v, level, col, row)):
+        return _not_modified(_cache_headers(_tile_etag(v, level, col, row), immutable=True))
+
+    fingerprint = db.execute(
+        select(Asset.tiles_fingerprint).where(Asset.id == asset_id)
+    ).scalar_one_or_none()
+    if not fingerprint:
+        raise HTTPException(status_code=404, detail="Tiles not generated")
+    etag = _tile_etag(fingerprint, level, col, row)
+    headers = _cache_headers(etag, immutable=v == fingerprint)
+    if _etag_matches(request, etag):
+        return _not_modified(headers)
+
+    safe_path = _safe_storage_path(tile_path(asset_id, fingerprint, level, col, row))
+    if not os.path.exists(safe_path):
+        raise HTTPException(status_code=404, detail="Tile not found")
+    return FileResponse(safe_path, headers=headers, media_type="image/webp")
 
 
 @router.delete("/assets/{asset_id}/tags")
@@ -148,6 +549,7 @@ def delete_tag(asset_id: str, tag: str, source: str | None = None, db: Session =
     if source:
         stmt = stmt.where(AssetTag.source == source)
     db.execute(stmt)
+    refresh_search_documents(db, [asset_id])
     db.commit()
     return {"status": "deleted"}
 
@@ -180,17 +582,19 @@ def delete_asset(asset_id: str, db: Session = Depends(get_db)) -> dict:
 
     _safe_delete_file(original_path)
     _safe_delete_tree(asset_dir)
+    render_cache.discard_prefix(asset_dir + os.sep)
+    thumbnail_cache.discard(asset_id)
 
     return {"status": "deleted"}
 
 
-@router.post("/assets/upload", response_model=AssetOut)
+@router.post("/assets/upload", response_model=AssetUploadOut)
 async def upload_asset(
     file: UploadFile = File(...),
     generate_derivatives: bool = Form(True),
     tags: str | None = Form(None),
     db: Session = Depends(get_db),
-) -> Asset:
+) -> AssetUploadOut:
     ensure_dir(settings.assets_originals_dir)
 
     filename = file.filename or "upload"
@@ -198,50 +602,124 @@ async def upload_asset(
     if not ext:
         ext = ".jpg"
 
-    asset_id = str(uuid4())
+    try:
+        staged = await stage_upload(file)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+    parsed_tags = _parse_tags(tags)
+
+    existing = _find_asset_by_hash(db, staged.content_hash)
+    if existing is not None:
+        discard_staged_path(staged.path)
+        return _attach_duplicate_upload(db, existing, filename, parsed_tags)
+
     asset_path = None
-    content = await file.read()
     try:
+        metadata = extract_image_metadata(staged.path)
+        dhash = await run_in_threadpool(dhash_columns, staged.path, metadata.orientation)
+        asset_path = commit_staged_upload(
+            staged, content_addressed_path(staged.content_hash, ext)
+        )
         asset = Asset(
-            id=asset_id,
+            id=str(uuid4()),
             original_filename=filename,
             mime_type=file.content_type or "application/octet-stream",
-            width=0,
-            height=0,
-            original_path="",
+            original_path=asset_path,
+            content_hash=staged.content_hash,
+            **metadata_columns(metadata),
+            **dhash,
         )
         db.add(asset)
-
-        asset_path = os.path.join(settings.assets_originals_dir, f"{asset_id}{ext.lower()}")
-        with open(asset_path, "wb") as output_file:
-            output_file.write(content)
-
-        from PIL import Image
-
-        with Image.open(asset_path) as image:
-            asset.width = image.width
-            asset.height = image.height
-
-        asset.original_path = asset_path
+        refresh_search_documents(db, [asset.id])
         db.commit()
         db.refresh(asset)
+    except IntegrityError:
+        # A concurrent upload of the same bytes won the insert; the file on
+        # disk is identical, so hand back that asset instead.
+        db.rollback()
+        existing = _find_asset_by_hash(db, staged.content_hash)
+        if existing is None:
+            raise HTTPException(status_code=409, detail="Upload conflicted with another upload")
+        return _attach_duplicate_upload(db, existing, filename, parsed_tags)
     except Exception as exc:
         db.rollback()
+        discard_staged_path(staged.path)
         if asset_path and os.path.exists(asset_path):
             os.remove(asset_path)
-        raise HTTPException(status_code=400, detail=f"Upload failed: {exc}") from exc
+        logger.warning("Upload of %s failed", filename, exc_info=True)
+        raise HTTPException(
+            status_code=400, detail=f"Upload failed: {client_error_message(exc)}"
+        ) from exc
 
-    if generate_derivatives:
-        _generate_derivatives_for_asset(db, asset, AssetDerivativeRequest())
+    targets = upload_render_targets() if generate_derivatives else None
+    job = enqueue_derivative_job(db, asset.id, *targets) if targets is not None else None
 
-    if tags:
-        parsed_tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
-        for tag in parsed_tags:
-            db.add(AssetTag(asset_id=asset.id, tag=tag, source="manual"))
+    if parsed_tags:
+        _add_manual_tags(db, asset.id, parsed_tags)
+        refresh_search_documents(db, [asset.id])
         db.commit()
         db.refresh(asset)
 
-    return asset
+    response = AssetUploadOut.model_validate(asset)
+    if job is not None:
+        response.derivative_job = AssetDerivativeJobOut.model_validate(job)
+    return response
+
+
+@router.post("/assets/upload/batch", response_model=AssetBatchUploadOut)
+async def upload_asset_batch(
+    request: Request,
+    generate_derivatives: bool = Query(True),
+    tags: str | None = Query(None),
+    db: Session = Depends(get_db),
+) -> AssetBatchUploadOut:
+    """Ingest many multipart `files`, or one zip/tar archive sent as the request body."""
+    content_type = request.headers.get("content-type", "")
+    archive_path = None
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form(max_files=settings.assets_batch_upload_max_files)
+            generate_derivatives = _form_bool(form.get("generate_derivatives"), generate_derivatives)
+            tags = form.get("tags") or tags
+            uploads = [item for item in form.getlist("files") if not isinstance(item, str)]
+            if not uploads:
+                raise HTTPException(status_code=400, detail="No files provided")
+            if len(uploads) == 1 and _is_archive_name(uploads[0].filename or ""):
+                staged = await stage_upload(
+                    uploads[0], max_bytes=settings.assets_batch_upload_max_bytes
+                )
+                archive_path = staged.path
+            else:
+                entries = [
+                    BatchEntry(
+                        filename=upload.filename or "upload",
+                        open=lambda upload=upload: nullcontext(upload.file),
+                        mime_type=upload.content_type,
+                    )
+                    for upload in uploads
+                ]
+                results = await run_in_threadpool(
+                    ingest_batch, db, entries, _parse_tags(tags), generate_derivatives
+                )
+                return _batch_manifest(results)
+        else:
+            staged = await stage_chunks(
+                request.stream(), max_bytes=settings.assets_batch_upload_max_bytes
+            )
+            archive_path = staged.path
+
+        results = await run_in_threadpool(
+            _ingest_archive, db, archive_path, _parse_tags(tags), generate_derivatives
+        )
+        return _batch_manifest(results)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    finally:
+        if archive_path:
+            discard_staged_path(archive_path)
 
 
 @router.post("/assets/{asset_id}/auto-tag", response_model=AutoTagResponse)
@@ -267,6 +745,20 @@ def list_auto_tag_status(
     return db.execute(stmt.order_by(AssetAutoTagJob.updated_at.desc())).scalars().all()
 
 
+@router.get("/assets/derivatives/status", response_model=list[AssetDerivativeJobOut])
+def list_derivative_status(
+    asset_ids: list[str] | None = Query(None),
+    status: str | None = None,
+    db: Session = Depends(get_db),
+) -> Sequence[AssetDerivativeJob]:
+    stmt = select(AssetDerivativeJob)
+    if asset_ids:
+        stmt = stmt.where(AssetDerivativeJob.asset_id.in_(asset_ids))
+    if status:
+        stmt = stmt.where(AssetDerivativeJob.status == status)
+    return db.execute(stmt.order_by(AssetDerivativeJob.updated_at.desc())).scalars().all()
+
+
 @router.get("/assets/taxonomy", response_model=list[TagTaxonomyOut])
 def list_tag_taxonomy(
     status: str | None = None,
@@ -322,6 +814,7 @@ def add_tags(
                 confidence=tag.confidence,
             )
         )
+    refresh_search_documents(db, [asset_id])
     db.commit()
     db.refresh(asset)
     return asset
@@ -338,6 +831,7 @@ def set_roles(
     requested_keys = set(requested.keys())
     existing = {role.role: role for role in asset.roles}
 
+    touched = [asset_id]
     wants_hero_main = "hero_main" in requested_keys
     if wants_hero_main:
         other_heroes = db.execute(
@@ -347,6 +841,7 @@ def set_roles(
         ).scalars().all()
         for hero_role in other_heroes:
             db.delete(hero_role)
+            touched.append(hero_role.asset_id)
             existing_showcase = db.execute(
                 select(AssetRole).where(
                     AssetRole.asset_id == hero_role.asset_id,
@@ -393,6 +888,7 @@ def set_roles(
                 is_published=is_published,
             )
         )
+    refresh_search_documents(db, touched)
     db.commit()
     db.refresh(asset)
     return asset
@@ -462,51 +958,83 @@ def generate_derivatives(
 def _generate_derivatives_for_asset(
     db: Session, asset: Asset, payload: AssetDerivativeRequest
 ) -> None:
-    ratios = payload.ratios or settings.assets_derivative_ratios
-    widths = payload.widths or settings.assets_derivative_widths
+    sync_asset_variants(db, asset, ratios=payload.ratios, widths=payload.widths)
 
-    db.execute(
-        delete(AssetVariant).where(
-            AssetVariant.asset_id == asset.id,
-            AssetVariant.version == settings.assets_derivatives_version,
-        )
-    )
-    db.commit()
 
-    variants = generate_variants(
-        source_path=asset.original_path,
-        asset_id=asset.id,
-        focal_x=asset.focal_x,
-        focal_y=asset.focal_y,
-        ratios=ratios,
-        widths=widths,
-    )
+def _render_thumbnail_on_demand(db: Session, asset: Asset) -> AssetVariant | None:
+    width = thumbnail_width()
+    if width is None:
+        return None
+    try:
+        return ensure_variant(db, asset, settings.assets_derivative_ratios[0], width, "webp")
+    except (OSError, ValueError):
+        logger.warning("On-demand thumbnail render failed for asset %s", asset.id, exc_info=True)
+        return None
 
-    for variant in variants:
-        db.add(
-            AssetVariant(
-                asset_id=asset.id,
-                ratio=variant["ratio"],
-                width=variant["width"],
-                height=variant["height"],
-                format=variant["format"],
-                path=variant["path"],
-                version=settings.assets_derivatives_version,
-            )
-        )
-    db.commit()
 
+def _resolve_thumbnail(db: Session, asset_id: str, refresh: bool = False) -> ThumbnailEntry:
+    entry = None if refresh else thumbnail_cache.get(asset_id)
+    if entry is not None:
+        return entry
+
+    row = db.execute(
+        select(
+            Asset.thumbnail_path,
+            Asset.thumbnail_fingerprint,
+            Asset.original_path,
+            Asset.content_hash,
+        ).where(Asset.id == asset_id)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    if row.thumbnail_path and not refresh:
+        entry = ThumbnailEntry(path=row.thumbnail_path, etag_token=row.thumbnail_fingerprint)
+    else:
+        variant = refresh_variant_pointers(db, asset_id)
+        if variant is None or not os.path.exists(variant.path):
+            rendered = _render_thumbnail_on_demand(db, _get_asset_or_404(db, asset_id))
+            if rendered is not None:
+                variant = refresh_variant_pointers(db, asset_id)
+                if variant is None or not os.path.exists(variant.path):
+                    variant = rendered
+        if variant is not None:
+            entry = ThumbnailEntry(path=variant.path, etag_token=variant.fingerprint)
+        else:
+            entry = ThumbnailEntry(path=row.original_path, etag_token=row.content_hash)
+    thumbnail_cache.put(asset_id, entry)
+    return entry
+
+
+def _etag(token: str) -> str:
+    return f'"{token}"'
 
-def _select_thumbnail_variant(asset: Asset) -> AssetVariant | None:
-    if not asset.variants:
-        return None
 
-    def sort_key(variant: AssetVariant) -> tuple[int, int]:
-        format_score = 0 if variant.format == "webp" else 1
-        width_score = abs(variant.width - 800)
-        return (format_score, width_score)
+def _tile_etag(fingerprint: str, level: int, col: int, row: int) -> str:
+    return _etag(f"{fingerprint}-{level}-{col}-{row}")
 
-    return sorted(asset.variants, key=sort_key)[0]
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+def _cache_headers(etag: str | None, immutable: bool) -> dict[str, str]:
+    if immutable:
+        cache_control = f"private, max-age={settings.assets_http_cache_max_age}, immutable"
+    else:
+        cache_control = "private, no-cache"
+    headers = {"Cache-Control": cache_control}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def _not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
 
 
 def _safe_storage_path(path: str) -> str:
@@ -527,3 +1055,75 @@ def _safe_delete_tree(path: str) -> None:
     safe_path = _safe_storage_path(path)
     if os.path.isdir(safe_path):
         shutil.rmtree(safe_path, ignore_errors=True)
+
+
+def _find_asset_by_hash(db: Session, content_hash: str) -> Asset | None:
+    return db.execute(
+        select(Asset).where(Asset.content_hash == content_hash)
+    ).scalar_one_or_none()
+
+
+def _add_manual_tags(db: Session, asset_id: str, tags: list[str]) -> None:
+    existing = set(
+        db.execute(
+            select(AssetTag.tag).where(AssetTag.asset_id == asset_id, AssetTag.source == "manual")
+        ).scalars()
+    )
+    for tag in dict.fromkeys(tags):
+        if tag not in existing:
+            db.add(AssetTag(asset_id=asset_id, tag=tag, source="manual"))
+
+
+def _attach_duplicate_upload(
+    db: Session, asset: Asset, filename: str, tags: list[str]
+) -> AssetUploadOut:
+    aliases = list(asset.filename_aliases or [])
+    if filename != asset.original_filename and filename not in aliases:
+        asset.filename_aliases = aliases + [filename]
+    if tags:
+        _add_manual_tags(db, asset.id, tags)
+    refresh_search_documents(db, [asset.id])
+    db.commit()
+    db.refresh(asset)
+    response = AssetUploadOut.model_validate(asset)
+    response.duplicate = True
+    return response
+
+
+def _parse_tags(tags: str | None) -> list[str]:
+    return [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+
+
+def _form_bool(value: object, default: bool) -> bool:
+    if not isinstance(value, str):
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _is_archive_name(filename: str) -> bool:
+    return filename.lower().endswith((".zip", ".tar", ".tar.gz", ".tgz"))
+
+
+def _ingest_archive(
+    db: Session, path: str, tags: list[str], generate_derivatives: bool
+) -> list[dict]:
+    with archive_entries(path) as (entries, concurrent):
+        if len(entries) > settings.assets_batch_upload_max_files:
+            raise ValueError(
+                f"Archive has more than {settings.assets_batch_upload_max_files} images"
+            )
+        return ingest_batch(
+            db, entries, tags, generate_derivatives, workers=None if concurrent else 1
+        )
+
+
+def _batch_manifest(results: list[dict]) -> AssetBatchUploadOut:
+    counts = {"created": 0, "duplicate": 0, "failed": 0}
+    for item in results:
+        counts[item["status"]] += 1
+    return AssetBatchUploadOut(
+        items=results,
+        created=counts["created"],
+        duplicates=counts["duplicate"],
+        failed=counts["failed"],
+    )
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.services.asset_embeddings import sync_asset_embeddings
+from packages.domain.models.assets import Asset
+
+BATCH_SIZE = 200
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Embed assets whose caption or tags changed since their last embedding."
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    parse_args()
+    db = SessionLocal()
+    embedded = 0
+    last_id = None
+    try:
+        while True:
+            stmt = select(Asset.id).order_by(Asset.id.asc()).limit(BATCH_SIZE)
+            if last_id is not None:
+                stmt = stmt.where(Asset.id > last_id)
+            asset_ids = db.execute(stmt).scalars().all()
+            if not asset_ids:
+                break
+            embedded += sync_asset_embeddings(db, asset_ids)
+            db.commit()
+            last_id = asset_ids[-1]
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    print(f"Embedded {embedded} assets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
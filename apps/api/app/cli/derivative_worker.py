@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import argparse
+import signal
+import sys
+import time
+
+from app.core.settings import settings
+from app.services.derivative_jobs import process_next_job
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Process queued asset derivative jobs.")
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Drain the queue and exit instead of polling.",
+    )
+    parser.add_argument(
+        "--poll-seconds",
+        type=float,
+        default=settings.assets_derivative_job_poll_seconds,
+        help="Seconds to wait between polls when the queue is empty.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    stopping = False
+
+    def _request_stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    processed = 0
+    while not stopping:
+        if process_next_job():
+            processed += 1
+            continue
+        if args.once:
+            break
+        time.sleep(args.poll_seconds)
+
+    print(f"Processed {processed} derivative jobs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import argparse
+import json
+import multiprocessing
+import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterator
 
-from sqlalchemy import delete, select
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
 
 from app.core.settings import settings
 from app.db.session import SessionLocal
+from app.services.assets import DERIVATIVE_FORMATS
+from app.services.decode_budget import render_memory_budget
+from app.services.derivatives import VariantSyncResult, sync_asset_variants
 from packages.domain.models.assets import Asset, AssetVariant
-from app.services.assets import generate_variants
+
+STREAM_BATCH_SIZE = 500
 
 
 def parse_args() -> argparse.Namespace:
@@ -22,9 +34,204 @@ def parse_args() -> argparse.Namespace:
         "--widths",
         help="Comma-separated widths (e.g. 800,1200,2000). Defaults to settings.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Assets processed in parallel, one process each (default 1).",
+    )
+    parser.add_argument(
+        "--only-missing",
+        action="store_true",
+        help="Skip assets that already have every variant for the current version.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=os.path.join(settings.assets_storage_root, ".derivatives-checkpoint.json"),
+        help="Progress file used to resume an interrupted run.",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore any existing checkpoint and start from the first asset.",
+    )
     return parser.parse_args()
 
 
+class Checkpoint:
+    """Low-water mark over asset ids processed in id order.
+
+    Completions can arrive out of order when running in parallel, so the mark
+    only advances past an id once every earlier submitted id has finished.
+    """
+
+    def __init__(self, path: str, params: dict) -> None:
+        self.path = path
+        self.params = params
+        self.last_asset_id: str | None = None
+        self.failed: list[str] = []
+        self._pending: deque[str] = deque()
+        self._finished: set[str] = set()
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if data.get("params") != self.params:
+            print("Checkpoint was written for different settings; starting over.")
+            return False
+        self.last_asset_id = data.get("last_asset_id")
+        self.failed = list(data.get("failed") or [])
+        return True
+
+    def submitted(self, asset_id: str) -> None:
+        self._pending.append(asset_id)
+
+    def finished(self, asset_id: str, ok: bool) -> None:
+        if not ok and asset_id not in self.failed:
+            self.failed.append(asset_id)
+        if ok and asset_id in self.failed:
+            self.failed.remove(asset_id)
+        self._finished.add(asset_id)
+        advanced = False
+        while self._pending and self._pending[0] in self._finished:
+            done = self._pending.popleft()
+            self._finished.discard(done)
+            if self.last_asset_id is None or done > self.last_asset_id:
+                self.last_asset_id = done
+            advanced = True
+        if advanced:
+            self.save()
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        payload = {
+            "params": self.params,
+            "last_asset_id": self.last_asset_id,
+            "failed": self.failed,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _asset_filter(
+    ratios: list[str],
+    widths: list[int],
+    only_missing: bool,
+    asset_id: str | None,
+    checkpoint: Checkpoint | None,
+) -> list:
+    conditions = []
+    if asset_id:
+        conditions.append(Asset.id == asset_id)
+    if checkpoint is not None and checkpoint.last_asset_id is not None:
+        resume = Asset.id > checkpoint.last_asset_id
+        if checkpoint.failed:
+            resume = or_(resume, Asset.id.in_(checkpoint.failed))
+        conditions.append(resume)
+    if only_missing:
+        present = (
+            select(func.count(AssetVariant.id))
+            .where(
+                AssetVariant.asset_id == Asset.id,
+                AssetVariant.version == settings.assets_derivatives_version,
+                AssetVariant.on_demand.is_(False),
+                AssetVariant.ratio.in_(ratios),
+                AssetVariant.width.in_(widths),
+                AssetVariant.format.in_(DERIVATIVE_FORMATS),
+            )
+            .scalar_subquery()
+        )
+        conditions.append(present < len(ratios) * len(widths) * len(DERIVATIVE_FORMATS))
+    return conditions
+
+
+def _stream_asset_ids(db: Session, conditions: list) -> Iterator[str]:
+    # Keyset pages rather than one long cursor: no snapshot is held open for
+    # the length of the run, and only ids are loaded up front.
+    last_id = None
+    while True:
+        stmt = (
+            select(Asset.id)
+            .where(*conditions)
+            .order_by(Asset.id.asc())
+            .limit(STREAM_BATCH_SIZE)
+        )
+        if last_id is not None:
+            stmt = stmt.where(Asset.id > last_id)
+        batch = db.execute(stmt).scalars().all()
+        db.commit()
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1]
+
+
+def _sync_asset(
+    asset_id: str, ratios: list[str], widths: list[int], render_workers: int | None
+) -> VariantSyncResult | None:
+    db = SessionLocal()
+    try:
+        asset = db.get(Asset, asset_id)
+        if asset is None:
+            return None
+        return sync_asset_variants(db, asset, ratios=ratios, widths=widths, workers=render_workers)
+    finally:
+        db.close()
+
+
+def _init_worker(budget_bytes: int) -> None:
+    # The memory budget is per process; each worker gets its share of it.
+    render_memory_budget.limit_bytes = budget_bytes
+
+
+def _sync_asset_in_worker(
+    asset_id: str, ratios: list[str], widths: list[int]
+) -> VariantSyncResult | None:
+    # Parallelism is across assets here, so each process renders serially.
+    return _sync_asset(asset_id, ratios, widths, render_workers=1)
+
+
+class Progress:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+
+    def line(self) -> str:
+        self.done += 1
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = self.done / elapsed
+        remaining = max(self.total - self.done, 0)
+        eta = int(remaining / rate) if rate > 0 else 0
+        return (
+            f"[{self.done}/{self.total}] {rate:.2f} assets/s, "
+            f"ETA {eta // 3600:d}:{eta % 3600 // 60:02d}:{eta % 60:02d}"
+        )
+
+
+def _report(progress: Progress, asset_id: str, result: VariantSyncResult | None) -> None:
+    prefix = progress.line()
+    if result is None:
+        print(f"{prefix} Asset {asset_id}: not found")
+        return
+    print(
+        f"{prefix} Asset {asset_id}: rendered {result.rendered}, "
+        f"unchanged {result.unchanged}, removed {result.removed}"
+    )
+
+
 def main() -> int:
     args = parse_args()
     ratios = (
@@ -37,53 +244,98 @@ def main() -> int:
         if args.widths
         else settings.assets_derivative_widths
     )
+    workers = max(1, args.workers)
+
+    checkpoint = None
+    if not args.asset_id:
+        checkpoint = Checkpoint(
+            args.checkpoint,
+            {
+                "ratios": list(ratios),
+                "widths": list(widths),
+                "version": settings.assets_derivatives_version,
+                "only_missing": args.only_missing,
+            },
+        )
+        if not args.restart and checkpoint.load() and checkpoint.last_asset_id:
+            print(f"Resuming after asset {checkpoint.last_asset_id}.")
 
     db = SessionLocal()
     try:
-        query = select(Asset)
-        if args.asset_id:
-            query = query.where(Asset.id == args.asset_id)
-
-        assets = db.execute(query).scalars().all()
-        if not assets:
+        conditions = _asset_filter(ratios, widths, args.only_missing, args.asset_id, checkpoint)
+        total = db.execute(
+            select(func.count(Asset.id)).where(*conditions)
+        ).scalar_one()
+        if not total:
             print("No assets found.")
+            if checkpoint is not None:
+                checkpoint.clear()
             return 0
 
-        for asset in assets:
-            db.execute(
-                delete(AssetVariant).where(
-                    AssetVariant.asset_id == asset.id,
-                    AssetVariant.version == settings.assets_derivatives_version,
-                )
-            )
-            db.commit()
-
-            variants = generate_variants(
-                source_path=asset.original_path,
-                asset_id=asset.id,
-                focal_x=asset.focal_x,
-                focal_y=asset.focal_y,
-                ratios=ratios,
-                widths=widths,
-            )
+        progress = Progress(total)
+        failures = 0
+        asset_ids = _stream_asset_ids(db, conditions)
 
-            for variant in variants:
-                db.add(
-                    AssetVariant(
-                        asset_id=asset.id,
-                        ratio=variant["ratio"],
-                        width=variant["width"],
-                        height=variant["height"],
-                        format=variant["format"],
-                        path=variant["path"],
-                        version=settings.assets_derivatives_version,
-                    )
-                )
-            db.commit()
-            print(f"Generated {len(variants)} variants for asset {asset.id}")
+        if workers == 1:
+            for asset_id in asset_ids:
+                if checkpoint is not None:
+                    checkpoint.submitted(asset_id)
+                try:
+                    result = _sync_asset(asset_id, ratios, widths, render_workers=None)
+                except Exception as exc:
+                    failures += 1
+                    print(f"{progress.line()} Asset {asset_id}: failed ({exc})")
+                    if checkpoint is not None:
+                        checkpoint.finished(asset_id, ok=False)
+                    continue
+                _report(progress, asset_id, result)
+                if checkpoint is not None:
+                    checkpoint.finished(asset_id, ok=True)
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(render_memory_budget.share(workers),),
+            ) as executor:
+                in_flight: dict[Future, str] = {}
+                exhausted = False
+                while in_flight or not exhausted:
+                    # Keep a bounded window queued so the id stream stays lazy.
+                    while not exhausted and len(in_flight) < workers * 2:
+                        asset_id = next(asset_ids, None)
+                        if asset_id is None:
+                            exhausted = True
+                            break
+                        if checkpoint is not None:
+                            checkpoint.submitted(asset_id)
+                        future = executor.submit(_sync_asset_in_worker, asset_id, ratios, widths)
+                        in_flight[future] = asset_id
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        asset_id = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as exc:
+                            failures += 1
+                            print(f"{progress.line()} Asset {asset_id}: failed ({exc})")
+                            if checkpoint is not None:
+                                checkpoint.finished(asset_id, ok=False)
+                            continue
+                        _report(progress, asset_id, result)
+                        if checkpoint is not None:
+                            checkpoint.finished(asset_id, ok=True)
     finally:
         db.close()
 
+    if failures:
+        print(f"{failures} assets failed; rerun to retry them.")
+        return 1
+    if checkpoint is not None:
+        checkpoint.clear()
     return 0
 
 
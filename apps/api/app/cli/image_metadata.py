@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.services.asset_ingest import metadata_columns
+from app.services.asset_search import refresh_search_documents
+from app.services.image_metadata import extract_image_metadata
+from packages.domain.models.assets import Asset
+
+BATCH_SIZE = 200
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Extract image metadata for assets ingested before it was stored."
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Re-read every asset instead of only those without stored metadata.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    db = SessionLocal()
+    updated = 0
+    failed = 0
+    last_id = None
+    try:
+        while True:
+            stmt = select(Asset).order_by(Asset.id.asc()).limit(BATCH_SIZE)
+            if not args.all:
+                stmt = stmt.where(Asset.orientation.is_(None))
+            if last_id is not None:
+                stmt = stmt.where(Asset.id > last_id)
+            assets = db.execute(stmt).scalars().all()
+            if not assets:
+                break
+            for asset in assets:
+                if not os.path.exists(asset.original_path):
+                    failed += 1
+                    print(f"Asset {asset.id}: original missing")
+                    continue
+                try:
+                    metadata = extract_image_metadata(asset.original_path)
+                except Exception as exc:
+                    failed += 1
+                    print(f"Asset {asset.id}: failed ({exc})")
+                    continue
+                for key, value in metadata_columns(metadata).items():
+                    setattr(asset, key, value)
+                updated += 1
+            refresh_search_documents(db, [asset.id for asset in assets])
+            db.commit()
+            last_id = assets[-1].id
+    finally:
+        db.close()
+
+    print(f"Updated {updated} assets.")
+    if failed:
+        print(f"{failed} assets could not be read.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
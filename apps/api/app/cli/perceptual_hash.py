@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.services.perceptual_hash import dhash_columns
+from packages.domain.models.assets import Asset
+
+BATCH_SIZE = 200
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compute perceptual hashes for assets ingested before they were stored."
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Rehash every asset instead of only those without a stored hash.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    db = SessionLocal()
+    updated = 0
+    failed = 0
+    last_id = None
+    try:
+        while True:
+            stmt = select(Asset).order_by(Asset.id.asc()).limit(BATCH_SIZE)
+            if not args.all:
+                stmt = stmt.where(Asset.dhash_0.is_(None))
+            if last_id is not None:
+                stmt = stmt.where(Asset.id > last_id)
+            assets = db.execute(stmt).scalars().all()
+            if not assets:
+                break
+            for asset in assets:
+                if not os.path.exists(asset.original_path):
+                    failed += 1
+                    print(f"Asset {asset.id}: original missing")
+                    continue
+                columns = dhash_columns(asset.original_path, asset.orientation)
+                if columns["dhash_0"] is None:
+                    failed += 1
+                    print(f"Asset {asset.id}: could not be hashed")
+                    continue
+                for key, value in columns.items():
+                    setattr(asset, key, value)
+                updated += 1
+            db.commit()
+            last_id = assets[-1].id
+    finally:
+        db.close()
+
+    print(f"Hashed {updated} assets.")
+    if failed:
+        print(f"{failed} assets could not be read.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
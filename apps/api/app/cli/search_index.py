@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.services.asset_search import backfill_search_documents
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rebuild asset search documents.")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Rebuild every asset instead of only those without a search document.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        updated = backfill_search_documents(db, rebuild=args.all)
+    finally:
+        db.close()
+
+    print(f"Indexed {updated} assets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
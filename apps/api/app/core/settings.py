@@ -18,10 +18,50 @@ class Settings(BaseSettings):
     assets_derivatives_version: int = 1
     assets_derivative_ratios: list[str] = ["3:2", "5:7", "1:1"]
     assets_derivative_widths: list[int] = [800, 1200, 2000]
+    assets_derivative_workers: int = 0
+    assets_derivative_pyramid: bool = True
+    # Variants rendered at upload: "thumbnail", "all" or "none". Everything
+    # else renders on first request through /render.
+    assets_upload_prerender: str = "thumbnail"
+    assets_encoder_mode: str = "fixed"
+    assets_encoder_target_ssim: float = 0.985
+    assets_encoder_target_bpp: float = 1.5
+    assets_encoder_min_quality: int = 40
+    assets_encoder_max_quality: int = 95
+    assets_encoder_max_iterations: int = 6
+    assets_render_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    assets_render_memory_budget_mb: int = 192
+    assets_bounded_decode_min_pixels: int = 24_000_000
+    assets_bounded_decode_strip_rows: int = 256
+    assets_max_image_pixels: int = 100_000_000
+    assets_thumbnail_cache_size: int = 10000
+    assets_thumbnail_cache_ttl_seconds: float = 300.0
+    assets_upload_max_bytes: int = 200 * 1024 * 1024
+    assets_upload_chunk_bytes: int = 1024 * 1024
+    assets_batch_upload_max_files: int = 1000
+    assets_batch_upload_max_bytes: int = 4 * 1024 * 1024 * 1024
+    assets_batch_upload_workers: int = 4
+    assets_http_cache_max_age: int = 365 * 24 * 60 * 60
+    assets_srcset_max_ids: int = 200
+    assets_list_default_limit: int = 100
+    assets_list_max_limit: int = 500
+    assets_facets_cache_size: int = 256
+    assets_facets_cache_ttl_seconds: float = 60.0
+    assets_embedding_batch_size: int = 64
+    assets_semantic_search_max_limit: int = 100
+    assets_semantic_search_ef_search: int = 100
+    assets_similar_max_distance: int = 7
+    assets_duplicate_max_distance: int = 3
+    assets_tiles_enabled: bool = False
+    assets_derivative_worker_enabled: bool = True
+    assets_derivative_job_concurrency: int = 2
+    assets_derivative_job_poll_seconds: float = 2.0
+    assets_derivative_job_timeout_seconds: int = 900
+    assets_derivative_job_max_attempts: int = 3
     openai_api_key: str | None = None
     openai_tagging_model: str = "gpt-5-mini"
     openai_tagging_prompt_version: str = "2025-02-05"
-    openai_tagging_schema_version: str = "v1"
+    openai_tagging_schema_version: str = "v2"
     openai_tagging_image_max_width: int = 512
     openai_embedding_model: str = "text-embedding-3-small"
     openai_embedding_dimensions: int = 1536
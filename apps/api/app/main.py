@@ -3,8 +3,10 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
 from app.core.settings import settings
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, engine
+from app.services.asset_search import ensure_search_index
 from app.services.auth import ensure_bootstrap_user
+from app.services.derivative_jobs import start_derivative_workers, stop_derivative_workers
 
 app = FastAPI(title=settings.app_name)
 
@@ -14,6 +16,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
 app.include_router(api_router, prefix=settings.api_v1_prefix)
@@ -23,3 +26,19 @@ app.include_router(api_router, prefix=settings.api_v1_prefix)
 def _bootstrap_auth_user() -> None:
     with SessionLocal() as db:
         ensure_bootstrap_user(db)
+
+
+@app.on_event("startup")
+def _ensure_search_index() -> None:
+    ensure_search_index(engine)
+
+
+@app.on_event("startup")
+def _start_derivative_workers() -> None:
+    if settings.assets_derivative_worker_enabled:
+        start_derivative_workers()
+
+
+@app.on_event("shutdown")
+def _stop_derivative_workers() -> None:
+    stop_derivative_workers()
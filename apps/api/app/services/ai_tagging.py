@@ -16,6 +16,9 @@ from sqlalchemy import delete, select
 from app.core.settings import settings
 from app.db.session import SessionLocal
 from packages.domain.models.assets import Asset, AssetAutoTagJob, AssetTag, TagTaxonomy
+from app.services.asset_embeddings import sync_asset_embeddings
+from app.services.asset_search import refresh_search_documents
+from app.services.image_metadata import apply_orientation
 from app.services.openai_usage import increment_usage
 
 logger = logging.getLogger(__name__)
@@ -85,8 +88,12 @@ def run_auto_tagging_job(asset_id: str) -> None:
             )
             return
 
+        # Tag the whole frame: the stored thumbnail is a focal crop and can
+        # cut away what the tags describe. Draft decoding keeps this cheap.
         image_data_url = _build_image_data_url(
-            asset.original_path, max_width=settings.openai_tagging_image_max_width
+            asset.original_path,
+            max_width=settings.openai_tagging_image_max_width,
+            orientation=asset.orientation,
         )
 
         response = _request_tagging(
@@ -95,6 +102,8 @@ def run_auto_tagging_job(asset_id: str) -> None:
         )
         _record_usage(db, response)
         service_tags, suggested_tags = _parse_tagging_response(response, approved_tags)
+        asset.caption = _parse_caption(response)
+        asset.suggested_tags = suggested_tags
 
         db.execute(
             delete(AssetTag).where(
@@ -115,7 +124,9 @@ def run_auto_tagging_job(asset_id: str) -> None:
         for tag in suggested_tags:
             _upsert_taxonomy(db, tag, status="pending")
 
+        refresh_search_documents(db, [asset_id])
         db.commit()
+        _sync_embedding(db, asset_id)
         set_autotag_job_status(db, asset_id, "completed", completed=True)
     except Exception as exc:
         db.rollback()
@@ -134,9 +145,21 @@ def run_auto_tagging_job(asset_id: str) -> None:
         db.close()
 
 
-def _build_image_data_url(path: str, max_width: int) -> str:
+def _sync_embedding(db, asset_id: str) -> None:
+    # The tags are already saved; a failed embedding leaves the asset for the
+    # backfill CLI rather than failing the tagging job.
+    try:
+        sync_asset_embeddings(db, [asset_id])
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Embedding failed for asset %s", asset_id)
+
+
+def _build_image_data_url(path: str, max_width: int, orientation: int | None = None) -> str:
     with Image.open(path) as image:
-        image = image.convert("RGB")
+        image.draft("RGB", (max_width, max_width))
+        image = apply_orientation(image.convert("RGB"), orientation)
         if image.width > max_width:
             height = int(round(image.height * (max_width / image.width)))
             image = image.resize((max_width, height), Image.LANCZOS)
@@ -161,6 +184,7 @@ def _request_tagging(image_data_url: str, allowed_tags: Iterable[str]) -> dict:
     prompt = (
         "You are a photo tagging assistant. "
         "Classify the image into service tags and suggest any additional tags. "
+        "Write a one-sentence caption of what the image shows, in under 20 words. "
         "Use only tags from the allowed list for service_tags. "
         "Portraits should only be used for single individuals or couples where the photo is focused on faces. "
         "Return JSON that matches the schema."
@@ -185,8 +209,9 @@ def _request_tagging(image_data_url: str, allowed_tags: Iterable[str]) -> dict:
                 "type": "array",
                 "items": {"type": "string"},
             },
+            "caption": {"type": "string"},
         },
-        "required": ["service_tags", "suggested_tags"],
+        "required": ["service_tags", "suggested_tags", "caption"],
         "additionalProperties": False,
     }
 
@@ -217,7 +242,8 @@ def _request_tagging(image_data_url: str, allowed_tags: Iterable[str]) -> dict:
             http_client.close()
 
     payload = _extract_response_text(response)
-    return json.loads(payload) if payload else {"service_tags": [], "suggested_tags": []}
+    empty = {"service_tags": [], "suggested_tags": [], "caption": ""}
+    return json.loads(payload) if payload else empty
 
 
 def _record_usage(db, response: object) -> None:
@@ -281,6 +307,11 @@ def _parse_tagging_response(payload: dict, allowed_tags: Iterable[str]) -> tuple
     return service_tags, sorted(set(suggested))
 
 
+def _parse_caption(payload: dict) -> str | None:
+    caption = " ".join(str(payload.get("caption") or "").split())
+    return caption[:300] or None
+
+
 def _normalize_tag(tag: str) -> str:
     cleaned = "".join(
         ch if ch.isalnum() or ch in {".", "-", " "} else " " for ch in tag.lower()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.services.asset_listing import AssetFilters, apply_asset_filters, load_options
+from app.services.embeddings import embed_text, embed_texts
+from packages.domain.models.assets import Asset, AssetEmbedding, AssetTag
+
+
+def embedding_content(
+    caption: str | None, tags: Iterable[str], suggested_tags: Iterable[str] | None
+) -> str:
+    """Text embedded for an asset: its caption, then its tags as plain words."""
+    lines = []
+    if caption:
+        lines.append(caption.strip())
+    tag_words = _tag_words(tags)
+    if tag_words:
+        lines.append(f"Tags: {', '.join(tag_words)}")
+    suggested_words = [word for word in _tag_words(suggested_tags or []) if word not in tag_words]
+    if suggested_words:
+        lines.append(f"Also: {', '.join(suggested_words)}")
+    return "\n".join(lines)
+
+
+def content_hash(content: str) -> str:
+    key = f"{settings.openai_embedding_model}:{settings.openai_embedding_dimensions}\n{content}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def sync_asset_embeddings(db: Session, asset_ids: Iterable[str]) -> int:
+    """Embed assets whose caption or tags changed since their last embedding.
+
+    Changed assets go to the embeddings API in batches; returns how many were
+    embedded. Assets with nothing to embed lose any stale embedding.
+    """
+    asset_ids = list(dict.fromkeys(asset_ids))
+    if not asset_ids:
+        return 0
+    db.flush()
+    tags: dict[str, list[str]] = defaultdict(list)
+    for asset_id, tag in db.execute(
+        select(AssetTag.asset_id, AssetTag.tag)
+        .where(AssetTag.asset_id.in_(asset_ids))
+        .distinct()
+        .order_by(AssetTag.asset_id, AssetTag.tag)
+    ):
+        tags[asset_id].append(tag)
+    existing = {
+        record.asset_id: record
+        for record in db.execute(
+            select(AssetEmbedding).where(AssetEmbedding.asset_id.in_(asset_ids))
+        ).scalars()
+    }
+
+    pending: list[tuple[str, str, str]] = []
+    for asset_id, caption, suggested_tags in db.execute(
+        select(Asset.id, Asset.caption, Asset.suggested_tags).where(Asset.id.in_(asset_ids))
+    ):
+        content = embedding_content(caption, tags[asset_id], suggested_tags)
+        record = existing.get(asset_id)
+        if not content:
+            if record is not None:
+                db.delete(record)
+            continue
+        digest = content_hash(content)
+        if record is None or record.content_hash != digest:
+            pending.append((asset_id, content, digest))
+
+    batch_size = max(settings.assets_embedding_batch_size, 1)
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start : start + batch_size]
+        vectors = embed_texts([content for _, content, _ in batch], db)
+        for (asset_id, content, digest), vector in zip(batch, vectors):
+            record = existing.get(asset_id)
+            if record is None:
+                record = AssetEmbedding(asset_id=asset_id)
+                db.add(record)
+            record.content = content
+            record.content_hash = digest
+            record.model = settings.openai_embedding_model
+            record.embedding = vector
+    return len(pending)
+
+
+def semantic_search(
+    db: Session, query: str, filters: AssetFilters, limit: int, dialect: str | None
+) -> list[tuple[Asset, float]]:
+    """Assets nearest to ``query`` with ``filters`` applied, best first, with cosine scores."""
+    vector = embed_text(query, db)
+    if dialect == "postgresql":
+        distance = AssetEmbedding.embedding.cosine_distance(vector)
+        # The HNSW scan filters after it walks the graph; a wider candidate
+        # list keeps filtered queries from coming back short.
+        ef_search = max(settings.assets_semantic_search_ef_search, limit)
+        db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        stmt = apply_asset_filters(
+            select(Asset, distance.label("distance")).join(
+                AssetEmbedding, AssetEmbedding.asset_id == Asset.id
+            ),
+            filters,
+            dialect,
+        )
+        rows = db.execute(
+            stmt.options(*load_options("summary")).order_by(distance).limit(limit)
+        ).all()
+        return [(asset, 1.0 - float(dist)) for asset, dist in rows]
+
+    # Local databases have no vector operators; rank the filtered candidates here.
+    candidates = db.execute(
+        apply_asset_filters(
+            select(AssetEmbedding.asset_id, AssetEmbedding.embedding).join(
+                Asset, Asset.id == AssetEmbedding.asset_id
+            ),
+            filters,
+            dialect,
+        )
+    ).all()
+    if not candidates:
+        return []
+    matrix = np.asarray([embedding for _, embedding in candidates], dtype=np.float32)
+    target = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(target)
+    scores = matrix @ target / np.where(norms == 0, 1.0, norms)
+    best = np.argsort(-scores, kind="stable")[:limit]
+    ids = [candidates[index][0] for index in best]
+    assets = {
+        asset.id: asset
+        for asset in db.execute(
+            select(Asset).where(Asset.id.in_(ids)).options(*load_options("summary"))
+        ).scalars()
+    }
+    return [(assets[candidates[index][0]], float(scores[index])) for index in best]
+
+
+def _tag_words(tags: Iterable[str]) -> list[str]:
+    # "family.kids" / "golden-hour" embed better as "family kids" / "golden hour".
+    words = (" ".join(tag.replace(".", " ").replace("-", " ").split()) for tag in tags)
+    return list(dict.fromkeys(word for word in words if word))
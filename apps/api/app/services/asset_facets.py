@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from itertools import chain
+
+from sqlalchemy import String, case, cast, event, func, inspect, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.services.asset_listing import AssetFilters, apply_asset_filters
+from packages.domain.models.assets import Asset, AssetRole, AssetTag
+
+# Response field for each facet, in response order.
+FACET_FIELDS = {
+    "tag": "tags",
+    "role": "roles",
+    "orientation": "orientations",
+    "rating": "ratings",
+    "starred": "starred",
+}
+
+# Asset columns that some filter or facet reads; other updates (derivative
+# pointers, usage counters) leave the counts alone.
+_FACET_ASSET_COLUMNS = (
+    "original_filename",
+    "width",
+    "height",
+    "rating",
+    "starred",
+    "captured_at",
+    "search_document",
+)
+
+
+def filter_signature(filters: AssetFilters) -> str:
+    values = {
+        key: sorted(value) if isinstance(value, list) else value
+        for key, value in asdict(filters).items()
+    }
+    return json.dumps(values, sort_keys=True, default=str)
+
+
+def compute_facets(db: Session, filters: AssetFilters, dialect: str | None) -> dict:
+    """Count every facet value over the filtered assets in one aggregate query."""
+    filtered = apply_asset_filters(
+        select(Asset.id, Asset.aspect_orientation, Asset.rating, Asset.starred),
+        filters,
+        dialect,
+    ).cte("filtered")
+    # One (facet, value, asset) row per membership; a single GROUP BY then
+    # counts them all. Tags repeat per source, hence the distinct count.
+    memberships = union_all(
+        select(literal("total").label("facet"), literal("").label("value"), filtered.c.id),
+        select(literal("tag"), AssetTag.tag, filtered.c.id).join(
+            AssetTag, AssetTag.asset_id == filtered.c.id
+        ),
+        select(literal("role"), AssetRole.role, filtered.c.id).join(
+            AssetRole, AssetRole.asset_id == filtered.c.id
+        ),
+        select(literal("orientation"), filtered.c.aspect_orientation, filtered.c.id),
+        select(literal("rating"), cast(filtered.c.rating, String), filtered.c.id),
+        select(
+            literal("starred"), case((filtered.c.starred, "true"), else_="false"), filtered.c.id
+        ),
+    ).subquery("memberships")
+    facet, value, asset_id = memberships.c.facet, memberships.c.value, memberships.c.id
+    rows = db.execute(
+        select(facet, value, func.count(func.distinct(asset_id))).group_by(facet, value)
+    ).all()
+
+    result: dict = {"total": 0, **{field: [] for field in FACET_FIELDS.values()}}
+    for name, facet_value, count in rows:
+        if name == "total":
+            result["total"] = count
+        else:
+            result[FACET_FIELDS[name]].append({"value": facet_value, "count": count})
+    for field in FACET_FIELDS.values():
+        result[field].sort(key=lambda item: (-item["count"], item["value"]))
+    return result
+
+
+class FacetCache:
+    """Process-local LRU of filter signature -> facet counts.
+
+    Commits that touch assets, tags or roles bump the generation and drop
+    every entry; ``ttl_seconds`` bounds staleness from other processes.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, signature: str) -> dict | None:
+        with self._lock:
+            item = self._entries.get(signature)
+            if item is None:
+                return None
+            expires_at, facets = item
+            if expires_at <= time.monotonic():
+                del self._entries[signature]
+                return None
+            self._entries.move_to_end(signature)
+            return facets
+
+    def put(self, signature: str, facets: dict, generation: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            # Counted before a mutation committed; caching it would pin stale data.
+            if generation != self.generation:
+                return
+            self._entries[signature] = (time.monotonic() + self.ttl_seconds, facets)
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+facet_cache = FacetCache(
+    max_entries=settings.assets_facets_cache_size,
+    ttl_seconds=settings.assets_facets_cache_ttl_seconds,
+)
+
+
+def _changes_facets(instance: object) -> bool:
+    if isinstance(instance, (AssetTag, AssetRole)):
+        return True
+    if isinstance(instance, Asset):
+        state = inspect(instance)
+        return any(state.attrs[name].history.has_changes() for name in _FACET_ASSET_COLUMNS)
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_facets_stale(session: Session, flush_context) -> None:
+    facet_models = (Asset, AssetTag, AssetRole)
+    if (
+        any(isinstance(obj, facet_models) for obj in chain(session.new, session.deleted))
+        or any(_changes_facets(obj) for obj in session.dirty)
+    ):
+        session.info["asset_facets_stale"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_facets_stale(orm_execute_state) -> None:
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (Asset, AssetTag, AssetRole):
+        return
+    if mapper.class_ is Asset and orm_execute_state.is_update:
+        # Derivative pointer refreshes update assets constantly; only a SET
+        # of a filtered column matters.
+        parameters = orm_execute_state.parameters
+        rows = parameters if isinstance(parameters, list) else [parameters or {}]
+        columns = set(orm_execute_state.statement.compile().params)
+        columns.update(key for row in rows for key in row)
+        if columns.isdisjoint(_FACET_ASSET_COLUMNS):
+            return
+    orm_execute_state.session.info["asset_facets_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_facets(session: Session) -> None:
+    if session.info.pop("asset_facets_stale", False):
+        facet_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_facets_mark(session: Session) -> None:
+    session.info.pop("asset_facets_stale", None)
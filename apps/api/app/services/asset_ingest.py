@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import mimetypes
+import os
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterable, BinaryIO, Callable, ContextManager, Iterator
+from uuid import uuid4
+
+from fastapi import UploadFile
+from PIL import UnidentifiedImageError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.services.asset_search import refresh_search_documents
+from app.services.assets import ensure_dir
+from app.services.decode_budget import ImageTooLargeError
+from app.services.derivative_jobs import enqueue_derivative_jobs, upload_render_targets
+from app.services.image_metadata import ImageMetadata, extract_image_metadata
+from app.services.perceptual_hash import dhash_columns
+from packages.domain.models.assets import Asset, AssetTag
+
+logger = logging.getLogger(__name__)
+
+BATCH_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff"}
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+def client_error_message(exc: Exception) -> str:
+    """What an upload failure tells the client; the full error may name staging paths."""
+    if isinstance(exc, (UploadTooLargeError, ImageTooLargeError)):
+        return str(exc)
+    if isinstance(exc, UnidentifiedImageError):
+        return "Not a supported image"
+    return exc.__class__.__name__
+
+
+@dataclass(frozen=True)
+class StagedUpload:
+    path: str
+    size: int
+    content_hash: str
+
+
+class _StagingWriter:
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        ensure_dir(directory)
+        fd, self.path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=directory)
+        self._handle = os.fdopen(fd, "wb")
+        self._digest = hashlib.sha256()
+        self._max_bytes = max_bytes
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self._max_bytes and self.size > self._max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {self._max_bytes} bytes")
+        self._digest.update(chunk)
+        self._handle.write(chunk)
+
+    def finish(self) -> StagedUpload:
+        self._handle.close()
+        return StagedUpload(path=self.path, size=self.size, content_hash=self._digest.hexdigest())
+
+    def abort(self) -> None:
+        self._handle.close()
+        discard_staged_path(self.path)
+
+
+async def stage_upload(
+    file: UploadFile, directory: str | None = None, max_bytes: int | None = None
+) -> StagedUpload:
+    writer = _StagingWriter(
+        directory or settings.assets_originals_dir,
+        settings.assets_upload_max_bytes if max_bytes is None else max_bytes,
+    )
+    try:
+        while chunk := await file.read(settings.assets_upload_chunk_bytes):
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+async def stage_chunks(
+    chunks: AsyncIterable[bytes], directory: str | None = None, max_bytes: int | None = None
+) -> StagedUpload:
+    writer = _StagingWriter(
+        directory or settings.assets_originals_dir,
+        settings.assets_upload_max_bytes if max_bytes is None else max_bytes,
+    )
+    try:
+        async for chunk in chunks:
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+def stage_stream(
+    stream: BinaryIO, directory: str | None = None, max_bytes: int | None = None
+) -> StagedUpload:
+    writer = _StagingWriter(
+        directory or settings.assets_originals_dir,
+        settings.assets_upload_max_bytes if max_bytes is None else max_bytes,
+    )
+    try:
+        while chunk := stream.read(settings.assets_upload_chunk_bytes):
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+def content_addressed_path(content_hash: str, ext: str) -> str:
+    return os.path.join(
+        settings.assets_originals_dir,
+        content_hash[:2],
+        content_hash[2:4],
+        f"{content_hash}{ext.lower()}",
+    )
+
+
+def metadata_columns(metadata: ImageMetadata) -> dict:
+    return {
+        "width": metadata.width,
+        "height": metadata.height,
+        "orientation": metadata.orientation,
+        "captured_at": metadata.captured_at,
+        "camera_make": metadata.camera_make,
+        "camera_model": metadata.camera_model,
+        "image_metadata": metadata.details or None,
+    }
+
+
+def commit_staged_upload(staged: StagedUpload, destination: str) -> str:
+    ensure_dir(os.path.dirname(destination))
+    os.replace(staged.path, destination)
+    return destination
+
+
+def discard_staged_path(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@dataclass(frozen=True)
+class BatchEntry:
+    filename: str
+    open: Callable[[], ContextManager[BinaryIO]]
+    mime_type: str | None = None
+
+
+@dataclass
+class _StagedEntry:
+    entry: BatchEntry
+    staged: StagedUpload | None = None
+    metadata: ImageMetadata | None = None
+    dhash: dict = field(default_factory=dict)
+    error: str | None = None
+    result: dict = field(default_factory=dict)
+
+
+def is_batch_image(filename: str) -> bool:
+    basename = os.path.basename(filename)
+    if not basename or basename.startswith(".") or "__MACOSX" in filename:
+        return False
+    return os.path.splitext(basename)[1].lower() in BATCH_IMAGE_EXTENSIONS
+
+
+@contextmanager
+def archive_entries(path: str) -> Iterator[tuple[list[BatchEntry], bool]]:
+    """Yield the image entries of a zip or tar archive and whether they can be read concurrently."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            entries = [
+                BatchEntry(
+                    filename=info.filename,
+                    open=lambda info=info: archive.open(info),
+                    mime_type=mimetypes.guess_type(info.filename)[0],
+                )
+                for info in archive.infolist()
+                if not info.is_dir() and is_batch_image(info.filename)
+            ]
+            yield entries, True
+        return
+
+    if tarfile.is_tarfile(path):
+        with tarfile.open(path, "r:*") as archive:
+            entries = [
+                BatchEntry(
+                    filename=member.name,
+                    open=lambda member=member: archive.extractfile(member),
+                    mime_type=mimetypes.guess_type(member.name)[0],
+                )
+                for member in archive.getmembers()
+                if member.isfile() and is_batch_image(member.name)
+            ]
+            # Tar members share one sequential stream; read them one at a time.
+            yield entries, False
+        return
+
+    raise ValueError("Unsupported archive format; expected zip or tar")
+
+
+def _stage_entry(entry: BatchEntry) -> _StagedEntry:
+    item = _StagedEntry(entry=entry)
+    try:
+        with entry.open() as stream:
+            item.staged = stage_stream(stream)
+        item.metadata = extract_image_metadata(item.staged.path)
+        item.dhash = dhash_columns(item.staged.path, item.metadata.orientation)
+    except Exception as exc:
+        if item.staged is not None:
+            discard_staged_path(item.staged.path)
+            item.staged = None
+        item.error = client_error_message(exc)
+        logger.warning(
+            "Skipping batch entry %s: %s: %s", entry.filename, exc.__class__.__name__, exc
+        )
+    return item
+
+
+def ingest_batch(
+    db: Session,
+    entries: list[BatchEntry],
+    tags: list[str] | None = None,
+    generate_derivatives: bool = True,
+    workers: int | None = None,
+) -> list[dict]:
+    pool_size = max(1, workers or settings.assets_batch_upload_workers)
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        items = list(executor.map(_stage_entry, entries))
+
+    for item in items:
+        if item.error:
+            item.result = {
+                "filename": item.entry.filename,
+                "status": "failed",
+                "asset_id": None,
+                "error": item.error,
+            }
+
+    pending = [item for item in items if item.staged is not None]
+    try:
+        created_ids = _insert_batch_assets(db, pending, tags or [])
+    except IntegrityError:
+        # A concurrent upload inserted one of our hashes; retry once so those
+        # entries resolve as duplicates of the winning asset.
+        db.rollback()
+        created_ids = _insert_batch_assets(db, pending, tags or [])
+
+    targets = upload_render_targets() if generate_derivatives else None
+    if targets is not None and created_ids:
+        enqueue_derivative_jobs(db, created_ids, *targets)
+
+    return [item.result for item in items]
+
+
+def _insert_batch_assets(db: Session, items: list[_StagedEntry], tags: list[str]) -> list[str]:
+    hashes = {item.staged.content_hash for item in items}
+    existing: dict[str, Asset] = {}
+    if hashes:
+        existing = {
+            asset.content_hash: asset
+            for asset in db.execute(select(Asset).where(Asset.content_hash.in_(hashes))).scalars()
+        }
+
+    rows: dict[str, dict] = {}
+    aliases: dict[str, list[str]] = {}
+    for item in items:
+        content_hash = item.staged.content_hash
+        filename = os.path.basename(item.entry.filename) or "upload"
+        ext = os.path.splitext(filename)[1] or ".jpg"
+        destination = content_addressed_path(content_hash, ext)
+        match = existing.get(content_hash)
+        if match is not None:
+            if os.path.exists(item.staged.path):
+                discard_staged_path(item.staged.path)
+            elif os.path.realpath(destination) != os.path.realpath(match.original_path):
+                discard_staged_path(destination)
+            aliases.setdefault(match.id, []).append(filename)
+            item.result = _batch_result(item.entry.filename, "duplicate", match.id)
+            continue
+
+        row = rows.get(content_hash)
+        if row is not None:
+            discard_staged_path(item.staged.path)
+            if filename != row["original_filename"]:
+                row["filename_aliases"] = (row["filename_aliases"] or []) + [filename]
+            item.result = _batch_result(item.entry.filename, "duplicate", row["id"])
+            continue
+
+        if os.path.exists(item.staged.path):
+            commit_staged_upload(item.staged, destination)
+        row = {
+            "id": str(uuid4()),
+            "original_path": destination,
+            "original_filename": filename,
+            "filename_aliases": None,
+            "mime_type": item.entry.mime_type or "application/octet-stream",
+            "content_hash": content_hash,
+            **metadata_columns(item.metadata),
+            **item.dhash,
+        }
+        rows[content_hash] = row
+        item.result = _batch_result(item.entry.filename, "created", row["id"])
+
+    if rows:
+        db.execute(insert(Asset), list(rows.values()))
+
+    for asset in existing.values():
+        new_aliases = [
+            name
+            for name in dict.fromkeys(aliases.get(asset.id, []))
+            if name != asset.original_filename and name not in (asset.filename_aliases or [])
+        ]
+        if new_aliases:
+            asset.filename_aliases = list(asset.filename_aliases or []) + new_aliases
+
+    if tags:
+        tag_rows = [
+            {"asset_id": row["id"], "tag": tag, "source": "manual"}
+            for row in rows.values()
+            for tag in dict.fromkeys(tags)
+        ]
+        duplicate_ids = [asset.id for asset in existing.values() if asset.id in aliases]
+        if duplicate_ids:
+            present = set(
+                db.execute(
+                    select(AssetTag.asset_id, AssetTag.tag).where(
+                        AssetTag.asset_id.in_(duplicate_ids), AssetTag.source == "manual"
+                    )
+                ).all()
+            )
+            tag_rows.extend(
+                {"asset_id": asset_id, "tag": tag, "source": "manual"}
+                for asset_id in duplicate_ids
+                for tag in dict.fromkeys(tags)
+                if (asset_id, tag) not in present
+            )
+        if tag_rows:
+            db.execute(insert(AssetTag), tag_rows)
+
+    refresh_search_documents(db, [*(row["id"] for row in rows.values()), *aliases])
+    db.commit()
+    return [row["id"] for row in rows.values()]
+
+
+def _batch_result(filename: str, status: str, asset_id: str | None) -> dict:
+    return {"filename": filename, "status": status, "asset_id": asset_id, "error": None}
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Select, and_, func, literal, or_, select
+from sqlalchemy.orm import InstrumentedAttribute, Session, aliased, load_only, selectinload
+
+from app.services.asset_search import search_condition
+from packages.domain.models.assets import Asset, AssetRole, AssetTag
+
+DEFAULT_SORT = "newest"
+ORIENTATIONS = ("landscape", "portrait", "square")
+# Ranks search matches, ties broken newest first. The rank is computed per
+# query, so its cursor carries the rank value rather than naming a column.
+RELEVANCE_SORT = "relevance"
+
+# Everything the grid renders, plus every sort key so cursors never lazy-load.
+SUMMARY_COLUMNS = (
+    Asset.id,
+    Asset.original_filename,
+    Asset.mime_type,
+    Asset.width,
+    Asset.height,
+    Asset.orientation,
+    Asset.captured_at,
+    Asset.focal_x,
+    Asset.focal_y,
+    Asset.placeholder,
+    Asset.dominant_color,
+    Asset.rating,
+    Asset.starred,
+    Asset.created_at,
+    Asset.updated_at,
+    Asset.thumbnail_fingerprint,
+)
+
+
+@dataclass(frozen=True)
+class AssetFilters:
+    search: str | None = None
+    tags: list[str] | None = None
+    roles: list[str] | None = None
+    orientations: list[str] | None = None
+    min_rating: int | None = None
+    starred: bool | None = None
+    captured_after: datetime | None = None
+    captured_before: datetime | None = None
+
+
+@dataclass(frozen=True)
+class SortKey:
+    column: InstrumentedAttribute
+    descending: bool
+    # Nullable keys sort their NULLs last in either direction.
+    nullable: bool = False
+
+
+# Every sort ends in the primary key so the order is total and a cursor
+# names exactly one position.
+SORT_KEYS: dict[str, tuple[SortKey, ...]] = {
+    "newest": (SortKey(Asset.created_at, True), SortKey(Asset.id, True)),
+    "oldest": (SortKey(Asset.created_at, False), SortKey(Asset.id, False)),
+    "rating": (
+        SortKey(Asset.rating, True),
+        SortKey(Asset.created_at, True),
+        SortKey(Asset.id, True),
+    ),
+    "captured": (
+        SortKey(Asset.captured_at, True, nullable=True),
+        SortKey(Asset.created_at, True),
+        SortKey(Asset.id, True),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Cursor:
+    asset_id: str
+    values: tuple
+
+
+def apply_asset_filters(stmt: Select, filters: AssetFilters, dialect: str | None = None) -> Select:
+    if filters.search:
+        stmt = stmt.where(search_condition(filters.search, dialect))
+
+    # Semi-joins the planner can drive from the (tag, asset_id) and
+    # (role, asset_id) indexes when the value is rare.
+    if filters.tags:
+        stmt = stmt.where(Asset.id.in_(select(AssetTag.asset_id).where(AssetTag.tag.in_(filters.tags))))
+
+    if filters.roles:
+        stmt = stmt.where(
+            Asset.id.in_(select(AssetRole.asset_id).where(AssetRole.role.in_(filters.roles)))
+        )
+
+    orientations = [value for value in filters.orientations or [] if value in ORIENTATIONS]
+    if orientations:
+        stmt = stmt.where(Asset.aspect_orientation.in_(orientations))
+
+    if filters.min_rating is not None:
+        stmt = stmt.where(Asset.rating >= filters.min_rating)
+
+    if filters.starred is not None:
+        stmt = stmt.where(Asset.starred == filters.starred)
+
+    if filters.captured_after is not None:
+        stmt = stmt.where(Asset.captured_at >= filters.captured_after)
+
+    if filters.captured_before is not None:
+        stmt = stmt.where(Asset.captured_at < filters.captured_before)
+
+    return stmt
+
+
+def resolve_sort(sort: str | None, search: str | None = None) -> str:
+    if sort == RELEVANCE_SORT and search:
+        return RELEVANCE_SORT
+    return sort if sort in SORT_KEYS else DEFAULT_SORT
+
+
+def relevance_order(rank) -> list:
+    return [rank.desc(), *sort_order(DEFAULT_SORT)]
+
+
+def sort_order(sort: str) -> list:
+    clauses = []
+    for key in SORT_KEYS[sort]:
+        clause = key.column.desc() if key.descending else key.column.asc()
+        clauses.append(clause.nulls_last() if key.nullable else clause)
+    return clauses
+
+
+def load_options(fields: str) -> list:
+    """Loader options that fetch a page's relationships in one query each."""
+    if fields == "summary":
+        return [load_only(*SUMMARY_COLUMNS), selectinload(Asset.tags), selectinload(Asset.roles)]
+    return [selectinload(Asset.tags), selectinload(Asset.roles), selectinload(Asset.variants)]
+
+
+def count_assets(db: Session, stmt: Select) -> int:
+    return db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar_one()
+
+
+def encode_cursor(sort: str, asset: Asset, rank: float | None = None) -> str:
+    values = [rank] if sort == RELEVANCE_SORT else []
+    for key in _cursor_keys(sort):
+        value = getattr(asset, key.column.key)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    payload = json.dumps({"s": sort, "id": asset.id, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: str) -> Cursor:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        keys = _cursor_keys(sort)
+        values = list(payload["v"])
+        if sort == RELEVANCE_SORT:
+            rank = values.pop(0) if values else None
+            if not isinstance(rank, (int, float)):
+                raise ValueError("Invalid cursor")
+        if payload["s"] != sort or len(values) != len(keys):
+            raise ValueError("Cursor was issued for a different sort")
+        values = [
+            datetime.fromisoformat(value)
+            if value is not None and isinstance(key.column.type, DateTime)
+            else value
+            for key, value in zip(keys, values)
+        ]
+        if sort == RELEVANCE_SORT:
+            values.insert(0, float(rank))
+        return Cursor(asset_id=str(payload["id"]), values=tuple(values))
+    except (binascii.Error, UnicodeError, TypeError, KeyError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def after_cursor(db: Session, sort: str, cursor: Cursor):
+    """Condition selecting the rows strictly after ``cursor`` in ``sort`` order."""
+    keys = SORT_KEYS[sort]
+    anchor_exists = db.execute(select(Asset.id).where(Asset.id == cursor.asset_id)).first()
+    if anchor_exists:
+        # Compare against the stored row rather than round-tripped values, so
+        # timestamp precision on the wire can never skip or repeat a row.
+        anchor = aliased(Asset)
+        bounds = [
+            select(getattr(anchor, key.column.key))
+            .where(anchor.id == cursor.asset_id)
+            .scalar_subquery()
+            for key in keys
+        ]
+    else:
+        bounds = [literal(value, key.column.type) for key, value in zip(keys, cursor.values)]
+
+    clauses = []
+    for index, key in enumerate(keys):
+        ties = [_tied(tied, bound) for tied, bound in zip(keys[:index], bounds[:index])]
+        clauses.append(and_(*ties, _beyond(key, bounds[index])))
+    return or_(*clauses)
+
+
+def after_relevance_cursor(db: Session, rank, cursor: Cursor):
+    """Condition selecting the rows strictly after ``cursor`` in relevance order."""
+    bound = literal(cursor.values[0], Float)
+    ties = after_cursor(db, DEFAULT_SORT, Cursor(cursor.asset_id, cursor.values[1:]))
+    return or_(rank < bound, and_(rank == bound, ties))
+
+
+def _cursor_keys(sort: str) -> tuple[SortKey, ...]:
+    return SORT_KEYS[DEFAULT_SORT] if sort == RELEVANCE_SORT else SORT_KEYS[sort]
+
+
+def _tied(key: SortKey, bound):
+    if key.nullable:
+        return or_(and_(key.column.is_(None), bound.is_(None)), key.column == bound)
+    return key.column == bound
+
+
+def _beyond(key: SortKey, bound):
+    beyond = key.column < bound if key.descending else key.column > bound
+    if key.nullable:
+        # NULLs come last, so past a non-NULL bound they are always "after",
+        # and nothing is after a NULL bound in this column.
+        return and_(bound.is_not(None), or_(beyond, key.column.is_(None)))
+    return beyond
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import (
+    Column,
+    Float,
+    MetaData,
+    Table,
+    Text,
+    cast,
+    func,
+    inspect,
+    literal_column,
+    or_,
+    select,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from packages.domain.models.assets import Asset, AssetRole, AssetTag
+
+SEARCH_CONFIG = "simple"
+# Shorter substrings match most of the trigram index, so they rely on the
+# word-prefix match alone.
+MIN_SUBSTRING_LENGTH = 3
+
+_WORD = re.compile(r"[^\W_]+")
+
+# Local SQLite databases keep a standalone FTS5 table in step with
+# assets.search_document through triggers. Keyed by asset id rather than
+# rowid, which VACUUM may renumber on a table with a text primary key.
+asset_search_fts = Table(
+    "asset_search",
+    MetaData(),
+    Column("asset_id", Text),
+    Column("search_document", Text),
+    Column("rank"),
+)
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE asset_search USING fts5("
+    "asset_id UNINDEXED, search_document, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE TRIGGER asset_search_insert AFTER INSERT ON assets BEGIN "
+    "INSERT INTO asset_search (asset_id, search_document) "
+    "VALUES (new.id, new.search_document); END",
+    "CREATE TRIGGER asset_search_update AFTER UPDATE OF search_document ON assets "
+    "BEGIN DELETE FROM asset_search WHERE asset_id = old.id; "
+    "INSERT INTO asset_search (asset_id, search_document) "
+    "VALUES (new.id, new.search_document); END",
+    "CREATE TRIGGER asset_search_delete AFTER DELETE ON assets BEGIN "
+    "DELETE FROM asset_search WHERE asset_id = old.id; END",
+)
+
+
+# Batch size for rebuilding search documents.
+BACKFILL_BATCH_SIZE = 200
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Create and fill the SQLite FTS5 table on start; Postgres does both in migrations."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table("assets"):
+            return
+        if not inspector.has_table("asset_search"):
+            for statement in SQLITE_SEARCH_DDL:
+                connection.exec_driver_sql(statement)
+
+    # Assets from before search documents existed; the triggers index them.
+    with Session(engine) as db:
+        backfill_search_documents(db)
+
+    with engine.begin() as connection:
+        indexed = connection.exec_driver_sql("SELECT count(*) FROM asset_search").scalar_one()
+        documented = connection.exec_driver_sql(
+            "SELECT count(*) FROM assets WHERE search_document IS NOT NULL"
+        ).scalar_one()
+        if indexed != documented:
+            connection.exec_driver_sql("DELETE FROM asset_search")
+            connection.exec_driver_sql(
+                "INSERT INTO asset_search (asset_id, search_document) "
+                "SELECT id, search_document FROM assets WHERE search_document IS NOT NULL"
+            )
+
+
+def backfill_search_documents(db: Session, rebuild: bool = False) -> int:
+    """Build the search document of every asset without one (or of all, with ``rebuild``)."""
+    updated = 0
+    last_id = None
+    while True:
+        stmt = select(Asset.id).order_by(Asset.id.asc()).limit(BACKFILL_BATCH_SIZE)
+        if not rebuild:
+            stmt = stmt.where(Asset.search_document.is_(None))
+        if last_id is not None:
+            stmt = stmt.where(Asset.id > last_id)
+        asset_ids = db.execute(stmt).scalars().all()
+        if not asset_ids:
+            return updated
+        refresh_search_documents(db, asset_ids)
+        db.commit()
+        updated += len(asset_ids)
+        last_id = asset_ids[-1]
+
+
+def build_search_document(asset: Asset, tags: Iterable[str], roles: Iterable[str]) -> str:
+    details = asset.image_metadata or {}
+    parts = [
+        asset.original_filename,
+        *(asset.filename_aliases or []),
+        *tags,
+        *roles,
+        asset.camera_make,
+        asset.camera_model,
+        (details.get("exif") or {}).get("lens_model"),
+        (details.get("xmp") or {}).get("label"),
+        str(asset.captured_at.year) if asset.captured_at else None,
+    ]
+    words: list[str] = []
+    for part in parts:
+        if not part:
+            continue
+        text = str(part).lower()
+        # The whole value serves substring matches; its words serve prefix
+        # matches ("img_0412.jpg" -> "img", "0412", "jpg").
+        words.append(text)
+        words.extend(_WORD.findall(text))
+    return " ".join(dict.fromkeys(words))
+
+
+def refresh_search_documents(db: Session, asset_ids: Iterable[str]) -> None:
+    """Rebuild the search document of each asset from its current tags and roles."""
+    asset_ids = list(dict.fromkeys(asset_ids))
+    if not asset_ids:
+        return
+    db.flush()
+    tags: dict[str, list[str]] = defaultdict(list)
+    for asset_id, tag in db.execute(
+        select(AssetTag.asset_id, AssetTag.tag)
+        .where(AssetTag.asset_id.in_(asset_ids))
+        .order_by(AssetTag.tag)
+    ):
+        tags[asset_id].append(tag)
+    roles: dict[str, list[str]] = defaultdict(list)
+    for asset_id, role in db.execute(
+        select(AssetRole.asset_id, AssetRole.role)
+        .where(AssetRole.asset_id.in_(asset_ids))
+        .order_by(AssetRole.role)
+    ):
+        roles[asset_id].append(role)
+    for asset in db.execute(select(Asset).where(Asset.id.in_(asset_ids))).scalars():
+        asset.search_document = build_search_document(asset, tags[asset.id], roles[asset.id])
+
+
+def search_words(term: str) -> list[str]:
+    return _WORD.findall(term.lower())
+
+
+def search_condition(term: str, dialect: str | None):
+    words = search_words(term)
+    substring = _contains(term)
+    if dialect == "postgresql" and words:
+        # Both branches are index-backed: GIN over the tsvector expression
+        # and a pg_trgm GIN over the document.
+        prefix = _search_vector().op("@@")(_prefix_tsquery(words))
+        return or_(prefix, substring) if len(term.strip()) >= MIN_SUBSTRING_LENGTH else prefix
+    if dialect == "sqlite" and words:
+        return Asset.id.in_(select(asset_search_fts.c.asset_id).where(_fts_match(words)))
+    return substring
+
+
+def search_rank(term: str, dialect: str | None):
+    """Relevance score for ``term``, higher first; None when it cannot be ranked."""
+    words = search_words(term)
+    if not words:
+        return None
+    if dialect == "postgresql":
+        # Both functions return real; a double compares exactly against the
+        # value a relevance cursor carries back.
+        return cast(
+            func.ts_rank_cd(_search_vector(), _prefix_tsquery(words))
+            + func.similarity(Asset.search_document, term.strip().lower()),
+            Float,
+        )
+    if dialect == "sqlite":
+        # FTS5's rank column is bm25(), where smaller means more relevant.
+        return -(
+            select(asset_search_fts.c.rank)
+            .where(asset_search_fts.c.asset_id == Asset.id, _fts_match(words))
+            .scalar_subquery()
+        )
+    return None
+
+
+def _contains(term: str):
+    escaped = re.sub(r"([\\%_])", r"\\\1", term.strip().lower())
+    return Asset.search_document.like(f"%{escaped}%", escape="\\")
+
+
+def _search_config():
+    # Inline rather than bound, so the planner can match the expression index.
+    return literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+
+def _search_vector():
+    return func.to_tsvector(_search_config(), func.coalesce(Asset.search_document, ""))
+
+
+def _prefix_tsquery(words: list[str]):
+    return func.to_tsquery(_search_config(), " & ".join(f"{word}:*" for word in words))
+
+
+def _fts_match(words: list[str]):
+    query = " ".join(f'"{word}"*' for word in words)
+    return literal_column("asset_search").op("MATCH")(query)
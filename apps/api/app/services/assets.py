@@ -1,12 +1,26 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import io
+import json
+import math
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Callable, Iterable, Iterator
 
 from PIL import Image
 
 from app.core.settings import settings
+from app.services.decode_budget import decoded_bytes, render_memory_budget
+from app.services.encoding import ENCODER_MODES, encode_for_bytes, encode_for_ssim
+from app.services.image_metadata import (
+    apply_orientation,
+    display_size,
+    extract_image_metadata,
+)
 
 
 @dataclass(frozen=True)
@@ -71,6 +85,466 @@ def build_variant_path(asset_id: str, ratio: str, width: int, fmt: str) -> str:
     return os.path.join(settings.assets_derived_dir, asset_id, ratio_slug, filename)
 
 
+DERIVATIVE_FORMATS = ("webp", "jpg")
+
+ENCODER_PARAMS: dict[str, dict] = {
+    "webp": {"format": "WEBP", "quality": 82, "method": 6},
+    "jpg": {"format": "JPEG", "quality": 85, "optimize": True},
+}
+
+
+@dataclass(frozen=True)
+class RenderTarget:
+    width: int
+    height: int
+    path: str
+    fingerprint: str | None = None
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    ratio: str
+    format: str
+    source_size: tuple[int, int]
+    crop_box: tuple[int, int, int, int]
+    targets: tuple[RenderTarget, ...]
+    encoder_mode: str = "fixed"
+    orientation: int = 1
+    bounded: bool = False
+
+
+def resolve_encoder_mode(mode: str | None = None) -> str:
+    mode = mode or settings.assets_encoder_mode
+    if mode not in ENCODER_MODES:
+        raise ValueError(f"Unsupported encoder mode: {mode}")
+    return mode
+
+
+def encoder_signature(fmt: str, mode: str) -> dict:
+    """Everything that affects the encoded bytes, for fingerprinting."""
+    if mode == "fixed":
+        # Kept identical to the pre-adaptive payload so fixed-mode fingerprints stay stable.
+        return ENCODER_PARAMS[fmt]
+    signature = {
+        **ENCODER_PARAMS[fmt],
+        "mode": mode,
+        "quality_range": [settings.assets_encoder_min_quality, settings.assets_encoder_max_quality],
+        "max_iterations": settings.assets_encoder_max_iterations,
+    }
+    if mode == "ssim":
+        signature["target_ssim"] = settings.assets_encoder_target_ssim
+    else:
+        signature["target_bpp"] = settings.assets_encoder_target_bpp
+    return signature
+
+
+# Only cascade from an intermediate that is comfortably larger than the next
+# target; resampling twice across a small scale step softens detail.
+PYRAMID_MIN_STEP = 1.5
+
+# Modes Pillow resamples natively; anything else is converted before slicing.
+STRIP_MODES = {"RGB", "RGBA", "RGBX", "L", "LA", "CMYK"}
+
+_worker_source: Image.Image | None = None
+
+
+def use_bounded_decode(source_size: tuple[int, int]) -> bool:
+    threshold = settings.assets_bounded_decode_min_pixels
+    return threshold >= 0 and source_size[0] * source_size[1] >= threshold
+
+
+def load_source(
+    source_path: str,
+    decode_size: tuple[int, int] | None = None,
+    orientation: int | None = 1,
+    bounded: bool = False,
+) -> Image.Image:
+    """Decode the source; ``decode_size`` is in display (oriented) pixels.
+
+    The standard path returns an upright RGB copy. The bounded path keeps the
+    stored orientation and native mode so jobs never copy the full frame.
+    """
+    with Image.open(source_path) as image:
+        if decode_size is not None and image.format == "JPEG":
+            image.draft("RGB", display_size(decode_size, orientation))
+        image.load()
+        if bounded:
+            return image if image.mode in STRIP_MODES else image.convert("RGB")
+        rgb = image if image.mode == "RGB" else image.convert("RGB")
+        return apply_orientation(rgb, orientation)
+
+
+def _init_render_worker(
+    source_path: str,
+    decode_size: tuple[int, int] | None,
+    orientation: int = 1,
+    bounded: bool = False,
+) -> None:
+    global _worker_source
+    _worker_source = load_source(source_path, decode_size, orientation, bounded)
+
+
+def compute_decode_size(jobs: Iterable[RenderJob]) -> tuple[int, int] | None:
+    jobs = list(jobs)
+    if not jobs:
+        return None
+    scale = 0.0
+    for job in jobs:
+        left, top, right, bottom = job.crop_box
+        for target in job.targets:
+            scale = max(scale, target.width / (right - left), target.height / (bottom - top))
+    if scale >= 1.0:
+        return None
+    source_width, source_height = jobs[0].source_size
+    return (math.ceil(source_width * scale), math.ceil(source_height * scale))
+
+
+def render_decode_size(jobs: list[RenderJob]) -> tuple[int, int] | None:
+    """Reduced decode size the pipeline asks for, or None for a full decode."""
+    if jobs and (settings.assets_derivative_pyramid or jobs[0].bounded):
+        return compute_decode_size(jobs)
+    return None
+
+
+def estimate_render_bytes(jobs: list[RenderJob], decode_size: tuple[int, int] | None) -> int:
+    """Rough peak of decoded pixels one process holds while rendering ``jobs``."""
+    source = decoded_bytes(decode_size or jobs[0].source_size)
+    largest = max(
+        decoded_bytes((target.width, target.height)) for job in jobs for target in job.targets
+    )
+    if jobs[0].bounded:
+        # The decoded frame plus one cascade of outputs; strips are negligible.
+        return source + 2 * largest
+    # Decoded frame, its upright copy and the crop, plus the outputs.
+    return 3 * source + 2 * largest
+
+
+def _render_job_in_worker(job: RenderJob) -> list[dict]:
+    if _worker_source is None:
+        raise RuntimeError("Render worker was not initialised with a source image")
+    return _render_job(_worker_source, job)
+
+
+def _encode_variant(
+    image: Image.Image, output_path: str, fmt: str, mode: str = "fixed"
+) -> tuple[int, int]:
+    """Encode ``image`` to ``output_path``; return the quality used and the byte size."""
+    params = ENCODER_PARAMS[fmt]
+    if mode == "fixed":
+        image.save(output_path, **params)
+        return params["quality"], os.path.getsize(output_path)
+
+    search = {
+        "min_quality": settings.assets_encoder_min_quality,
+        "max_quality": settings.assets_encoder_max_quality,
+        "max_iterations": settings.assets_encoder_max_iterations,
+    }
+    if mode == "ssim":
+        encoded = encode_for_ssim(image, params, settings.assets_encoder_target_ssim, **search)
+    else:
+        budget = int(settings.assets_encoder_target_bpp * image.width * image.height / 8)
+        encoded = encode_for_bytes(image, params, budget, **search)
+    with open(output_path, "wb") as handle:
+        handle.write(encoded.data)
+    return encoded.quality, len(encoded.data)
+
+
+def compute_file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def variant_fingerprint(
+    content_hash: str,
+    crop_box: tuple[int, int, int, int],
+    width: int,
+    fmt: str,
+    encoder_mode: str | None = None,
+    orientation: int | None = None,
+    bounded: bool = False,
+) -> str:
+    payload = {
+        "source": content_hash,
+        "crop_box": list(crop_box),
+        "width": width,
+        "format": fmt,
+        "encoder": encoder_signature(fmt, resolve_encoder_mode(encoder_mode)),
+        "pyramid": settings.assets_derivative_pyramid,
+        "version": settings.assets_derivatives_version,
+    }
+    if orientation and orientation != 1:
+        payload["orientation"] = orientation
+    if bounded:
+        payload["decode"] = "bounded"
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _scale_box_to_size(
+    crop_box: tuple[int, int, int, int], source_size: tuple[int, int], size: tuple[int, int]
+) -> tuple[int, int, int, int]:
+    if size == source_size:
+        return crop_box
+    scale_x = size[0] / source_size[0]
+    scale_y = size[1] / source_size[1]
+    left, top, right, bottom = crop_box
+    return (
+        int(round(left * scale_x)),
+        int(round(top * scale_y)),
+        min(size[0], int(round(right * scale_x))),
+        min(size[1], int(round(bottom * scale_y))),
+    )
+
+
+def _scale_crop_box(
+    crop_box: tuple[int, int, int, int], source_size: tuple[int, int], image: Image.Image
+) -> tuple[int, int, int, int]:
+    return _scale_box_to_size(crop_box, source_size, image.size)
+
+
+def _stored_point(
+    x: float, y: float, size: tuple[int, int], orientation: int | None
+) -> tuple[float, float]:
+    """Map a display-space point onto the stored frame; ``size`` is the display size."""
+    width, height = size
+    return {
+        2: (width - x, y),
+        3: (width - x, height - y),
+        4: (x, height - y),
+        5: (y, x),
+        6: (y, width - x),
+        7: (height - y, width - x),
+        8: (height - y, x),
+    }.get(orientation or 1, (x, y))
+
+
+def _stored_box(
+    box: tuple[int, int, int, int], size: tuple[int, int], orientation: int | None
+) -> tuple[float, float, float, float]:
+    x0, y0 = _stored_point(box[0], box[1], size, orientation)
+    x1, y1 = _stored_point(box[2], box[3], size, orientation)
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+def upright_region(
+    image: Image.Image, box: tuple[int, int, int, int], orientation: int | None
+) -> Image.Image:
+    """Crop display-space ``box`` from ``image`` kept in stored orientation, upright RGB."""
+    shown = display_size(image.size, orientation)
+    region = image.crop(tuple(int(round(v)) for v in _stored_box(box, shown, orientation)))
+    if region.mode != "RGB":
+        region = region.convert("RGB")
+    return apply_orientation(region, orientation)
+
+
+def _resize_in_strips(
+    image: Image.Image, box: tuple[float, float, float, float], size: tuple[int, int]
+) -> Image.Image:
+    """Resample ``box`` of ``image`` to ``size`` a band of output rows at a time.
+
+    Pillow only reads the source rows each band's filter needs, so the crop is
+    never copied out whole.
+    """
+    left, top, right, bottom = box
+    width, height = size
+    step = (bottom - top) / height
+    rows = max(1, settings.assets_bounded_decode_strip_rows)
+    output = Image.new(image.mode, size)
+    for start in range(0, height, rows):
+        end = min(height, start + rows)
+        band = image.resize(
+            (width, end - start),
+            Image.LANCZOS,
+            box=(left, top + start * step, right, top + end * step),
+        )
+        output.paste(band, (0, start))
+    return output
+
+
+def _cascade(
+    from_source: Callable[[tuple[int, int]], Image.Image],
+    targets: Iterable[RenderTarget],
+    pyramid: bool,
+) -> Iterator[tuple[RenderTarget, Image.Image]]:
+    if not pyramid:
+        for target in targets:
+            yield target, from_source((target.width, target.height))
+        return
+
+    intermediates: list[Image.Image] = []
+    for target in sorted(targets, key=lambda item: item.width, reverse=True):
+        base = None
+        for candidate in intermediates:
+            if candidate.width >= target.width * PYRAMID_MIN_STEP:
+                base = candidate
+        size = (target.width, target.height)
+        resized = base.resize(size, Image.LANCZOS) if base is not None else from_source(size)
+        intermediates.append(resized)
+        yield target, resized
+
+
+def resize_targets(
+    cropped: Image.Image, targets: Iterable[RenderTarget], pyramid: bool
+) -> Iterator[tuple[RenderTarget, Image.Image]]:
+    return _cascade(lambda size: cropped.resize(size, Image.LANCZOS), targets, pyramid)
+
+
+def _bounded_targets(
+    image: Image.Image, job: RenderJob
+) -> Iterator[tuple[RenderTarget, Image.Image]]:
+    # ``image`` is still in stored orientation: resample the matching stored
+    # region, then transpose the small output upright.
+    shown = display_size(image.size, job.orientation)
+    box = _stored_box(
+        _scale_box_to_size(job.crop_box, job.source_size, shown), shown, job.orientation
+    )
+
+    def from_source(size: tuple[int, int]) -> Image.Image:
+        resized = _resize_in_strips(image, box, display_size(size, job.orientation))
+        if resized.mode != "RGB":
+            resized = resized.convert("RGB")
+        return apply_orientation(resized, job.orientation)
+
+    return _cascade(from_source, job.targets, pyramid=settings.assets_derivative_pyramid)
+
+
+def _render_job(image: Image.Image, job: RenderJob) -> list[dict]:
+    if job.bounded:
+        resized_targets = _bounded_targets(image, job)
+    else:
+        cropped = image.crop(_scale_crop_box(job.crop_box, job.source_size, image))
+        resized_targets = resize_targets(
+            cropped, job.targets, pyramid=settings.assets_derivative_pyramid
+        )
+    variants: list[dict] = []
+    for target, resized in resized_targets:
+        ensure_dir(os.path.dirname(target.path))
+        quality, byte_size = _encode_variant(resized, target.path, job.format, job.encoder_mode)
+
+        variants.append(
+            {
+                "ratio": job.ratio,
+                "width": target.width,
+                "height": target.height,
+                "format": job.format,
+                "path": target.path,
+                "fingerprint": target.fingerprint,
+                "quality": quality,
+                "byte_size": byte_size,
+            }
+        )
+    return variants
+
+
+def resolve_render_workers(workers: int | None, job_count: int) -> int:
+    if workers is None:
+        workers = settings.assets_derivative_workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, job_count))
+
+
+def build_render_jobs(
+    asset_id: str,
+    image_width: int,
+    image_height: int,
+    focal_x: float,
+    focal_y: float,
+    ratios: Iterable[str],
+    widths: Iterable[int],
+    formats: Iterable[str] = DERIVATIVE_FORMATS,
+    content_hash: str | None = None,
+    encoder_mode: str | None = None,
+    orientation: int | None = None,
+) -> list[RenderJob]:
+    width_list = list(widths)
+    format_list = list(formats)
+    encoder_mode = resolve_encoder_mode(encoder_mode)
+    orientation = orientation or 1
+    bounded = use_bounded_decode((image_width, image_height))
+    jobs: list[RenderJob] = []
+    for ratio in ratios:
+        ratio_obj = parse_ratio(ratio)
+        crop_box = compute_crop_box(
+            image_width=image_width,
+            image_height=image_height,
+            ratio=ratio_obj,
+            focal_x=focal_x,
+            focal_y=focal_y,
+        )
+        for fmt in format_list:
+            targets = tuple(
+                RenderTarget(
+                    width=width,
+                    height=int(round(width / ratio_obj.value)),
+                    path=build_variant_path(asset_id, ratio, width, fmt),
+                    fingerprint=(
+                        variant_fingerprint(
+                            content_hash, crop_box, width, fmt, encoder_mode, orientation, bounded
+                        )
+                        if content_hash
+                        else None
+                    ),
+                )
+                for width in width_list
+            )
+            jobs.append(
+                RenderJob(
+                    ratio=ratio,
+                    format=fmt,
+                    source_size=(image_width, image_height),
+                    crop_box=crop_box,
+                    targets=targets,
+                    encoder_mode=encoder_mode,
+                    orientation=orientation,
+                    bounded=bounded,
+                )
+            )
+    return jobs
+
+
+def run_render_jobs(
+    source_path: str, jobs: list[RenderJob], workers: int | None = None
+) -> list[dict]:
+    if not jobs:
+        return []
+
+    pool_size = resolve_render_workers(workers, len(jobs))
+    orientation = jobs[0].orientation
+    bounded = jobs[0].bounded
+    decode_size = render_decode_size(jobs)
+    per_process = estimate_render_bytes(jobs, decode_size)
+    if render_memory_budget.limit_bytes > 0:
+        # Every pool worker decodes its own copy of the source.
+        pool_size = max(1, min(pool_size, render_memory_budget.limit_bytes // per_process))
+
+    results: list[dict] = []
+    with render_memory_budget.reserve(per_process * pool_size):
+        if pool_size == 1:
+            image = load_source(source_path, decode_size, orientation, bounded)
+            try:
+                for job in jobs:
+                    results.extend(_render_job(image, job))
+            finally:
+                image.close()
+            return results
+
+        # Spawned workers each decode the source once in the initializer, so the
+        # per-job payload is just the crop box and target sizes.
+        with ProcessPoolExecutor(
+            max_workers=pool_size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_render_worker,
+            initargs=(source_path, decode_size, orientation, bounded),
+        ) as executor:
+            for job_variants in executor.map(_render_job_in_worker, jobs):
+                results.extend(job_variants)
+    return results
+
+
 def generate_variants(
     source_path: str,
     asset_id: str,
@@ -78,42 +552,127 @@ def generate_variants(
     focal_y: float,
     ratios: Iterable[str],
     widths: Iterable[int],
+    workers: int | None = None,
+    formats: Iterable[str] = DERIVATIVE_FORMATS,
+    content_hash: str | None = None,
+    encoder_mode: str | None = None,
+    image_size: tuple[int, int] | None = None,
+    orientation: int | None = None,
 ) -> list[dict]:
-    variants: list[dict] = []
+    """Render variants; pass the stored display size and orientation to skip the header read."""
+    ratio_list = list(ratios)
+    width_list = list(widths)
+    format_list = list(formats)
+    if image_size is None:
+        metadata = extract_image_metadata(source_path)
+        image_size = (metadata.width, metadata.height)
+        orientation = metadata.orientation
+    image_width, image_height = image_size
+
+    jobs = build_render_jobs(
+        asset_id=asset_id,
+        image_width=image_width,
+        image_height=image_height,
+        focal_x=focal_x,
+        focal_y=focal_y,
+        ratios=ratio_list,
+        widths=width_list,
+        formats=format_list,
+        content_hash=content_hash,
+        encoder_mode=encoder_mode,
+        orientation=orientation,
+    )
+    variants = run_render_jobs(source_path, jobs, workers=workers)
+
+    position = {
+        key: index
+        for index, key in enumerate(
+            (ratio, width, fmt)
+            for ratio in ratio_list
+            for width in width_list
+            for fmt in format_list
+        )
+    }
+    variants.sort(key=lambda item: position[(item["ratio"], item["width"], item["format"])])
+    return variants
+
+
+def render_variant(
+    source_path: str,
+    asset_id: str,
+    focal_x: float,
+    focal_y: float,
+    ratio: str,
+    width: int,
+    fmt: str,
+    content_hash: str | None = None,
+    image_size: tuple[int, int] | None = None,
+    orientation: int | None = None,
+) -> dict:
+    return generate_variants(
+        source_path=source_path,
+        asset_id=asset_id,
+        focal_x=focal_x,
+        focal_y=focal_y,
+        ratios=[ratio],
+        widths=[width],
+        workers=1,
+        formats=[fmt],
+        content_hash=content_hash,
+        image_size=image_size,
+        orientation=orientation,
+    )[0]
+
+
+PLACEHOLDER_WIDTH = 20
+PLACEHOLDER_PARAMS = {"format": "WEBP", "quality": 40, "method": 6}
+
+
+def placeholder_fingerprint(
+    content_hash: str, crop_box: tuple[int, int, int, int], orientation: int | None = None
+) -> str:
+    payload = {
+        "source": content_hash,
+        "crop_box": list(crop_box),
+        "width": PLACEHOLDER_WIDTH,
+        "encoder": PLACEHOLDER_PARAMS,
+    }
+    if orientation and orientation != 1:
+        payload["orientation"] = orientation
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def dominant_color(image: Image.Image) -> str:
+    palette = image.convert("RGB").quantize(colors=4)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3 : index * 3 + 3]
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def render_placeholder(
+    source_path: str, crop_box: tuple[int, int, int, int], orientation: int | None = None
+) -> tuple[str, str]:
+    """Return a ~20px WebP data URI of the crop and its dominant color."""
     with Image.open(source_path) as image:
-        image = image.convert("RGB")
-        for ratio in ratios:
-            ratio_obj = parse_ratio(ratio)
-            crop_box = compute_crop_box(
-                image_width=image.width,
-                image_height=image.height,
-                ratio=ratio_obj,
-                focal_x=focal_x,
-                focal_y=focal_y,
+        source_size = display_size(image.size, orientation)
+        if image.format == "JPEG":
+            # A few pixels of headroom per output pixel keep the downscale smooth.
+            scale = PLACEHOLDER_WIDTH * 4 / max(1, crop_box[2] - crop_box[0])
+            draft_size = (
+                max(1, math.ceil(source_size[0] * scale)),
+                max(1, math.ceil(source_size[1] * scale)),
             )
-            cropped = image.crop(crop_box)
-
-            for width in widths:
-                height = int(round(width / ratio_obj.value))
-                resized = cropped.resize((width, height), Image.LANCZOS)
-
-                for fmt in ("webp", "jpg"):
-                    output_path = build_variant_path(asset_id, ratio, width, fmt)
-                    ensure_dir(os.path.dirname(output_path))
-
-                    if fmt == "webp":
-                        resized.save(output_path, format="WEBP", quality=82, method=6)
-                    else:
-                        resized.save(output_path, format="JPEG", quality=85, optimize=True)
-
-                    variants.append(
-                        {
-                            "ratio": ratio,
-                            "width": width,
-                            "height": height,
-                            "format": fmt,
-                            "path": output_path,
-                        }
-                    )
+            image.draft("RGB", display_size(draft_size, orientation))
+        # ``draft`` has already shrunk ``size`` to what will actually be decoded.
+        with render_memory_budget.reserve(3 * decoded_bytes(image.size)):
+            decoded = apply_orientation(image.convert("RGB"), orientation)
+            cropped = decoded.crop(_scale_crop_box(crop_box, source_size, decoded))
+            height = max(1, round(PLACEHOLDER_WIDTH * cropped.height / max(1, cropped.width)))
+            small = cropped.resize((PLACEHOLDER_WIDTH, height), Image.LANCZOS)
+            del decoded, cropped
 
-    return variants
+    buffer = io.BytesIO()
+    small.save(buffer, **PLACEHOLDER_PARAMS)
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return f"data:image/webp;base64,{encoded}", dominant_color(small)
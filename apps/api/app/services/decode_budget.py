@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from PIL import Image
+
+from app.core.settings import settings
+
+# Pillow keeps 8-bit RGB images in 4-byte pixels.
+BYTES_PER_PIXEL = 4
+
+
+def configure_decoder_limits() -> None:
+    Image.MAX_IMAGE_PIXELS = settings.assets_max_image_pixels or None
+
+
+# Applied on import so spawned render workers and CLIs pick up the limit too.
+configure_decoder_limits()
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+def check_pixel_limit(size: tuple[int, int]) -> None:
+    limit = settings.assets_max_image_pixels
+    if limit and size[0] * size[1] > limit:
+        raise ImageTooLargeError(f"Image is {size[0]}x{size[1]}; the limit is {limit} pixels")
+
+
+def decoded_bytes(size: tuple[int, int]) -> int:
+    return size[0] * size[1] * BYTES_PER_PIXEL
+
+
+class MemoryBudget:
+    """Process-wide weighted semaphore over estimated decoded-pixel bytes.
+
+    A request larger than the whole budget is clamped to it, so an oversized
+    image still renders, just with nothing else running beside it.
+    """
+
+    def __init__(self, limit_bytes: int) -> None:
+        self.limit_bytes = limit_bytes
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    def share(self, parts: int) -> int:
+        """The slice of this budget each of ``parts`` processes may use (0 is unlimited)."""
+        if self.limit_bytes <= 0:
+            return 0
+        return max(1, self.limit_bytes // max(1, parts))
+
+    @property
+    def in_use(self) -> int:
+        with self._condition:
+            return self._in_use
+
+    @contextmanager
+    def reserve(self, amount: int) -> Iterator[None]:
+        if self.limit_bytes <= 0:
+            yield
+            return
+        amount = max(0, min(amount, self.limit_bytes))
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_use + amount <= self.limit_bytes)
+            self._in_use += amount
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_use -= amount
+                self._condition.notify_all()
+
+
+render_memory_budget = MemoryBudget(settings.assets_render_memory_budget_mb * 1024 * 1024)
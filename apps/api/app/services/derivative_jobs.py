@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, case, func, insert, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.db.session import SessionLocal
+from app.services.derivatives import sync_asset_variants, thumbnail_width
+from app.services.tiles import sync_asset_tiles
+from packages.domain.models.assets import Asset, AssetDerivativeJob
+
+logger = logging.getLogger(__name__)
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_threads: list[threading.Thread] = []
+
+# Postgres advisory lock that serializes claims so the concurrency cap holds.
+_CLAIM_LOCK_KEY = 0x62687064
+
+
+def enqueue_derivative_job(
+    db: Session,
+    asset_id: str,
+    ratios: list[str] | None = None,
+    widths: list[int] | None = None,
+    tiles: bool = False,
+) -> AssetDerivativeJob:
+    job = db.execute(
+        select(AssetDerivativeJob)
+        .where(AssetDerivativeJob.asset_id == asset_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if job is None:
+        job = AssetDerivativeJob(asset_id=asset_id)
+        db.add(job)
+    _request_job(job, ratios, widths, tiles, datetime.now(timezone.utc))
+    db.commit()
+    db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def _request_job(
+    job: AssetDerivativeJob,
+    ratios: list[str] | None,
+    widths: list[int] | None,
+    tiles: bool,
+    now: datetime,
+) -> None:
+    # Sticky: once an asset has a tile pyramid, later syncs keep it current.
+    job.tiles = bool(job.tiles) or tiles
+    if job.status in ("queued", "running"):
+        # Work still owed keeps its targets; the next run covers both requests.
+        job.ratios = _merge_targets(job.ratios, ratios)
+        job.widths = _merge_targets(job.widths, widths)
+    else:
+        job.ratios = ratios
+        job.widths = widths
+    if job.status == "running":
+        # The worker owns the row until it finishes; it queues the job again then.
+        job.requeue = True
+        return
+    job.status = "queued"
+    job.attempts = 0
+    job.error_message = None
+    job.updated_at = now
+    job.started_at = None
+    job.completed_at = None
+
+
+def _merge_targets(current: list | None, requested: list | None) -> list | None:
+    # None means every configured ratio or width, so it absorbs any subset; an
+    # empty list (a tile-only request) adds nothing.
+    if current is None or requested is None:
+        return None
+    return list(dict.fromkeys([*current, *requested]))
+
+
+def upload_render_targets() -> tuple[list[str] | None, list[int] | None] | None:
+    """(ratios, widths) to pre-render for a new upload; None queues nothing."""
+    mode = settings.assets_upload_prerender
+    if mode == "all":
+        return None, None
+    width = thumbnail_width()
+    if mode == "none" or width is None:
+        return None
+    return [settings.assets_derivative_ratios[0]], [width]
+
+
+def enqueue_derivative_jobs(
+    db: Session,
+    asset_ids: list[str],
+    ratios: list[str] | None = None,
+    widths: list[int] | None = None,
+) -> None:
+    if not asset_ids:
+        return
+    now = datetime.now(timezone.utc)
+    existing = set()
+    for job in db.execute(
+        select(AssetDerivativeJob)
+        .where(AssetDerivativeJob.asset_id.in_(asset_ids))
+        .with_for_update()
+    ).scalars():
+        _request_job(job, ratios, widths, False, now)
+        existing.add(job.asset_id)
+    new_rows = [
+        {
+            "asset_id": asset_id,
+            "status": "queued",
+            "ratios": ratios,
+            "widths": widths,
+            "attempts": 0,
+            "updated_at": now,
+        }
+        for asset_id in dict.fromkeys(asset_ids)
+        if asset_id not in existing
+    ]
+    if new_rows:
+        db.execute(insert(AssetDerivativeJob), new_rows)
+    db.commit()
+    _wakeup.set()
+
+
+def claim_next_job(db: Session) -> AssetDerivativeJob | None:
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=settings.assets_derivative_job_timeout_seconds)
+    # Count and claim under one lock so concurrent workers can't both see a
+    # free slot. SQLite gets the same from the write lock the first UPDATE takes.
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _CLAIM_LOCK_KEY})
+    db.execute(
+        update(AssetDerivativeJob)
+        .where(
+            AssetDerivativeJob.status == "running",
+            AssetDerivativeJob.started_at < stale_before,
+            AssetDerivativeJob.attempts >= settings.assets_derivative_job_max_attempts,
+        )
+        .values(
+            status="failed",
+            error_message="Timed out",
+            completed_at=now,
+            updated_at=now,
+        )
+    )
+    active = db.execute(
+        select(func.count(AssetDerivativeJob.id)).where(
+            AssetDerivativeJob.status == "running",
+            AssetDerivativeJob.started_at >= stale_before,
+        )
+    ).scalar_one()
+    if active >= settings.assets_derivative_job_concurrency:
+        db.commit()
+        return None
+
+    stmt = (
+        select(AssetDerivativeJob)
+        .where(
+            or_(
+                AssetDerivativeJob.status == "queued",
+                and_(
+                    AssetDerivativeJob.status == "running",
+                    AssetDerivativeJob.started_at < stale_before,
+                    AssetDerivativeJob.attempts < settings.assets_derivative_job_max_attempts,
+                ),
+            )
+        )
+        .order_by(AssetDerivativeJob.updated_at.asc(), AssetDerivativeJob.id.asc())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = db.execute(stmt).scalar_one_or_none()
+    if job is None:
+        db.commit()
+        return None
+
+    job.status = "running"
+    job.attempts += 1
+    # This run covers every request merged into the row so far.
+    job.requeue = False
+    job.error_message = None
+    job.started_at = now
+    job.updated_at = now
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _finish_job(
+    db: Session, job_id: int, attempts: int, status: str, error_message: str | None
+) -> None:
+    now = datetime.now(timezone.utc)
+    requeue = AssetDerivativeJob.requeue.is_(True)
+    db.execute(
+        update(AssetDerivativeJob)
+        .where(
+            AssetDerivativeJob.id == job_id,
+            AssetDerivativeJob.status == "running",
+            AssetDerivativeJob.attempts == attempts,
+        )
+        .values(
+            status=case((requeue, "queued"), else_=status),
+            attempts=case((requeue, 0), else_=AssetDerivativeJob.attempts),
+            error_message=case((requeue, None), else_=error_message),
+            started_at=case((requeue, None), else_=AssetDerivativeJob.started_at),
+            completed_at=case((requeue, None), else_=now),
+            requeue=False,
+            updated_at=now,
+        )
+    )
+    db.commit()
+
+
+def run_derivative_job(db: Session, job: AssetDerivativeJob) -> None:
+    # Commits inside the sync expire the job; keep the claim token we hold.
+    job_id, asset_id, attempts = job.id, job.asset_id, job.attempts
+    ratios, widths, tiles = job.ratios, job.widths, job.tiles
+    try:
+        asset = db.get(Asset, asset_id)
+        if asset is None:
+            _finish_job(db, job_id, attempts, "failed", "Asset not found")
+            return
+        # Tile-only jobs carry an empty target set and render no variants.
+        if ratios != [] and widths != []:
+            # Partial jobs (the upload thumbnail) leave on-demand variants alone.
+            sync_asset_variants(
+                db, asset, ratios=ratios, widths=widths, prune=ratios is None and widths is None
+            )
+        if tiles or settings.assets_tiles_enabled:
+            sync_asset_tiles(db, asset)
+        _finish_job(db, job_id, attempts, "completed", None)
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Derivative job failed for asset %s", asset_id)
+        error_text = f"{exc.__class__.__name__}: {exc}"
+        if len(error_text) > 300:
+            error_text = error_text[:300] + "..."
+        _finish_job(db, job_id, attempts, "failed", error_text)
+
+
+def process_next_job() -> bool:
+    db = SessionLocal()
+    try:
+        job = claim_next_job(db)
+        if job is None:
+            return False
+        run_derivative_job(db, job)
+        return True
+    finally:
+        db.close()
+
+
+def _worker_loop() -> None:
+    while not _stop.is_set():
+        try:
+            if process_next_job():
+                continue
+        except Exception:
+            logger.exception("Derivative worker poll failed")
+        _wakeup.wait(timeout=settings.assets_derivative_job_poll_seconds)
+        _wakeup.clear()
+
+
+def start_derivative_workers(concurrency: int | None = None) -> None:
+    if _threads:
+        return
+    _stop.clear()
+    count = concurrency or settings.assets_derivative_job_concurrency
+    for index in range(max(1, count)):
+        thread = threading.Thread(
+            target=_worker_loop, name=f"derivative-worker-{index}", daemon=True
+        )
+        thread.start()
+        _threads.append(thread)
+
+
+def stop_derivative_workers(timeout: float = 5.0) -> None:
+    _stop.set()
+    _wakeup.set()
+    for thread in _threads:
+        thread.join(timeout=timeout)
+    _threads.clear()
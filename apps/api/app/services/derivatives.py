@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass, replace
+from typing import Iterable
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.services.assets import (
+    DERIVATIVE_FORMATS,
+    RenderJob,
+    build_render_jobs,
+    compute_crop_box,
+    compute_file_hash,
+    parse_ratio,
+    placeholder_fingerprint,
+    render_placeholder,
+    render_variant,
+    run_render_jobs,
+    use_bounded_decode,
+    variant_fingerprint,
+)
+from app.services.render_cache import render_cache
+from app.services.thumbnail_cache import thumbnail_cache
+from packages.domain.models.assets import Asset, AssetVariant
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_TARGET_WIDTH = 800
+
+
+@dataclass(frozen=True)
+class VariantSyncResult:
+    rendered: int
+    unchanged: int
+    removed: int
+
+
+def ensure_content_hash(db: Session, asset: Asset) -> str:
+    if asset.content_hash:
+        return asset.content_hash
+    content_hash = compute_file_hash(asset.original_path)
+    holder = db.execute(
+        select(Asset.id).where(Asset.content_hash == content_hash, Asset.id != asset.id)
+    ).first()
+    # Legacy duplicates predate the unique hash; fingerprint them without claiming it.
+    if holder is None:
+        asset.content_hash = content_hash
+        db.commit()
+    return content_hash
+
+
+def plan_variant_jobs(
+    asset: Asset,
+    existing: Iterable[AssetVariant],
+    ratios: Iterable[str],
+    widths: Iterable[int],
+    content_hash: str | None = None,
+) -> tuple[list[RenderJob], list[AssetVariant]]:
+    """Return the render jobs whose fingerprint changed and the variants no longer wanted."""
+    jobs = build_render_jobs(
+        asset_id=asset.id,
+        image_width=asset.width,
+        image_height=asset.height,
+        focal_x=asset.focal_x,
+        focal_y=asset.focal_y,
+        ratios=ratios,
+        widths=widths,
+        content_hash=content_hash or asset.content_hash,
+        orientation=asset.orientation,
+    )
+    current = {(variant.ratio, variant.width, variant.format): variant for variant in existing}
+
+    pending: list[RenderJob] = []
+    desired: set[tuple[str, int, str]] = set()
+    for job in jobs:
+        targets = []
+        for target in job.targets:
+            key = (job.ratio, target.width, job.format)
+            desired.add(key)
+            variant = current.get(key)
+            if (
+                variant is None
+                or variant.fingerprint != target.fingerprint
+                or not os.path.exists(variant.path)
+            ):
+                targets.append(target)
+        if targets:
+            pending.append(replace(job, targets=tuple(targets)))
+
+    stale = [variant for key, variant in current.items() if key not in desired]
+    return pending, stale
+
+
+def list_current_variants(db: Session, asset_id: str) -> list[AssetVariant]:
+    return (
+        db.execute(
+            select(AssetVariant).where(
+                AssetVariant.asset_id == asset_id,
+                AssetVariant.version == settings.assets_derivatives_version,
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+
+def apply_rendered_variants(
+    db: Session,
+    asset_id: str,
+    existing: Iterable[AssetVariant],
+    rendered: Iterable[dict],
+    stale: Iterable[AssetVariant],
+) -> None:
+    current = {(variant.ratio, variant.width, variant.format): variant for variant in existing}
+    stale_paths = {variant.path for variant in stale}
+    for variant in stale:
+        db.delete(variant)
+        current.pop((variant.ratio, variant.width, variant.format), None)
+
+    new_rows: list[dict] = []
+    for item in rendered:
+        render_cache.discard(item["path"])
+        variant = current.get((item["ratio"], item["width"], item["format"]))
+        if variant is None:
+            new_rows.append(
+                {
+                    "asset_id": asset_id,
+                    "ratio": item["ratio"],
+                    "width": item["width"],
+                    "height": item["height"],
+                    "format": item["format"],
+                    "path": item["path"],
+                    "fingerprint": item["fingerprint"],
+                    "quality": item["quality"],
+                    "byte_size": item["byte_size"],
+                    "version": settings.assets_derivatives_version,
+                    "on_demand": False,
+                }
+            )
+            continue
+        variant.height = item["height"]
+        variant.path = item["path"]
+        variant.fingerprint = item["fingerprint"]
+        variant.quality = item["quality"]
+        variant.byte_size = item["byte_size"]
+        variant.on_demand = False
+
+    # One multi-row INSERT for the new variants instead of a flush per object.
+    if new_rows:
+        db.execute(insert(AssetVariant), new_rows)
+    pointer_sources = list(current.values()) + [AssetVariant(**row) for row in new_rows]
+    _set_variant_pointers(db, asset_id, pointer_sources)
+    db.commit()
+    thumbnail_cache.discard(asset_id)
+
+    for path in stale_paths:
+        render_cache.discard(path)
+        _remove_derived_file(path)
+
+
+def thumbnail_width() -> int | None:
+    if not settings.assets_derivative_ratios or not settings.assets_derivative_widths:
+        return None
+    return min(
+        settings.assets_derivative_widths,
+        key=lambda value: abs(value - THUMBNAIL_TARGET_WIDTH),
+    )
+
+
+def select_thumbnail_variant(variants: Iterable[AssetVariant]) -> AssetVariant | None:
+    def sort_key(variant: AssetVariant) -> tuple[int, int]:
+        format_score = 0 if variant.format == "webp" else 1
+        return (format_score, abs(variant.width - THUMBNAIL_TARGET_WIDTH))
+
+    return min(variants, key=sort_key, default=None)
+
+
+def build_variant_manifest(variants: Iterable[AssetVariant]) -> dict[str, list[dict]]:
+    manifest: dict[str, list[dict]] = {}
+    for variant in sorted(variants, key=lambda item: (item.ratio, item.width, item.format)):
+        manifest.setdefault(variant.ratio, []).append(
+            {
+                "width": variant.width,
+                "height": variant.height,
+                "format": variant.format,
+                "fingerprint": variant.fingerprint,
+            }
+        )
+    return manifest
+
+
+def _variant_pointers(variants: list[AssetVariant]) -> dict:
+    thumbnail = select_thumbnail_variant(variants)
+    return {
+        "thumbnail_path": thumbnail.path if thumbnail else None,
+        "thumbnail_fingerprint": thumbnail.fingerprint if thumbnail else None,
+        "variant_manifest": build_variant_manifest(variants) or None,
+    }
+
+
+def _set_variant_pointers(db: Session, asset_id: str, variants: list[AssetVariant]) -> None:
+    db.execute(update(Asset).where(Asset.id == asset_id).values(**_variant_pointers(variants)))
+
+
+def refresh_variant_pointers(db: Session, asset_id: str) -> AssetVariant | None:
+    """Recompute the thumbnail pointer and srcset manifest; return the thumbnail variant.
+
+    The row is only written when a pointer actually changed, so read paths
+    can call this on every cache miss.
+    """
+    variants = list_current_variants(db, asset_id)
+    pointers = _variant_pointers(variants)
+    current = db.execute(
+        select(Asset.thumbnail_path, Asset.thumbnail_fingerprint, Asset.variant_manifest).where(
+            Asset.id == asset_id
+        )
+    ).first()
+    if current is not None and tuple(current) != tuple(pointers.values()):
+        db.execute(update(Asset).where(Asset.id == asset_id).values(**pointers))
+        db.commit()
+        thumbnail_cache.discard(asset_id)
+    return select_thumbnail_variant(variants)
+
+
+def sync_asset_variants(
+    db: Session,
+    asset: Asset,
+    ratios: Iterable[str] | None = None,
+    widths: Iterable[int] | None = None,
+    workers: int | None = None,
+    prune: bool = True,
+) -> VariantSyncResult:
+    """Render the wanted variants whose fingerprint changed.
+
+    With ``prune`` the variants outside ``ratios`` x ``widths`` are removed;
+    partial syncs pass False so they keep variants rendered on demand.
+    """
+    ratio_list = list(ratios or settings.assets_derivative_ratios)
+    width_list = list(widths or settings.assets_derivative_widths)
+    content_hash = ensure_content_hash(db, asset)
+
+    existing = list_current_variants(db, asset.id)
+    jobs, stale = plan_variant_jobs(asset, existing, ratio_list, width_list, content_hash)
+    if not prune:
+        stale = []
+    # Current renders from the on-demand cache join the wanted set as they are,
+    # so eviction can't remove them and --only-missing stops selecting them.
+    wanted = {
+        (ratio, width, fmt)
+        for ratio in ratio_list
+        for width in width_list
+        for fmt in DERIVATIVE_FORMATS
+    }
+    pending = {(job.ratio, target.width, job.format) for job in jobs for target in job.targets}
+    for variant in existing:
+        key = (variant.ratio, variant.width, variant.format)
+        if variant.on_demand and key in wanted and key not in pending:
+            variant.on_demand = False
+            render_cache.discard(variant.path)
+    rendered = run_render_jobs(asset.original_path, jobs, workers=workers) if jobs else []
+    apply_rendered_variants(db, asset.id, existing, rendered, stale)
+    ensure_placeholder(db, asset, content_hash)
+
+    desired = len(ratio_list) * len(width_list) * len(DERIVATIVE_FORMATS)
+    return VariantSyncResult(
+        rendered=len(rendered),
+        unchanged=desired - len(rendered),
+        removed=len(stale),
+    )
+
+
+def ensure_placeholder(db: Session, asset: Asset, content_hash: str | None = None) -> bool:
+    """Refresh the asset's LQIP when its thumbnail crop changed; return True if re-rendered."""
+    if not settings.assets_derivative_ratios:
+        return False
+    content_hash = content_hash or ensure_content_hash(db, asset)
+    crop_box = compute_crop_box(
+        image_width=asset.width,
+        image_height=asset.height,
+        ratio=parse_ratio(settings.assets_derivative_ratios[0]),
+        focal_x=asset.focal_x,
+        focal_y=asset.focal_y,
+    )
+    fingerprint = placeholder_fingerprint(content_hash, crop_box, asset.orientation)
+    if asset.placeholder and asset.placeholder_fingerprint == fingerprint:
+        return False
+
+    asset.placeholder, asset.dominant_color = render_placeholder(
+        asset.original_path, crop_box, asset.orientation
+    )
+    asset.placeholder_fingerprint = fingerprint
+    db.commit()
+    return True
+
+
+def _seed_render_cache(db: Session) -> None:
+    if render_cache.seeded:
+        return
+    # Keyed by the stored path so evictions can be matched back to their rows.
+    paths = db.execute(
+        select(AssetVariant.path).where(AssetVariant.on_demand.is_(True))
+    ).scalars()
+    render_cache.seed(paths)
+
+
+def _find_variant(
+    db: Session, asset_id: str, ratio: str, width: int, fmt: str
+) -> AssetVariant | None:
+    return db.execute(
+        select(AssetVariant).where(
+            AssetVariant.asset_id == asset_id,
+            AssetVariant.ratio == ratio,
+            AssetVariant.width == width,
+            AssetVariant.format == fmt,
+            AssetVariant.version == settings.assets_derivatives_version,
+        )
+    ).scalar_one_or_none()
+
+
+def expected_variant_fingerprint(
+    asset: Asset, content_hash: str, ratio: str, width: int, fmt: str
+) -> str:
+    crop_box = compute_crop_box(
+        image_width=asset.width,
+        image_height=asset.height,
+        ratio=parse_ratio(ratio),
+        focal_x=asset.focal_x,
+        focal_y=asset.focal_y,
+    )
+    return variant_fingerprint(
+        content_hash,
+        crop_box,
+        width,
+        fmt,
+        orientation=asset.orientation,
+        bounded=use_bounded_decode((asset.width, asset.height)),
+    )
+
+
+def ensure_variant(db: Session, asset: Asset, ratio: str, width: int, fmt: str) -> AssetVariant:
+    _seed_render_cache(db)
+    content_hash = ensure_content_hash(db, asset)
+    version = settings.assets_derivatives_version
+    with render_cache.coalesce((asset.id, ratio, width, fmt, version)):
+        variant = _find_variant(db, asset.id, ratio, width, fmt)
+        if (
+            variant is not None
+            and variant.fingerprint == expected_variant_fingerprint(asset, content_hash, ratio, width, fmt)
+            and os.path.exists(variant.path)
+        ):
+            render_cache.touch(variant.path)
+            return variant
+
+        rendered = render_variant(
+            source_path=asset.original_path,
+            asset_id=asset.id,
+            focal_x=asset.focal_x,
+            focal_y=asset.focal_y,
+            ratio=ratio,
+            width=width,
+            fmt=fmt,
+            content_hash=content_hash,
+            image_size=(asset.width, asset.height),
+            orientation=asset.orientation,
+        )
+        if variant is None:
+            variant = AssetVariant(
+                asset_id=asset.id,
+                ratio=ratio,
+                width=width,
+                format=fmt,
+                version=version,
+                on_demand=True,
+            )
+            db.add(variant)
+        variant.height = rendered["height"]
+        variant.path = rendered["path"]
+        variant.fingerprint = rendered["fingerprint"]
+        variant.quality = rendered["quality"]
+        variant.byte_size = rendered["byte_size"]
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another process recorded the same variant first; its file is ours too.
+            db.rollback()
+            variant = _find_variant(db, asset.id, ratio, width, fmt)
+            if variant is None:
+                raise
+            return variant
+
+        if variant.on_demand:
+            evicted = render_cache.add(variant.path)
+            if evicted:
+                _forget_evicted_variants(db, evicted)
+        return variant
+
+
+def _forget_evicted_variants(db: Session, paths: list[str]) -> None:
+    """Drop the rows of evicted cache files and repoint their assets' thumbnail and manifest."""
+    evicted = (AssetVariant.on_demand.is_(True), AssetVariant.path.in_(paths))
+    asset_ids = db.execute(select(AssetVariant.asset_id).where(*evicted).distinct()).scalars().all()
+    db.execute(delete(AssetVariant).where(*evicted))
+    db.commit()
+    for asset_id in asset_ids:
+        refresh_variant_pointers(db, asset_id)
+
+
+def _remove_derived_file(path: str) -> None:
+    safe_path = os.path.realpath(path)
+    derived_root = os.path.realpath(settings.assets_derived_dir)
+    if not safe_path.startswith(derived_root + os.sep):
+        logger.warning("Refusing to remove derivative outside derived dir: %s", path)
+        return
+    try:
+        os.remove(safe_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from PIL import Image
+
+ENCODER_MODES = ("fixed", "ssim", "bytes")
+
+# Standard SSIM stabilisers for 8-bit data (K1=0.01, K2=0.03).
+_SSIM_C1 = (0.01 * 255) ** 2
+_SSIM_C2 = (0.03 * 255) ** 2
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    data: bytes
+    quality: int
+
+
+def _luma(image: Image.Image) -> np.ndarray:
+    return np.asarray(image.convert("L"), dtype=np.float64)
+
+
+def _box_mean(values: np.ndarray, window: int) -> np.ndarray:
+    # Summed-area table: every window sum is four lookups regardless of size.
+    table = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = (
+        table[window:, window:]
+        - table[:-window, window:]
+        - table[window:, :-window]
+        + table[:-window, :-window]
+    )
+    return sums / float(window * window)
+
+
+def ssim(reference: Image.Image, candidate: Image.Image, window: int = 7) -> float:
+    """Mean structural similarity of the luma channels over a sliding box window."""
+    x = _luma(reference)
+    y = _luma(candidate)
+    if x.shape != y.shape:
+        raise ValueError("SSIM inputs must have the same size")
+    window = max(1, min(window, *x.shape))
+
+    mu_x = _box_mean(x, window)
+    mu_y = _box_mean(y, window)
+    var_x = _box_mean(x * x, window) - mu_x * mu_x
+    var_y = _box_mean(y * y, window) - mu_y * mu_y
+    cov_xy = _box_mean(x * y, window) - mu_x * mu_y
+
+    numerator = (2 * mu_x * mu_y + _SSIM_C1) * (2 * cov_xy + _SSIM_C2)
+    denominator = (mu_x**2 + mu_y**2 + _SSIM_C1) * (var_x + var_y + _SSIM_C2)
+    return float(np.mean(numerator / denominator))
+
+
+def encode(image: Image.Image, params: dict, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, **{**params, "quality": quality})
+    return buffer.getvalue()
+
+
+def _search(
+    image: Image.Image,
+    params: dict,
+    accept: Callable[[bytes], bool],
+    min_quality: int,
+    max_quality: int,
+    max_iterations: int,
+    prefer_lowest: bool,
+) -> EncodedImage | None:
+    low, high = min_quality, max_quality
+    best: EncodedImage | None = None
+    for _ in range(max(1, max_iterations)):
+        if low > high:
+            break
+        quality = (low + high) // 2
+        data = encode(image, params, quality)
+        if accept(data):
+            best = EncodedImage(data=data, quality=quality)
+            if prefer_lowest:
+                high = quality - 1
+            else:
+                low = quality + 1
+        elif prefer_lowest:
+            low = quality + 1
+        else:
+            high = quality - 1
+    return best
+
+
+def encode_for_ssim(
+    image: Image.Image,
+    params: dict,
+    target: float,
+    min_quality: int,
+    max_quality: int,
+    max_iterations: int,
+) -> EncodedImage:
+    """Lowest quality whose decoded result stays at or above ``target`` SSIM."""
+
+    def accept(data: bytes) -> bool:
+        with Image.open(io.BytesIO(data)) as decoded:
+            return ssim(image, decoded) >= target
+
+    best = _search(image, params, accept, min_quality, max_quality, max_iterations, True)
+    if best is None:
+        return EncodedImage(data=encode(image, params, max_quality), quality=max_quality)
+    return best
+
+
+def encode_for_bytes(
+    image: Image.Image,
+    params: dict,
+    budget: int,
+    min_quality: int,
+    max_quality: int,
+    max_iterations: int,
+) -> EncodedImage:
+    """Highest quality whose encoded size fits in ``budget`` bytes."""
+    best = _search(
+        image,
+        params,
+        lambda data: len(data) <= budget,
+        min_quality,
+        max_quality,
+        max_iterations,
+        False,
+    )
+    if best is None:
+        return EncodedImage(data=encode(image, params, min_quality), quality=min_quality)
+    return best
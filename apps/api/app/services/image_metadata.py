@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import io
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from PIL import ExifTags, Image
+
+from app.services.decode_budget import check_pixel_limit
+
+logger = logging.getLogger(__name__)
+
+# EXIF orientations 5-8 store the image rotated a quarter turn.
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+_EXIF_FIELDS = {
+    ExifTags.Base.ExposureTime: "exposure_time",
+    ExifTags.Base.FNumber: "f_number",
+    ExifTags.Base.ISOSpeedRatings: "iso",
+    ExifTags.Base.FocalLength: "focal_length",
+    ExifTags.Base.FocalLengthIn35mmFilm: "focal_length_35mm",
+    ExifTags.Base.LensModel: "lens_model",
+    ExifTags.Base.ExposureBiasValue: "exposure_bias",
+    ExifTags.Base.Flash: "flash",
+    ExifTags.Base.WhiteBalance: "white_balance",
+}
+_XMP_FIELDS = {"Rating": "rating", "Label": "label", "CreatorTool": "creator_tool"}
+
+
+@dataclass(frozen=True)
+class ImageMetadata:
+    width: int
+    height: int
+    orientation: int = 1
+    captured_at: datetime | None = None
+    camera_make: str | None = None
+    camera_model: str | None = None
+    details: dict = field(default_factory=dict)
+
+
+def display_size(size: tuple[int, int], orientation: int | None) -> tuple[int, int]:
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        return size[1], size[0]
+    return size
+
+
+def apply_orientation(image: Image.Image, orientation: int | None) -> Image.Image:
+    method = ORIENTATION_TRANSPOSE.get(orientation or 1)
+    return image.transpose(method) if method is not None else image
+
+
+def extract_image_metadata(path: str) -> ImageMetadata:
+    """Read dimensions, orientation, EXIF, XMP and ICC facts from the file header."""
+    with Image.open(path) as image:
+        check_pixel_limit(image.size)
+        exif = image.getexif()
+        orientation = _orientation(exif.get(ExifTags.Base.Orientation))
+        width, height = display_size(image.size, orientation)
+        exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+
+        details: dict = {"format": image.format, "mode": image.mode}
+        camera = {
+            name: _json_value(exif_ifd.get(tag))
+            for tag, name in _EXIF_FIELDS.items()
+            if exif_ifd.get(tag) is not None
+        }
+        if camera:
+            details["exif"] = camera
+        gps = _gps(exif.get_ifd(ExifTags.IFD.GPSInfo))
+        if gps:
+            details["gps"] = gps
+        icc = _icc(image.info.get("icc_profile"))
+        if icc:
+            details["icc"] = icc
+        xmp = _xmp(image.info.get("xmp") or image.info.get("XML:com.adobe.xmp"))
+        if xmp:
+            details["xmp"] = xmp
+
+        captured_at = _parse_exif_datetime(
+            exif_ifd.get(ExifTags.Base.DateTimeOriginal) or exif.get(ExifTags.Base.DateTime),
+            exif_ifd.get(ExifTags.Base.OffsetTimeOriginal),
+        )
+        return ImageMetadata(
+            width=width,
+            height=height,
+            orientation=orientation,
+            captured_at=captured_at,
+            camera_make=_text(exif.get(ExifTags.Base.Make), 100),
+            camera_model=_text(exif.get(ExifTags.Base.Model), 100),
+            details=details,
+        )
+
+
+def _orientation(value: object) -> int:
+    try:
+        orientation = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return orientation if 1 <= orientation <= 8 else 1
+
+
+def _text(value: object, limit: int) -> str | None:
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="ignore")
+    if not isinstance(value, str):
+        return None
+    value = value.strip("\x00 ").strip()
+    return value[:limit] or None
+
+
+def _json_value(value: object) -> object:
+    if isinstance(value, (bytes, str)):
+        return _text(value, 200)
+    if isinstance(value, tuple):
+        return [_json_value(item) for item in value]
+    if isinstance(value, int):
+        return value
+    try:
+        return round(float(value), 6)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_exif_datetime(value: object, offset: object = None) -> datetime | None:
+    text = _text(value, 32)
+    if not text:
+        return None
+    try:
+        parsed = datetime.strptime(text[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+    tzinfo = timezone.utc
+    offset_text = _text(offset, 8)
+    match = re.fullmatch(r"([+-])(\d{2}):(\d{2})", offset_text or "")
+    if match:
+        sign = 1 if match.group(1) == "+" else -1
+        delta = timedelta(hours=int(match.group(2)), minutes=int(match.group(3)))
+        tzinfo = timezone(sign * delta)
+    # Without an offset tag the camera clock is taken to be UTC.
+    return parsed.replace(tzinfo=tzinfo)
+
+
+def _gps(gps_ifd: dict) -> dict | None:
+    try:
+        latitude = _dms_to_degrees(gps_ifd[2], gps_ifd[1])
+        longitude = _dms_to_degrees(gps_ifd[4], gps_ifd[3])
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+    return {"latitude": round(latitude, 6), "longitude": round(longitude, 6)}
+
+
+def _dms_to_degrees(dms: tuple, ref: object) -> float:
+    degrees, minutes, seconds = (float(part) for part in dms)
+    value = degrees + minutes / 60 + seconds / 3600
+    return -value if _text(ref, 1) in {"S", "W"} else value
+
+
+def _icc(profile: bytes | None) -> dict | None:
+    if not profile:
+        return None
+    details: dict = {"size": len(profile)}
+    try:
+        from PIL import ImageCms
+
+        parsed = ImageCms.ImageCmsProfile(io.BytesIO(profile)).profile
+        details["description"] = _text(parsed.profile_description, 200)
+        details["color_space"] = _text(parsed.xcolor_space, 20)
+    except Exception:
+        logger.debug("Could not parse ICC profile", exc_info=True)
+    return details
+
+
+def _xmp(packet: bytes | str | None) -> dict | None:
+    if not packet:
+        return None
+    if isinstance(packet, bytes):
+        packet = packet.decode("utf-8", errors="ignore")
+    found: dict = {}
+    for tag, name in _XMP_FIELDS.items():
+        # XMP stores simple properties either as attributes or as elements.
+        match = re.search(rf'\w+:{tag}="([^"]*)"', packet) or re.search(
+            rf"<\w+:{tag}>([^<]*)</\w+:{tag}>", packet
+        )
+        if match:
+            value = match.group(1).strip()
+            found[name] = int(value) if name == "rating" and value.lstrip("-").isdigit() else value
+    return found or None
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import logging
+from itertools import combinations
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.services.asset_listing import AssetFilters, apply_asset_filters
+from app.services.decode_budget import check_pixel_limit, decoded_bytes, render_memory_budget
+from app.services.image_metadata import apply_orientation
+from packages.domain.models.assets import Asset
+
+logger = logging.getLogger(__name__)
+
+# dHash compares each pixel of a 9x8 grayscale thumbnail with its right
+# neighbour: 64 bits, stored as four 16-bit chunks (most significant first).
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+CHUNK_BITS = 16
+CHUNK_COUNT = 4
+# Hashes within distance d agree to within d // 4 bits on at least one chunk
+# (pigeonhole), so a lookup probes every chunk value within that radius.
+# Above 11 the probe lists grow into the thousands.
+MAX_SEARCH_DISTANCE = 11
+
+DHASH_COLUMNS = (Asset.dhash_0, Asset.dhash_1, Asset.dhash_2, Asset.dhash_3)
+
+_POPCOUNT = np.array([bin(value).count("1") for value in range(1 << CHUNK_BITS)], dtype=np.uint8)
+
+
+def compute_dhash(path: str, orientation: int | None = None) -> int:
+    with Image.open(path) as image:
+        check_pixel_limit(image.size)
+        # JPEG decodes straight to a small scale; everything else is decoded once.
+        image.draft("L", (HASH_WIDTH * 8, HASH_HEIGHT * 8))
+        with render_memory_budget.reserve(decoded_bytes(image.size)):
+            gray = apply_orientation(image.convert("L"), orientation)
+            small = gray.resize((HASH_WIDTH, HASH_HEIGHT), Image.BOX)
+            del gray
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hash_chunks(value: int) -> tuple[int, ...]:
+    mask = (1 << CHUNK_BITS) - 1
+    return tuple(
+        (value >> (CHUNK_BITS * (CHUNK_COUNT - 1 - index))) & mask for index in range(CHUNK_COUNT)
+    )
+
+
+def join_chunks(chunks) -> int:
+    value = 0
+    for chunk in chunks:
+        value = (value << CHUNK_BITS) | int(chunk)
+    return value
+
+
+def dhash_columns(path: str, orientation: int | None = None) -> dict:
+    """Column values for an asset's dHash; all None when the pixels cannot be read."""
+    try:
+        chunks: tuple[int | None, ...] = hash_chunks(compute_dhash(path, orientation))
+    except Exception as exc:
+        logger.warning("Perceptual hash failed for %s: %s", path, exc)
+        chunks = (None,) * CHUNK_COUNT
+    return {column.key: chunk for column, chunk in zip(DHASH_COLUMNS, chunks)}
+
+
+def asset_dhash(asset: Asset) -> int | None:
+    chunks = [getattr(asset, column.key) for column in DHASH_COLUMNS]
+    return None if None in chunks else join_chunks(chunks)
+
+
+def flip_masks(radius: int) -> list[int]:
+    """Every chunk mask with at most ``radius`` bits set, 0 first."""
+    return [
+        sum(1 << bit for bit in bits)
+        for count in range(radius + 1)
+        for bits in combinations(range(CHUNK_BITS), count)
+    ]
+
+
+def find_similar(
+    db: Session, value: int, max_distance: int, limit: int, exclude_id: str | None = None
+) -> list[tuple[str, int]]:
+    """(asset id, distance) of hashes within ``max_distance`` bits, nearest first."""
+    masks = flip_masks(max_distance // CHUNK_COUNT)
+    probes = [
+        column.in_(sorted(chunk ^ mask for mask in masks))
+        for column, chunk in zip(DHASH_COLUMNS, hash_chunks(value))
+    ]
+    stmt = select(Asset.id, *DHASH_COLUMNS).where(or_(*probes))
+    if exclude_id is not None:
+        stmt = stmt.where(Asset.id != exclude_id)
+    matches = []
+    for asset_id, *chunks in db.execute(stmt):
+        distance = (join_chunks(chunks) ^ value).bit_count()
+        if distance <= max_distance:
+            matches.append((asset_id, distance))
+    matches.sort(key=lambda match: (match[1], match[0]))
+    return matches[:limit]
+
+
+def find_duplicate_clusters(
+    db: Session, filters: AssetFilters, max_distance: int, dialect: str | None = None
+) -> list[list[tuple[str, int]]]:
+    """Groups of assets linked by hashes within ``max_distance`` bits.
+
+    Each group lists (asset id, distance from its first asset), oldest first;
+    groups are largest first.
+    """
+    rows = db.execute(
+        apply_asset_filters(
+            select(Asset.id, *DHASH_COLUMNS)
+            .where(Asset.dhash_0.is_not(None))
+            .order_by(Asset.created_at, Asset.id),
+            filters,
+            dialect,
+        )
+    ).all()
+    if len(rows) < 2:
+        return []
+    asset_ids = [row[0] for row in rows]
+    # Identical hashes collapse first, so a pile of blank frames is one entry.
+    chunks, owner = np.unique(
+        np.array([row[1:] for row in rows], dtype=np.uint16), axis=0, return_inverse=True
+    )
+    owner = owner.reshape(-1)
+
+    parent = list(range(len(chunks)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for left, right in zip(*_near_pairs(chunks, max_distance)):
+        root_left, root_right = find(int(left)), find(int(right))
+        if root_left != root_right:
+            parent[max(root_left, root_right)] = min(root_left, root_right)
+
+    groups: dict[int, list[int]] = {}
+    for row_index, hash_index in enumerate(owner):
+        groups.setdefault(find(int(hash_index)), []).append(row_index)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        first = chunks[owner[members[0]]]
+        clusters.append(
+            [
+                (asset_ids[index], int(_POPCOUNT[first ^ chunks[owner[index]]].sum()))
+                for index in members
+            ]
+        )
+    clusters.sort(key=lambda cluster: (-len(cluster), cluster[0][0]))
+    return clusters
+
+
+def _near_pairs(chunks: np.ndarray, max_distance: int) -> tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i < j) of distinct hashes within ``max_distance``.
+
+    Multi-index hashing: each chunk column is bucketed by value (a counting
+    sort over the 2**16 possible chunks), and each hash probes the buckets
+    within the pigeonhole radius of its own chunk, so only hashes sharing a
+    near-identical chunk are ever compared.
+    """
+    count = len(chunks)
+    masks = np.array(flip_masks(max_distance // CHUNK_COUNT), dtype=np.uint16)
+    lefts, rights = [], []
+    for column in range(CHUNK_COUNT):
+        values = chunks[:, column]
+        order = np.argsort(values, kind="stable")
+        bucket_sizes = np.bincount(values, minlength=1 << CHUNK_BITS)
+        bucket_starts = np.cumsum(bucket_sizes) - bucket_sizes
+        for mask in masks:
+            probe = values ^ mask
+            start = bucket_starts[probe]
+            hits = bucket_sizes[probe]
+            total = int(hits.sum())
+            if not total:
+                continue
+            left = np.repeat(np.arange(count), hits)
+            offsets = np.arange(total) - np.repeat(np.cumsum(hits) - hits, hits)
+            right = order[np.repeat(start, hits) + offsets]
+            keep = left < right
+            left, right = left[keep], right[keep]
+            distance = _POPCOUNT[chunks[left] ^ chunks[right]].sum(axis=1)
+            keep = distance <= max_distance
+            lefts.append(left[keep])
+            rights.append(right[keep])
+    if not lefts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # A pair close in several chunks turns up once per chunk.
+    keys = np.unique(np.concatenate(lefts).astype(np.int64) * count + np.concatenate(rights))
+    return keys // count, keys % count
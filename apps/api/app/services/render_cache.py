@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Hashable, Iterable, Iterator
+
+from app.core.settings import settings
+
+
+class RenderCache:
+    """Size-capped LRU index over derivative files rendered on demand.
+
+    The index is process-local and seeded lazily from the caller's list of
+    known cache files, ordered by mtime (which ``touch`` refreshes on every
+    hit so ordering survives restarts).
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._seeded = False
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, list] = {}
+
+    @property
+    def seeded(self) -> bool:
+        return self._seeded
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def seed(self, paths: Iterable[str]) -> None:
+        stats: list[tuple[float, str, int]] = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats.append((stat.st_mtime, path, stat.st_size))
+        with self._lock:
+            if self._seeded:
+                return
+            for _, path, size in sorted(stats):
+                self._store(path, size)
+            self._seeded = True
+
+    def touch(self, path: str) -> None:
+        with self._lock:
+            if path not in self._entries:
+                return
+            self._entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def add(self, path: str) -> list[str]:
+        """Register a freshly rendered file and return the paths evicted to fit it."""
+        size = os.path.getsize(path)
+        evicted: list[str] = []
+        with self._lock:
+            self._store(path, size)
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                victim, victim_size = self._entries.popitem(last=False)
+                self._total_bytes -= victim_size
+                evicted.append(victim)
+        for victim in evicted:
+            try:
+                os.remove(victim)
+            except OSError:
+                pass
+        return evicted
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            size = self._entries.pop(path, None)
+            if size is not None:
+                self._total_bytes -= size
+
+    def discard_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for path in [path for path in self._entries if path.startswith(prefix)]:
+                self._total_bytes -= self._entries.pop(path)
+
+    @contextmanager
+    def coalesce(self, key: Hashable) -> Iterator[None]:
+        """Serialise work on ``key`` so concurrent requests render it only once."""
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is None:
+                entry = [threading.Lock(), 0]
+                self._inflight[key] = entry
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._inflight.pop(key, None)
+
+    def _store(self, path: str, size: int) -> None:
+        previous = self._entries.pop(path, None)
+        if previous is not None:
+            self._total_bytes -= previous
+        self._entries[path] = size
+        self._total_bytes += size
+
+
+render_cache = RenderCache(max_bytes=settings.assets_render_cache_max_bytes)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Protocol
+from urllib.parse import urlencode
+
+from app.core.settings import settings
+from app.services.assets import DERIVATIVE_FORMATS, build_render_jobs
+
+FORMAT_MIME_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+
+class SrcsetSource(Protocol):
+    id: str
+    width: int
+    height: int
+    focal_x: float
+    focal_y: float
+    content_hash: str | None
+    orientation: int | None
+    variant_manifest: dict | None
+
+
+def manifest_entries(asset: SrcsetSource, ratio: str) -> list[dict]:
+    """Return every configured variant of a ratio, flagged ``rendered`` when it already exists.
+
+    Fingerprints are derived from the asset row, as /render derives them, so
+    the set stays complete before the backfill runs and follows focal-point
+    or crop edits; the stored manifest only says which ones are on disk.
+    """
+    stored = {
+        (entry["width"], entry["format"], entry["fingerprint"])
+        for entry in (asset.variant_manifest or {}).get(ratio) or []
+    }
+    jobs = build_render_jobs(
+        asset_id=asset.id,
+        image_width=asset.width,
+        image_height=asset.height,
+        focal_x=asset.focal_x,
+        focal_y=asset.focal_y,
+        ratios=[ratio],
+        widths=settings.assets_derivative_widths,
+        content_hash=asset.content_hash,
+        orientation=asset.orientation,
+    )
+    return [
+        {
+            "width": target.width,
+            "height": target.height,
+            "format": job.format,
+            "fingerprint": target.fingerprint,
+            "rendered": (target.width, job.format, target.fingerprint) in stored,
+        }
+        for job in jobs
+        for target in job.targets
+    ]
+
+
+def render_url(asset_id: str, ratio: str, width: int, fmt: str, fingerprint: str | None) -> str:
+    params = {"ratio": ratio, "width": width, "format": fmt}
+    if fingerprint:
+        params["v"] = fingerprint
+    return f"{settings.api_v1_prefix}/assets/{asset_id}/render?{urlencode(params)}"
+
+
+def thumbnail_url(asset_id: str, fingerprint: str | None) -> str:
+    url = f"{settings.api_v1_prefix}/assets/{asset_id}/thumbnail"
+    return f"{url}?{urlencode({'v': fingerprint})}" if fingerprint else url
+
+
+def build_srcset(asset: SrcsetSource, ratio: str) -> dict | None:
+    entries = manifest_entries(asset, ratio)
+    sources = []
+    fallback = None
+    for fmt in DERIVATIVE_FORMATS:
+        candidates = sorted(
+            (entry for entry in entries if entry["format"] == fmt),
+            key=lambda entry: entry["width"],
+        )
+        if not candidates:
+            continue
+        urls = [
+            (render_url(asset.id, ratio, entry["width"], fmt, entry["fingerprint"]), entry)
+            for entry in candidates
+        ]
+        sources.append(
+            {
+                "format": fmt,
+                "type": FORMAT_MIME_TYPES[fmt],
+                "srcset": ", ".join(f"{url} {entry['width']}w" for url, entry in urls),
+            }
+        )
+        # <img src> falls back to the last (most compatible) format, at its widest
+        # rendition already on disk so old browsers don't wait on a render.
+        rendered = [url for url in urls if url[1]["rendered"]]
+        fallback = (rendered or urls)[-1]
+
+    if fallback is None:
+        return None
+    url, entry = fallback
+    return {
+        "ratio": ratio,
+        "width": entry["width"],
+        "height": entry["height"],
+        "src": url,
+        "sources": sources,
+    }
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.settings import settings
+
+
+@dataclass(frozen=True)
+class ThumbnailEntry:
+    path: str
+    etag_token: str | None
+
+
+class ThumbnailCache:
+    """Process-local LRU of asset_id -> resolved thumbnail file.
+
+    Entries expire after ``ttl_seconds`` so pointer changes made by other
+    processes are picked up without cross-process invalidation.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, ThumbnailEntry]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, asset_id: str) -> ThumbnailEntry | None:
+        with self._lock:
+            item = self._entries.get(asset_id)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                del self._entries[asset_id]
+                return None
+            self._entries.move_to_end(asset_id)
+            return entry
+
+    def put(self, asset_id: str, entry: ThumbnailEntry) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[asset_id] = (time.monotonic() + self.ttl_seconds, entry)
+            self._entries.move_to_end(asset_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, asset_id: str) -> None:
+        with self._lock:
+            self._entries.pop(asset_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+thumbnail_cache = ThumbnailCache(
+    max_entries=settings.assets_thumbnail_cache_size,
+    ttl_seconds=settings.assets_thumbnail_cache_ttl_seconds,
+)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import shutil
+from typing import Callable
+from uuid import uuid4
+
+from PIL import Image
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.services.assets import ensure_dir, load_source, upright_region
+from app.services.decode_budget import decoded_bytes, render_memory_budget
+from app.services.derivatives import ensure_content_hash
+from app.services.image_metadata import display_size
+from packages.domain.models.assets import Asset
+
+TILE_SIZE = 256
+TILE_OVERLAP = 1
+TILE_FORMAT = "webp"
+TILE_PARAMS = {"format": "WEBP", "quality": 80, "method": 4}
+
+
+def tile_fingerprint(content_hash: str, orientation: int | None = None) -> str:
+    payload = {
+        "source": content_hash,
+        "tile_size": TILE_SIZE,
+        "overlap": TILE_OVERLAP,
+        "encoder": TILE_PARAMS,
+        "version": settings.assets_derivatives_version,
+    }
+    if orientation and orientation != 1:
+        payload["orientation"] = orientation
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def max_tile_level(width: int, height: int) -> int:
+    # Deep Zoom numbering: level 0 is 1x1 and the top level is full size.
+    return max(0, math.ceil(math.log2(max(width, height, 1))))
+
+
+def level_size(width: int, height: int, level: int) -> tuple[int, int]:
+    scale = 2 ** (max_tile_level(width, height) - level)
+    return max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale))
+
+
+def tile_grid(size: tuple[int, int]) -> tuple[int, int]:
+    return math.ceil(size[0] / TILE_SIZE), math.ceil(size[1] / TILE_SIZE)
+
+
+def tile_box(size: tuple[int, int], col: int, row: int) -> tuple[int, int, int, int]:
+    left = col * TILE_SIZE - (TILE_OVERLAP if col else 0)
+    top = row * TILE_SIZE - (TILE_OVERLAP if row else 0)
+    right = min(size[0], (col + 1) * TILE_SIZE + TILE_OVERLAP)
+    bottom = min(size[1], (row + 1) * TILE_SIZE + TILE_OVERLAP)
+    return left, top, right, bottom
+
+
+def tiles_root(asset_id: str) -> str:
+    return os.path.join(settings.assets_derived_dir, asset_id, "tiles")
+
+
+def tile_dir(asset_id: str, fingerprint: str) -> str:
+    return os.path.join(tiles_root(asset_id), fingerprint[:16])
+
+
+def tile_path(asset_id: str, fingerprint: str, level: int, col: int, row: int) -> str:
+    return os.path.join(tile_dir(asset_id, fingerprint), str(level), f"{col}_{row}.{TILE_FORMAT}")
+
+
+def estimate_tile_bytes(image_size: tuple[int, int]) -> int:
+    """Peak decoded pixels while building a pyramid for an image of ``image_size``.
+
+    The frame stays decoded in stored orientation while the top level is cut
+    from it and the next level is reduced from it band by band; after that
+    each level only lives beside the one reduced from it.
+    """
+    half = (math.ceil(image_size[0] / 2), math.ceil(image_size[1] / 2))
+    return decoded_bytes(image_size) + 2 * decoded_bytes(half)
+
+
+def generate_tiles(
+    source_path: str, output_dir: str, image_size: tuple[int, int], orientation: int | None
+) -> int:
+    """Write every level's tiles under ``output_dir``; return the tile count."""
+    with render_memory_budget.reserve(estimate_tile_bytes(image_size)):
+        # Full resolution is the point here, so there is no reduced-scale
+        # decode; the bounded path at least skips the full-size upright copy.
+        source = load_source(source_path, None, orientation, bounded=True)
+        try:
+            size = display_size(source.size, orientation)
+            level = max_tile_level(*size)
+            count = _write_level(
+                output_dir, level, size, lambda box: upright_region(source, box, orientation)
+            )
+            if not level:
+                return count
+            level_image = _reduce_upright(source, size, orientation)
+        finally:
+            source.close()
+        try:
+            for level in range(level - 1, -1, -1):
+                count += _write_level(output_dir, level, level_image.size, level_image.crop)
+                if level:
+                    # reduce() rounds odd sizes up, matching level_size().
+                    level_image = level_image.reduce(2)
+        finally:
+            level_image.close()
+    return count
+
+
+def _write_level(
+    output_dir: str,
+    level: int,
+    size: tuple[int, int],
+    region: Callable[[tuple[int, int, int, int]], Image.Image],
+) -> int:
+    level_path = os.path.join(output_dir, str(level))
+    ensure_dir(level_path)
+    columns, rows = tile_grid(size)
+    for col in range(columns):
+        for row in range(rows):
+            tile = region(tile_box(size, col, row))
+            tile.save(os.path.join(level_path, f"{col}_{row}.{TILE_FORMAT}"), **TILE_PARAMS)
+    return columns * rows
+
+
+def _reduce_upright(
+    source: Image.Image, size: tuple[int, int], orientation: int | None
+) -> Image.Image:
+    """Half-size upright copy of ``source``, reduced a band of rows at a time."""
+    # Bands start on even rows, so each 2x2 block matches a whole-frame reduce().
+    band_rows = 2 * max(1, settings.assets_bounded_decode_strip_rows)
+    reduced = Image.new("RGB", (math.ceil(size[0] / 2), math.ceil(size[1] / 2)))
+    for top in range(0, size[1], band_rows):
+        band = upright_region(source, (0, top, size[0], min(size[1], top + band_rows)), orientation)
+        reduced.paste(band.reduce(2), (0, top // 2))
+    return reduced
+
+
+def sync_asset_tiles(db: Session, asset: Asset) -> bool:
+    """Build the tile pyramid unless the current one is already on disk."""
+    content_hash = ensure_content_hash(db, asset)
+    fingerprint = tile_fingerprint(content_hash, asset.orientation)
+    directory = tile_dir(asset.id, fingerprint)
+    if asset.tiles_fingerprint == fingerprint and os.path.isdir(directory):
+        return False
+
+    if not os.path.isdir(directory):
+        # Build beside the final directory and swap it in whole, so readers
+        # never see a half-written level.
+        staging = os.path.join(tiles_root(asset.id), f".tmp-{uuid4().hex}")
+        try:
+            generate_tiles(
+                asset.original_path, staging, (asset.width, asset.height), asset.orientation
+            )
+            try:
+                os.replace(staging, directory)
+            except OSError:
+                # Another worker finished the same pyramid first.
+                if not os.path.isdir(directory):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    asset.tiles_fingerprint = fingerprint
+    db.commit()
+    _prune_tile_dirs(asset.id, keep=directory)
+    return True
+
+
+def _prune_tile_dirs(asset_id: str, keep: str) -> None:
+    root = tiles_root(asset_id)
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if path != keep and not name.startswith(".tmp-"):
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,363 @@
+"""Derivative pipeline benchmarks on synthetic originals.
+
+Run from ``apps/api``::
+
+    python -m benchmarks.derivatives --output before.json
+    python -m benchmarks.derivatives --output after.json --compare before.json
+
+Originals are generated once into ``--cache-dir``; renders go to a temporary
+directory. No database or network access is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from app.core.settings import settings
+from app.services.asset_ingest import discard_staged_path, stage_stream
+from app.services.assets import (
+    DERIVATIVE_FORMATS,
+    _bounded_targets,
+    _encode_variant,
+    _scale_crop_box,
+    build_render_jobs,
+    compute_crop_box,
+    ensure_dir,
+    generate_variants,
+    load_source,
+    parse_ratio,
+    render_decode_size,
+    resize_targets,
+)
+from app.services.image_metadata import extract_image_metadata
+
+DEFAULT_MEGAPIXELS = (12, 24, 45, 60)
+SOURCE_FORMATS = {"jpeg": ("JPEG", ".jpg", {"quality": 92}), "png": ("PNG", ".png", {})}
+STAGES = ("ingest", "decode", "crop", "resize", "encode", "pipeline")
+CROP_BOX_CALLS = 10_000
+# Stages faster than this are too noisy to flag as regressions.
+MIN_COMPARABLE_SECONDS = 0.02
+SYNTHETIC_STRIP_ROWS = 256
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the derivative pipeline.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_MEGAPIXELS),
+        help="Comma-separated original sizes in megapixels (default 12,24,45,60).",
+    )
+    parser.add_argument(
+        "--formats",
+        default=",".join(SOURCE_FORMATS),
+        help="Comma-separated original formats: jpeg,png.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (default 3).")
+    parser.add_argument("--ratios", help="Comma-separated ratios. Defaults to settings.")
+    parser.add_argument("--widths", help="Comma-separated widths. Defaults to settings.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Render workers for the end-to-end pipeline stage (default 1).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.path.join(tempfile.gettempdir(), "bhp-benchmark-originals"),
+        help="Where synthetic originals are kept between runs.",
+    )
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown of a stage median reported as a regression (default 0.10).",
+    )
+    return parser.parse_args()
+
+
+def synthetic_size(megapixels: float) -> tuple[int, int]:
+    # 3:2, the usual camera frame.
+    height = int(round(math.sqrt(megapixels * 1_000_000 / 1.5)))
+    return int(round(height * 1.5)), height
+
+
+def synthetic_original(directory: str, megapixels: float, source_format: str) -> str:
+    """Write (or reuse) a deterministic photo-like original."""
+    pil_format, ext, params = SOURCE_FORMATS[source_format]
+    width, height = synthetic_size(megapixels)
+    path = os.path.join(directory, f"synthetic-{width}x{height}{ext}")
+    if os.path.exists(path):
+        return path
+
+    ensure_dir(directory)
+    rng = np.random.default_rng(7)
+    xs = np.linspace(0, 6 * math.pi, width, dtype=np.float32)
+    image = Image.new("RGB", (width, height))
+    # Built in strips so a 60 MP original never needs float buffers for the whole frame.
+    for top in range(0, height, SYNTHETIC_STRIP_ROWS):
+        rows = min(SYNTHETIC_STRIP_ROWS, height - top)
+        ys = np.linspace(top, top + rows, rows, endpoint=False, dtype=np.float32)[:, None]
+        ys = ys / height * 4 * math.pi
+        base = 110 + 60 * np.sin(xs[None, :] + ys) * np.cos(0.5 * xs[None, :] - ys)
+        channels = [
+            base + 25 * np.cos(ys + offset) + rng.normal(0, 6, size=(rows, width))
+            for offset in (0.0, 2.1, 4.2)
+        ]
+        strip = np.clip(np.stack(channels, axis=-1), 0, 255).astype(np.uint8)
+        image.paste(Image.fromarray(strip, "RGB"), (0, top))
+    temp_path = f"{path}.part"
+    image.save(temp_path, format=pil_format, **params)
+    os.replace(temp_path, path)
+    return path
+
+
+def _peak_rss_mb(who: int) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _summary(samples: list[float]) -> dict:
+    return {
+        "median": round(statistics.median(samples), 6),
+        "min": round(min(samples), 6),
+        "max": round(max(samples), 6),
+        "runs": len(samples),
+    }
+
+
+def run_case(
+    source_path: str,
+    ratios: list[str],
+    widths: list[int],
+    repeat: int,
+    workers: int,
+) -> dict:
+    """Time every pipeline stage for one original; meant to run in its own process."""
+    output_root = tempfile.mkdtemp(prefix="bhp-benchmark-")
+    settings.assets_derived_dir = output_root
+    timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    try:
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            with open(source_path, "rb") as stream:
+                staged = stage_stream(stream, directory=output_root, max_bytes=0)
+            metadata = extract_image_metadata(staged.path)
+            discard_staged_path(staged.path)
+            timings["ingest"].append(time.perf_counter() - started)
+
+            jobs = build_render_jobs(
+                asset_id="benchmark",
+                image_width=metadata.width,
+                image_height=metadata.height,
+                focal_x=0.5,
+                focal_y=0.5,
+                ratios=ratios,
+                widths=widths,
+                content_hash=staged.content_hash,
+                orientation=metadata.orientation,
+            )
+            started = time.perf_counter()
+            image = load_source(
+                source_path, render_decode_size(jobs), metadata.orientation, jobs[0].bounded
+            )
+            timings["decode"].append(time.perf_counter() - started)
+
+            crop = resize = encode = 0.0
+            for job in jobs:
+                started = time.perf_counter()
+                if job.bounded:
+                    # The bounded path resamples straight from the source, so
+                    # its crop cost is inside the resize stage.
+                    resized_targets = _bounded_targets(image, job)
+                else:
+                    cropped = image.crop(_scale_crop_box(job.crop_box, job.source_size, image))
+                    resized_targets = resize_targets(
+                        cropped, job.targets, pyramid=settings.assets_derivative_pyramid
+                    )
+                crop += time.perf_counter() - started
+                for target in job.targets:
+                    ensure_dir(os.path.dirname(target.path))
+                resized_iter = iter(resized_targets)
+                while True:
+                    started = time.perf_counter()
+                    item = next(resized_iter, None)
+                    resize += time.perf_counter() - started
+                    if item is None:
+                        break
+                    target, resized = item
+                    started = time.perf_counter()
+                    _encode_variant(resized, target.path, job.format, job.encoder_mode)
+                    encode += time.perf_counter() - started
+            image.close()
+            timings["crop"].append(crop)
+            timings["resize"].append(resize)
+            timings["encode"].append(encode)
+
+            started = time.perf_counter()
+            generate_variants(
+                source_path,
+                "benchmark",
+                0.5,
+                0.5,
+                ratios,
+                widths,
+                workers=workers,
+                content_hash=staged.content_hash,
+                image_size=(metadata.width, metadata.height),
+                orientation=metadata.orientation,
+            )
+            timings["pipeline"].append(time.perf_counter() - started)
+
+        ratio_objects = [parse_ratio(ratio) for ratio in ratios]
+        started = time.perf_counter()
+        for index in range(CROP_BOX_CALLS):
+            compute_crop_box(
+                metadata.width,
+                metadata.height,
+                ratio_objects[index % len(ratio_objects)],
+                0.3,
+                0.6,
+            )
+        crop_box_us = (time.perf_counter() - started) / CROP_BOX_CALLS * 1_000_000
+    finally:
+        shutil.rmtree(output_root, ignore_errors=True)
+
+    return {
+        "width": metadata.width,
+        "height": metadata.height,
+        "file_bytes": os.path.getsize(source_path),
+        "bounded": jobs[0].bounded,
+        "variants": sum(len(job.targets) for job in jobs),
+        "stages": {stage: _summary(samples) for stage, samples in timings.items()},
+        "compute_crop_box_us": round(crop_box_us, 3),
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_children_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def environment(ratios: list[str], widths: list[int]) -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "derivatives_version": settings.assets_derivatives_version,
+            "pyramid": settings.assets_derivative_pyramid,
+            "encoder_mode": settings.assets_encoder_mode,
+            "bounded_decode_min_pixels": settings.assets_bounded_decode_min_pixels,
+            "formats": list(DERIVATIVE_FORMATS),
+            "ratios": list(ratios),
+            "widths": list(widths),
+        },
+    }
+
+
+def compare(previous: dict, current: dict, threshold: float) -> list[str]:
+    """Print stage-by-stage ratios against ``previous``; return the regressions."""
+    before_settings = previous.get("environment", {}).get("settings", {})
+    for key, value in current["environment"]["settings"].items():
+        if key in before_settings and before_settings[key] != value:
+            print(f"Warning: {key} differs from the baseline ({before_settings[key]} -> {value})")
+    earlier = {result["case"]: result for result in previous.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        baseline = earlier.get(result["case"])
+        if baseline is None:
+            print(f"{result['case']}: no baseline")
+            continue
+        parts = []
+        for stage, summary in result["stages"].items():
+            before = baseline["stages"].get(stage, {}).get("median")
+            if not before:
+                continue
+            ratio = summary["median"] / before
+            parts.append(f"{stage} x{ratio:.2f}")
+            if ratio > 1 + threshold and before >= MIN_COMPARABLE_SECONDS:
+                regressions.append(f"{result['case']} {stage}: x{ratio:.2f}")
+        rss_before = baseline.get("peak_rss_mb")
+        if rss_before:
+            parts.append(f"rss x{result['peak_rss_mb'] / rss_before:.2f}")
+        print(f"{result['case']}: " + ", ".join(parts))
+    return regressions
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = [float(size) for size in args.sizes.split(",") if size.strip()]
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = set(formats) - set(SOURCE_FORMATS)
+    if unknown:
+        print(f"Unknown formats: {', '.join(sorted(unknown))}")
+        return 2
+    ratios = (
+        [ratio.strip() for ratio in args.ratios.split(",") if ratio.strip()]
+        if args.ratios
+        else settings.assets_derivative_ratios
+    )
+    widths = (
+        [int(width.strip()) for width in args.widths.split(",") if width.strip()]
+        if args.widths
+        else settings.assets_derivative_widths
+    )
+
+    report = {"environment": environment(ratios, widths), "results": []}
+    context = multiprocessing.get_context("spawn")
+    for source_format in formats:
+        for megapixels in sizes:
+            case = f"{source_format}-{megapixels:g}mp"
+            print(f"{case}: preparing original", flush=True)
+            source_path = synthetic_original(args.cache_dir, megapixels, source_format)
+            # A fresh process per case keeps peak RSS attributable to that case.
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(
+                    run_case, source_path, ratios, widths, args.repeat, args.workers
+                ).result()
+            result = {"case": case, "format": source_format, "megapixels": megapixels, **result}
+            report["results"].append(result)
+            stages = ", ".join(
+                f"{stage} {summary['median']:.3f}s" for stage, summary in result["stages"].items()
+            )
+            print(f"{case}: {stages}, peak RSS {result['peak_rss_mb']} MB", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            previous = json.load(handle)
+        regressions = compare(previous, report, args.threshold)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
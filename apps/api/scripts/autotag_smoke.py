@@ -28,8 +28,13 @@ def main() -> None:
     response = ai_tagging._request_tagging(data_url, ai_tagging.SERVICE_TAGS)
     service_tags = response.get("service_tags", [])
     suggested_tags = response.get("suggested_tags", [])
+    caption = response.get("caption")
 
-    if not isinstance(service_tags, list) or not isinstance(suggested_tags, list):
+    if (
+        not isinstance(service_tags, list)
+        or not isinstance(suggested_tags, list)
+        or not isinstance(caption, str)
+    ):
         raise SystemExit("Unexpected response schema from OpenAI.")
 
     allowed = set(ai_tagging.SERVICE_TAGS)
@@ -41,6 +46,7 @@ def main() -> None:
     print("Auto-tag smoke test passed.")
     print("Service tags:", service_tags)
     print("Suggested tags:", suggested_tags)
+    print("Caption:", caption)
 
 
 if __name__ == "__main__":
@@ -45,7 +45,10 @@ def upload_file(
         print(f"[error] {file_path} -> {response.status_code}: {response.text}")
         return False
 
-    print(f"[ok] {file_path}")
+    if response.json().get("duplicate"):
+        print(f"[duplicate] {file_path}")
+    else:
+        print(f"[ok] {file_path}")
     return True
 
 
@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import app  # noqa: F401
+
+from packages.domain.db.base import Base
+from packages.domain.models.assets import Asset
+from app.api.deps import require_api_auth
+from app.core.settings import settings
+from app.db.session import get_db
+from app.main import app as fastapi_app
+from app.services.asset_search import ensure_search_index, refresh_search_documents
+
+
+@pytest.fixture(scope="session")
+def create_asset_engine(tmp_path_factory):
+    """Factory for file-backed SQLite engines holding the asset tables and search index."""
+
+    def create(name: str = "assets"):
+        path = tmp_path_factory.mktemp(name) / "assets.sqlite"
+        engine = create_engine(f"sqlite:///{path}")
+        tables = [
+            table
+            for key, table in Base.metadata.tables.items()
+            if key.startswith("asset") or key == "tag_taxonomy"
+        ]
+        Base.metadata.create_all(engine, tables=tables)
+        ensure_search_index(engine)
+        return engine
+
+    return create
+
+
+@pytest.fixture
+def asset_seed():
+    """Rows the ``db`` fixture inserts; test modules override this with their own data."""
+    return []
+
+
+@pytest.fixture
+def db(create_asset_engine, asset_seed):
+    engine = create_asset_engine()
+    with Session(engine) as session:
+        session.add_all(asset_seed)
+        # Search documents are built at ingest; seeded assets get theirs too.
+        refresh_search_documents(
+            session, [row.id for row in asset_seed if isinstance(row, Asset)]
+        )
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db, tmp_path, monkeypatch):
+    """API client on the ``db`` engine with storage under ``tmp_path`` and auth bypassed.
+
+    Startup hooks don't run, so no derivative workers pick up queued jobs.
+    """
+    monkeypatch.setattr(settings, "assets_storage_root", str(tmp_path))
+    monkeypatch.setattr(settings, "assets_originals_dir", str(tmp_path / "originals"))
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path / "derived"))
+
+    def request_db():
+        with Session(db.get_bind()) as session:
+            yield session
+
+    fastapi_app.dependency_overrides[get_db] = request_db
+    fastapi_app.dependency_overrides[require_api_auth] = lambda: None
+    yield TestClient(fastapi_app)
+    fastapi_app.dependency_overrides.clear()
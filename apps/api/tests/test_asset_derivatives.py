@@ -0,0 +1,206 @@
+import os
+
+from PIL import Image
+
+from app.core.settings import settings
+from app.services import assets as asset_service
+from app.services.derivative_jobs import upload_render_targets
+
+
+def _write_source(path, size=(900, 600)):
+    image = Image.new("RGB", size)
+    for x in range(0, size[0], 30):
+        image.paste((x % 255, 80, 255 - x % 255), (x, 0, x + 15, size[1]))
+    image.save(path, format="JPEG", quality=90)
+    return str(path)
+
+
+def test_generate_variants_pool_matches_serial(tmp_path, monkeypatch):
+    source = _write_source(tmp_path / "source.jpg")
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path / "serial"))
+    serial = asset_service.generate_variants(
+        source, "asset", 0.5, 0.5, ["3:2", "1:1"], [200, 120], workers=1
+    )
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path / "pooled"))
+    pooled = asset_service.generate_variants(
+        source, "asset", 0.5, 0.5, ["3:2", "1:1"], [200, 120], workers=2
+    )
+
+    def strip(variants):
+        return [(v["ratio"], v["width"], v["height"], v["format"]) for v in variants]
+
+    assert strip(serial) == strip(pooled)
+    assert len(pooled) == 8
+    assert [v["format"] for v in pooled[:2]] == ["webp", "jpg"]
+    for variant in pooled:
+        assert variant["path"].startswith(str(tmp_path / "pooled"))
+        assert os.path.exists(variant["path"])
+        with Image.open(variant["path"]) as rendered:
+            assert rendered.size == (variant["width"], variant["height"])
+
+
+def _detailed_image(size=(1600, 1000)):
+    import numpy as np
+
+    rng = np.random.default_rng(7)
+    yy, xx = np.mgrid[0 : size[1], 0 : size[0]]
+    base = (np.sin(xx / 9.0) + np.cos(yy / 13.0)) * 60 + 128
+    noise = rng.normal(0, 12, size=(size[1], size[0]))
+    channel = np.clip(base + noise, 0, 255).astype("uint8")
+    return Image.fromarray(np.stack([channel, channel[::-1], 255 - channel], axis=-1))
+
+
+def test_pyramid_resize_stays_close_to_direct_resize():
+    import numpy as np
+
+    cropped = _detailed_image()
+    targets = [
+        asset_service.RenderTarget(width=width, height=int(round(width / 1.6)), path="")
+        for width in (1200, 800, 400)
+    ]
+    direct = {
+        target.width: np.asarray(image, dtype="float32")
+        for target, image in asset_service.resize_targets(cropped, targets, pyramid=False)
+    }
+    cascaded = {
+        target.width: np.asarray(image, dtype="float32")
+        for target, image in asset_service.resize_targets(cropped, targets, pyramid=True)
+    }
+
+    assert sorted(direct) == sorted(cascaded)
+    for width, expected in direct.items():
+        assert cascaded[width].shape == expected.shape
+        assert np.abs(cascaded[width] - expected).mean() < 2.0
+
+
+def test_draft_decode_size_covers_largest_target(tmp_path):
+    source = tmp_path / "large.jpg"
+    _detailed_image((3200, 2000)).save(source, format="JPEG", quality=90)
+    jobs = asset_service.build_render_jobs("asset", 3200, 2000, 0.5, 0.5, ["1:1"], [400, 600])
+
+    decode_size = asset_service.compute_decode_size(jobs)
+    assert decode_size is not None
+
+    image = asset_service.load_source(str(source), decode_size)
+    assert image.width < 3200
+    box = asset_service._scale_crop_box(jobs[0].crop_box, jobs[0].source_size, image)
+    assert box[2] - box[0] >= 600 - 1
+
+
+def test_plan_variant_jobs_only_renders_changed_crops(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from app.services.derivatives import plan_variant_jobs
+
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path))
+    asset = SimpleNamespace(
+        id="asset",
+        width=1500,
+        height=1000,
+        focal_x=0.5,
+        focal_y=0.5,
+        content_hash="abc",
+        orientation=None,
+    )
+    jobs, _ = plan_variant_jobs(asset, [], ["3:2", "1:1"], [400])
+    existing = []
+    for job in jobs:
+        for target in job.targets:
+            os.makedirs(os.path.dirname(target.path), exist_ok=True)
+            open(target.path, "wb").close()
+            existing.append(
+                SimpleNamespace(
+                    ratio=job.ratio,
+                    width=target.width,
+                    format=job.format,
+                    fingerprint=target.fingerprint,
+                    path=target.path,
+                )
+            )
+
+    asset.focal_x = 0.2
+    jobs, stale = plan_variant_jobs(asset, existing, ["3:2", "1:1"], [400])
+
+    assert {(job.ratio, job.format) for job in jobs} == {("1:1", "webp"), ("1:1", "jpg")}
+    assert stale == []
+
+    jobs, stale = plan_variant_jobs(asset, existing, ["1:1"], [400])
+    assert {variant.ratio for variant in stale} == {"3:2"}
+
+    asset.orientation = 6
+    jobs, _ = plan_variant_jobs(asset, existing, ["1:1"], [400])
+    assert jobs and all(job.orientation == 6 for job in jobs)
+
+
+def test_render_placeholder_is_tiny_webp_of_the_crop(tmp_path):
+    path = tmp_path / "solid.jpg"
+    Image.new("RGB", (1200, 800), (20, 120, 200)).save(path, format="JPEG", quality=95)
+    crop_box = asset_service.compute_crop_box(1200, 800, asset_service.parse_ratio("1:1"), 0.5, 0.5)
+
+    data_uri, color = asset_service.render_placeholder(str(path), crop_box)
+
+    assert data_uri.startswith("data:image/webp;base64,")
+    assert len(data_uri) < 1024
+    red, green, blue = (int(color[i : i + 2], 16) for i in (1, 3, 5))
+    assert abs(red - 20) < 8 and abs(green - 120) < 8 and abs(blue - 200) < 8
+
+    moved = asset_service.compute_crop_box(1200, 800, asset_service.parse_ratio("1:1"), 0.1, 0.5)
+    assert asset_service.placeholder_fingerprint("hash", crop_box) != (
+        asset_service.placeholder_fingerprint("hash", moved)
+    )
+
+
+def test_bounded_decode_matches_standard_for_every_orientation(tmp_path, monkeypatch):
+    import numpy as np
+
+    from app.services.image_metadata import display_size
+
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "assets_bounded_decode_strip_rows", 7)
+    path = tmp_path / "stored.png"
+    _detailed_image((360, 240)).save(path, format="PNG")
+
+    for orientation in range(1, 9):
+        width, height = display_size((360, 240), orientation)
+        outputs = {}
+        for threshold in (-1, 0):
+            monkeypatch.setattr(settings, "assets_bounded_decode_min_pixels", threshold)
+            jobs = asset_service.build_render_jobs(
+                "asset",
+                width,
+                height,
+                0.3,
+                0.6,
+                ["1:1", "3:2"],
+                [150, 60],
+                formats=["jpg"],
+                orientation=orientation,
+            )
+            bounded = threshold == 0
+            assert all(job.bounded is bounded for job in jobs)
+            image = asset_service.load_source(str(path), None, orientation, bounded)
+            outputs[bounded] = {
+                (job.ratio, target.width): np.asarray(resized, dtype="float32")
+                for job in jobs
+                for target, resized in (
+                    asset_service._bounded_targets(image, job)
+                    if bounded
+                    else asset_service.resize_targets(
+                        image.crop(job.crop_box), job.targets, pyramid=True
+                    )
+                )
+            }
+
+        for key, expected in outputs[False].items():
+            assert outputs[True][key].shape == expected.shape
+            assert np.abs(outputs[True][key] - expected).mean() < 1.0, (orientation, key)
+
+
+def test_uploads_prerender_only_the_thumbnail_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "assets_derivative_ratios", ["3:2", "1:1"])
+    monkeypatch.setattr(settings, "assets_derivative_widths", [400, 900, 2000])
+    assert upload_render_targets() == (["3:2"], [900])
+    monkeypatch.setattr(settings, "assets_upload_prerender", "all")
+    assert upload_render_targets() == (None, None)
+    monkeypatch.setattr(settings, "assets_upload_prerender", "none")
+    assert upload_render_targets() is None
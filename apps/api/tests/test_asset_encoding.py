@@ -0,0 +1,36 @@
+from PIL import Image, ImageFilter
+
+from app.services import encoding
+from app.services.assets import ENCODER_PARAMS
+
+
+def _detailed(size=(320, 200)):
+    image = Image.effect_noise(size, 64).convert("RGB")
+    return image.filter(ImageFilter.GaussianBlur(1))
+
+
+def test_ssim_is_one_for_identical_images_and_drops_with_noise():
+    image = _detailed()
+    assert encoding.ssim(image, image) == 1.0
+    noisy = Image.blend(image, Image.effect_noise(image.size, 128).convert("RGB"), 0.5)
+    assert encoding.ssim(image, noisy) < 0.9
+
+
+def test_flat_images_settle_on_lower_quality_than_detailed_ones():
+    flat = Image.new("RGB", (320, 200), (230, 230, 228))
+    search = {"min_quality": 40, "max_quality": 95, "max_iterations": 6}
+
+    flat_result = encoding.encode_for_ssim(flat, ENCODER_PARAMS["jpg"], 0.985, **search)
+    detailed_result = encoding.encode_for_ssim(_detailed(), ENCODER_PARAMS["jpg"], 0.985, **search)
+
+    assert flat_result.quality < detailed_result.quality
+
+
+def test_byte_budget_is_respected_when_reachable():
+    image = _detailed()
+    budget = len(encoding.encode(image, ENCODER_PARAMS["webp"], 60))
+    result = encoding.encode_for_bytes(
+        image, ENCODER_PARAMS["webp"], budget, min_quality=40, max_quality=95, max_iterations=6
+    )
+    assert len(result.data) <= budget
+    assert result.quality >= 55
@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import delete, event, update
+
+from packages.domain.models.assets import Asset, AssetRole, AssetTag
+from app.services.asset_facets import compute_facets, facet_cache, filter_signature
+from app.services.asset_listing import AssetFilters
+
+
+@pytest.fixture
+def asset_seed():
+    assets = [
+        Asset(
+            id=f"asset-{index}",
+            original_path=f"/tmp/{index}.jpg",
+            original_filename=f"{index}.jpg",
+            mime_type="image/jpeg",
+            width=width,
+            height=height,
+            rating=index % 2 * 3,
+            starred=index == 0,
+        )
+        for index, (width, height) in enumerate([(300, 200), (200, 300), (200, 200), (400, 100)])
+    ]
+    return [
+        *assets,
+        AssetTag(asset_id="asset-0", tag="beach", source="manual"),
+        AssetTag(asset_id="asset-0", tag="beach", source="auto"),
+        AssetTag(asset_id="asset-1", tag="beach", source="manual"),
+        AssetTag(asset_id="asset-1", tag="dusk", source="auto"),
+        AssetRole(asset_id="asset-2", role="portfolio"),
+    ]
+
+
+def test_facets_count_every_dimension_in_one_query(db):
+    statements = []
+
+    @event.listens_for(db.bind, "before_cursor_execute")
+    def record(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    facets = compute_facets(db, AssetFilters(), "sqlite")
+
+    assert len(statements) == 1
+    assert facets["total"] == 4
+    assert facets["tags"] == [{"value": "beach", "count": 2}, {"value": "dusk", "count": 1}]
+    assert facets["roles"] == [{"value": "portfolio", "count": 1}]
+    assert facets["orientations"] == [
+        {"value": "landscape", "count": 2},
+        {"value": "portrait", "count": 1},
+        {"value": "square", "count": 1},
+    ]
+    assert facets["ratings"] == [{"value": "0", "count": 2}, {"value": "3", "count": 2}]
+    assert facets["starred"] == [{"value": "false", "count": 3}, {"value": "true", "count": 1}]
+
+    narrowed = compute_facets(db, AssetFilters(tags=["beach"], min_rating=1), "sqlite")
+    assert narrowed["total"] == 1
+    assert narrowed["tags"] == [{"value": "beach", "count": 1}, {"value": "dusk", "count": 1}]
+
+
+def test_filter_signature_ignores_list_order():
+    assert filter_signature(AssetFilters(tags=["a", "b"])) == filter_signature(
+        AssetFilters(tags=["b", "a"])
+    )
+    assert filter_signature(AssetFilters(tags=["a"])) != filter_signature(AssetFilters(roles=["a"]))
+
+
+def test_commits_that_change_facets_invalidate_the_cache(db):
+    def bumped(change):
+        generation = facet_cache.generation
+        change()
+        db.commit()
+        return facet_cache.generation > generation
+
+    assert bumped(lambda: db.add(AssetTag(asset_id="asset-2", tag="dusk", source="manual")))
+    assert bumped(lambda: db.execute(delete(AssetTag).where(AssetTag.tag == "dusk")))
+    assert bumped(lambda: setattr(db.get(Asset, "asset-3"), "starred", True))
+    assert bumped(lambda: db.execute(update(Asset).values(rating=5)))
+    assert not bumped(lambda: setattr(db.get(Asset, "asset-3"), "usage_count", 9))
+    assert not bumped(lambda: db.execute(update(Asset).values(thumbnail_path="/tmp/t.webp")))
+
+    generation = facet_cache.generation
+    facet_cache.put("stale", {"total": 0}, generation - 1)
+    assert facet_cache.get("stale") is None
@@ -0,0 +1,85 @@
+import pytest
+from starlette.requests import Request
+
+from packages.domain.models.assets import Asset
+from app.api.v1 import assets
+from app.services.derivatives import expected_variant_fingerprint
+
+
+def _request(if_none_match: str | None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_etag_matching_handles_lists_weak_tags_and_wildcards():
+    etag = assets._etag("abc")
+    assert assets._etag_matches(_request('"zzz", W/"abc"'), etag)
+    assert assets._etag_matches(_request("*"), etag)
+    assert not assets._etag_matches(_request('"abcd"'), etag)
+    assert not assets._etag_matches(_request(None), etag)
+
+
+def test_cache_headers_only_mark_versioned_urls_immutable():
+    assert "immutable" in assets._cache_headers('"abc"', immutable=True)["Cache-Control"]
+    headers = assets._cache_headers(None, immutable=False)
+    assert headers == {"Cache-Control": "private, no-cache"}
+
+
+@pytest.fixture
+def asset_seed(tmp_path):
+    original = tmp_path / "original.jpg"
+    original.write_bytes(bytes(range(256)) * 4)
+    return [
+        Asset(
+            id="asset-0",
+            original_path=str(original),
+            original_filename="original.jpg",
+            mime_type="image/jpeg",
+            width=1200,
+            height=800,
+            content_hash="c0ffee",
+        )
+    ]
+
+
+@pytest.fixture
+def no_file_reads(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("revalidation must not touch the file")
+
+    monkeypatch.setattr(assets, "FileResponse", refuse)
+    monkeypatch.setattr(assets, "ensure_variant", refuse)
+
+
+def test_matching_validators_answer_304_without_reading_files(client, db, no_file_reads):
+    # A versioned URL needs neither the row nor the file.
+    response = client.get(
+        "/api/v1/assets/unknown/thumbnail?v=abc", headers={"If-None-Match": '"abc"'}
+    )
+    assert response.status_code == 304
+    assert "immutable" in response.headers["Cache-Control"]
+
+    response = client.get("/api/v1/assets/asset-0/file", headers={"If-None-Match": '"c0ffee"'})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"c0ffee"'
+    assert response.content == b""
+
+    fingerprint = expected_variant_fingerprint(db.get(Asset, "asset-0"), "c0ffee", "3:2", 800, "webp")
+    response = client.get(
+        "/api/v1/assets/asset-0/render?ratio=3:2&width=800",
+        headers={"If-None-Match": f'"{fingerprint}"'},
+    )
+    assert response.status_code == 304
+
+
+def test_file_answers_range_requests(client, tmp_path):
+    size = (tmp_path / "original.jpg").stat().st_size
+    response = client.get("/api/v1/assets/asset-0/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 10-19/{size}"
+    assert response.content == bytes(range(10, 20))
+
+    response = client.get("/api/v1/assets/asset-0/file")
+    assert response.status_code == 200
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert len(response.content) == size
@@ -0,0 +1,114 @@
+import hashlib
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+from PIL import Image
+from sqlalchemy import func, select
+
+from packages.domain.models.assets import Asset, AssetDerivativeJob, AssetTag
+from app.core.settings import settings
+from app.services import asset_ingest
+
+
+def test_stage_stream_hashes_and_commits_atomically(tmp_path):
+    payload = os.urandom(3 * 1024 + 7)
+    staged = asset_ingest.stage_stream(io.BytesIO(payload), directory=str(tmp_path), max_bytes=0)
+
+    assert staged.size == len(payload)
+    assert staged.content_hash == hashlib.sha256(payload).hexdigest()
+
+    destination = asset_ingest.commit_staged_upload(staged, str(tmp_path / "final" / "a.bin"))
+    assert not os.path.exists(staged.path)
+    with open(destination, "rb") as handle:
+        assert handle.read() == payload
+
+
+def test_stage_stream_enforces_size_limit(tmp_path):
+    with pytest.raises(asset_ingest.UploadTooLargeError):
+        asset_ingest.stage_stream(io.BytesIO(b"x" * 64), directory=str(tmp_path), max_bytes=16)
+    assert os.listdir(tmp_path) == []
+
+
+def test_archive_entries_filters_to_images(tmp_path):
+    zip_path = tmp_path / "batch.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.writestr("shoot/a.jpg", b"a")
+        archive.writestr("shoot/B.PNG", b"b")
+        archive.writestr("__MACOSX/shoot/._a.jpg", b"junk")
+        archive.writestr("shoot/.hidden.jpg", b"junk")
+        archive.writestr("notes.txt", b"junk")
+
+    with asset_ingest.archive_entries(str(zip_path)) as (entries, concurrent):
+        assert concurrent
+        assert [entry.filename for entry in entries] == ["shoot/a.jpg", "shoot/B.PNG"]
+        with entries[1].open() as stream:
+            assert stream.read() == b"b"
+
+    tar_path = tmp_path / "batch.tar"
+    with tarfile.open(tar_path, "w") as archive:
+        info = tarfile.TarInfo("c.jpg")
+        info.size = 1
+        archive.addfile(info, io.BytesIO(b"c"))
+
+    with asset_ingest.archive_entries(str(tar_path)) as (entries, concurrent):
+        assert not concurrent
+        assert [entry.filename for entry in entries] == ["c.jpg"]
+
+
+def _jpeg_bytes(size=(640, 480), color=(200, 100, 50)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_reuploading_the_same_bytes_returns_the_original_asset(client, db, tmp_path):
+    payload = _jpeg_bytes()
+    first = client.post(
+        "/api/v1/assets/upload", files={"file": ("beach.jpg", payload, "image/jpeg")}
+    )
+    assert first.status_code == 200
+    assert first.json()["duplicate"] is False
+    assert first.json()["derivative_job"] is not None
+
+    second = client.post(
+        "/api/v1/assets/upload",
+        files={"file": ("beach-copy.jpg", payload, "image/jpeg")},
+        data={"tags": "dunes"},
+    )
+    assert second.status_code == 200
+    body = second.json()
+    assert (body["duplicate"], body["id"]) == (True, first.json()["id"])
+    # The original's job comes back untouched; nothing new is queued.
+    assert body["derivative_job"] == first.json()["derivative_job"]
+    assert [tag["tag"] for tag in body["tags"]] == ["dunes"]
+
+    stored = [name for _, _, names in os.walk(tmp_path / "originals") for name in names]
+    assert len(stored) == 1
+    assert not any(name.endswith(".part") for name in stored)
+    assert db.execute(select(func.count(Asset.id))).scalar_one() == 1
+    assert db.execute(select(func.count(AssetDerivativeJob.id))).scalar_one() == 1
+    asset = db.get(Asset, body["id"])
+    assert (asset.original_filename, asset.filename_aliases) == ("beach.jpg", ["beach-copy.jpg"])
+    assert db.execute(select(AssetTag.tag)).scalars().all() == ["dunes"]
+
+
+def test_batch_errors_do_not_reveal_staging_paths(db, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "assets_originals_dir", str(tmp_path / "originals"))
+    entries = [
+        asset_ingest.BatchEntry("shoot/notes.jpg", lambda: io.BytesIO(b"not an image")),
+        asset_ingest.BatchEntry("shoot/ok.jpg", lambda: io.BytesIO(_jpeg_bytes())),
+    ]
+    results = asset_ingest.ingest_batch(db, entries, generate_derivatives=False)
+
+    assert results[0] == {
+        "filename": "shoot/notes.jpg",
+        "status": "failed",
+        "asset_id": None,
+        "error": "Not a supported image",
+    }
+    assert results[1]["status"] == "created"
+    # The log keeps the full error for operators.
+    assert str(tmp_path) in caplog.text
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
+
+from packages.domain.models.assets import Asset, AssetRole, AssetTag, AssetVariant
+from packages.domain.schemas.assets import AssetOut, AssetSummaryOut
+from app.core.settings import settings
+from app.services.asset_listing import (
+    SORT_KEYS,
+    AssetFilters,
+    after_cursor,
+    apply_asset_filters,
+    count_assets,
+    decode_cursor,
+    encode_cursor,
+    load_options,
+    sort_order,
+)
+
+
+@pytest.fixture
+def asset_seed():
+    base = datetime(2024, 1, 1)
+    return [
+        Asset(
+            id=f"asset-{index:02d}",
+            original_path=f"/tmp/{index}.jpg",
+            original_filename=f"{index}.jpg",
+            mime_type="image/jpeg",
+            width=1200,
+            height=800,
+            # Plenty of ties so the id tiebreaker matters.
+            created_at=base + timedelta(minutes=index // 4),
+            rating=index % 3,
+            captured_at=None if index % 5 == 0 else base - timedelta(days=index % 7),
+        )
+        for index in range(23)
+    ]
+
+
+def _pages(db, sort, limit, delete_anchor=False):
+    seen = []
+    cursor = None
+    while True:
+        stmt = apply_asset_filters(select(Asset), AssetFilters())
+        if cursor:
+            stmt = stmt.where(after_cursor(db, sort, decode_cursor(cursor, sort)))
+        page = db.execute(stmt.order_by(*sort_order(sort)).limit(limit + 1)).scalars().all()
+        seen.extend(asset.id for asset in page[:limit])
+        if len(page) <= limit:
+            return seen
+        cursor = encode_cursor(sort, page[limit - 1])
+        if delete_anchor:
+            db.delete(page[limit - 1])
+            db.commit()
+
+
+@pytest.mark.parametrize("sort", sorted(SORT_KEYS))
+def test_keyset_pages_cover_every_asset_once_in_order(db, sort):
+    expected = db.execute(select(Asset.id).order_by(*sort_order(sort))).scalars().all()
+
+    assert _pages(db, sort, limit=4) == expected
+
+
+def test_cursor_survives_its_anchor_being_deleted(db):
+    before = set(db.execute(select(Asset.id)).scalars())
+    seen = _pages(db, "captured", limit=5, delete_anchor=True)
+
+    assert len(seen) == len(set(seen)) == len(before)
+
+
+def test_cursor_is_bound_to_its_sort(db):
+    asset = db.get(Asset, "asset-03")
+    token = encode_cursor("rating", asset)
+
+    with pytest.raises(ValueError):
+        decode_cursor(token, "newest")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "newest")
+    assert count_assets(db, apply_asset_filters(select(Asset), AssetFilters(min_rating=2))) == 7
+
+
+@pytest.mark.parametrize(("fields", "schema"), [("full", AssetOut), ("summary", AssetSummaryOut)])
+def test_page_query_count_does_not_grow_with_page_size(db, fields, schema):
+    for asset in db.execute(select(Asset)).scalars():
+        asset.tags.append(AssetTag(tag="coast", source="manual"))
+        asset.roles.append(AssetRole(role="portfolio"))
+        asset.variants.append(
+            AssetVariant(ratio="3:2", width=400, height=267, format="webp", path="/tmp/v.webp")
+        )
+    db.commit()
+
+    def queries_for(limit):
+        db.expunge_all()
+        statements = []
+
+        def listener(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.bind, "before_cursor_execute", listener)
+        try:
+            stmt = select(Asset).options(*load_options(fields)).order_by(*sort_order("newest"))
+            for asset in db.execute(stmt.limit(limit)).scalars():
+                schema.model_validate(asset)
+        finally:
+            event.remove(db.bind, "before_cursor_execute", listener)
+        return statements
+
+    assert len(queries_for(2)) == len(queries_for(20))
+    if fields == "summary":
+        assert all("original_path" not in statement for statement in queries_for(5))
+
+
+def test_list_endpoint_pages_by_default(client, monkeypatch):
+    monkeypatch.setattr(settings, "assets_list_default_limit", 10)
+    seen = []
+    cursor = None
+    while True:
+        params = {"sort": "oldest", "fields": "summary"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/assets", params=params)
+        assert response.status_code == 200
+        page = [asset["id"] for asset in response.json()]
+        assert len(page) <= 10
+        seen.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [f"asset-{index:02d}" for index in range(23)]
+
+    # The configured cap still bounds an explicit limit and the default.
+    monkeypatch.setattr(settings, "assets_list_max_limit", 5)
+    assert len(client.get("/api/v1/assets").json()) == 5
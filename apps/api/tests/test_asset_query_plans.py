@@ -0,0 +1,215 @@
+import json
+import os
+import random
+import re
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.dialects import sqlite
+
+from packages.domain.db.base import Base
+from packages.domain.models.assets import Asset, AssetRole, AssetTag
+from app.services.asset_facets import compute_facets
+from app.services.asset_listing import (
+    SORT_KEYS,
+    AssetFilters,
+    apply_asset_filters,
+    count_assets,
+    sort_order,
+)
+
+ASSET_COUNT = 50_000
+# Postgres to run the plan checks against as well; they are skipped without it.
+POSTGRES_URL = os.environ.get("BHP_TEST_POSTGRES_URL")
+
+FILTERS = {
+    "none": AssetFilters(),
+    "search": AssetFilters(search="img 123"),
+    "tags": AssetFilters(tags=["tag7", "tag8"]),
+    "roles": AssetFilters(roles=["portfolio"]),
+    "orientations": AssetFilters(orientations=["portrait", "square"]),
+    "min_rating": AssetFilters(min_rating=4),
+    "starred": AssetFilters(starred=True),
+    "captured": AssetFilters(captured_after=datetime(2019, 6, 1)),
+    "tags+starred": AssetFilters(tags=["tag7"], starred=True),
+    "orientations+rating": AssetFilters(orientations=["portrait"], min_rating=3),
+    "roles+captured": AssetFilters(roles=["showcase"], captured_before=datetime(2019, 1, 1)),
+}
+
+# A table read in full rather than through an index. Virtual tables (FTS5)
+# report their own index use.
+FULL_SCAN = {
+    "sqlite": re.compile(
+        r"^SCAN (assets|asset_tags|asset_roles)\b(?!.* USING (COVERING )?INDEX)"
+    ),
+    "postgresql": re.compile(r"^Seq Scan on (assets|asset_tags|asset_roles)$"),
+}
+
+# Relationship filters must start from their lookup index instead of probing
+# every asset along the sort index.
+DRIVING_INDEXES = {
+    "sqlite": {
+        "tags": "ix_asset_tags_tag_asset_id (tag=?)",
+        "roles": "ix_asset_roles_role_asset_id (role=?)",
+    },
+    "postgresql": {
+        "tags": "using ix_asset_tags_tag_asset_id",
+        "roles": "using ix_asset_roles_role_asset_id",
+    },
+}
+
+# Built by migration 0029 rather than the models.
+POSTGRES_SEARCH_INDEXES = (
+    "CREATE INDEX ix_assets_search_vector ON assets "
+    "USING gin (to_tsvector('simple', coalesce(search_document, '')))",
+    "CREATE INDEX ix_assets_search_trgm ON assets USING gin (search_document gin_trgm_ops)",
+)
+
+
+def _seed(engine):
+    rng = random.Random(7)
+    start = datetime(2020, 1, 1)
+    assets, tags, roles = [], [], []
+    for index in range(ASSET_COUNT):
+        asset_id = f"{index:08d}"
+        assets.append(
+            {
+                "id": asset_id,
+                "original_path": f"/library/{index}.jpg",
+                "original_filename": f"img_{index}.jpg",
+                "mime_type": "image/jpeg",
+                "width": rng.choice((300, 200, 250)),
+                "height": rng.choice((200, 300, 250)),
+                "rating": rng.randint(0, 5),
+                "starred": rng.random() < 0.05,
+                "created_at": start + timedelta(minutes=index),
+                "captured_at": None
+                if rng.random() < 0.2
+                else start - timedelta(hours=rng.randint(0, 50_000)),
+                "search_document": f"img_{index}.jpg img {index} jpg",
+            }
+        )
+        for tag in rng.sample(range(300), 2):
+            tags.append({"asset_id": asset_id, "tag": f"tag{tag}", "source": "manual"})
+        if rng.random() < 0.05:
+            roles.append({"asset_id": asset_id, "role": rng.choice(("portfolio", "showcase"))})
+    with engine.begin() as connection:
+        connection.execute(insert(Asset), assets)
+        connection.execute(insert(AssetTag), tags)
+        connection.execute(insert(AssetRole), roles)
+        connection.exec_driver_sql("ANALYZE")
+
+
+def _postgres_engine():
+    """Engine on a throwaway schema of ``POSTGRES_URL``, dropped again by the caller."""
+    schema = f"plans_{uuid4().hex[:12]}"
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as connection:
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS vector")
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        connection.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    engine = create_engine(
+        POSTGRES_URL, connect_args={"options": f"-csearch_path={schema},public"}
+    )
+    tables = [
+        table
+        for key, table in Base.metadata.tables.items()
+        if key.startswith("asset") or key == "tag_taxonomy"
+    ]
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as connection:
+        for statement in POSTGRES_SEARCH_INDEXES:
+            connection.exec_driver_sql(statement)
+    return engine, admin, schema
+
+
+@pytest.fixture(scope="module", params=["sqlite", "postgresql"])
+def engine(request, create_asset_engine):
+    if request.param == "sqlite":
+        engine = create_asset_engine("plans")
+        _seed(engine)
+        yield engine
+        return
+
+    if not POSTGRES_URL:
+        pytest.skip("BHP_TEST_POSTGRES_URL is not set")
+    engine, admin, schema = _postgres_engine()
+    try:
+        _seed(engine)
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+        admin.dispose()
+
+
+def _plan(connection, stmt) -> list[str]:
+    if connection.dialect.name == "postgresql":
+        compiled = stmt.compile(
+            dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+        )
+        result = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        plan = result.scalar_one()
+        return _postgres_nodes((json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"])
+    sql = str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    return [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def _postgres_nodes(node) -> list[str]:
+    """Flattens a JSON plan into lines like ``Index Scan using ix_name on assets``."""
+    line = node["Node Type"]
+    if "Index Name" in node:
+        line += f" using {node['Index Name']}"
+    if "Relation Name" in node:
+        line += f" on {node['Relation Name']}"
+    lines = [line]
+    for child in node.get("Plans", []):
+        lines.extend(_postgres_nodes(child))
+    return lines
+
+
+def _full_scans(connection, stmt) -> list[str]:
+    pattern = FULL_SCAN[connection.dialect.name]
+    return [line for line in _plan(connection, stmt) if pattern.match(line)]
+
+
+@pytest.mark.parametrize("name", sorted(FILTERS))
+def test_list_filters_never_scan_a_table(engine, name):
+    filters = FILTERS[name]
+    with engine.connect() as connection:
+        dialect = connection.dialect.name
+        for sort in SORT_KEYS:
+            stmt = apply_asset_filters(select(Asset.id), filters, dialect)
+            page = stmt.order_by(*sort_order(sort)).limit(51)
+            plan = _plan(connection, page)
+            assert [line for line in plan if FULL_SCAN[dialect].match(line)] == [], (
+                name,
+                sort,
+                plan,
+            )
+            for field, index in DRIVING_INDEXES[dialect].items():
+                if getattr(filters, field):
+                    assert any(index in line for line in plan), (name, sort, plan)
+
+
+def test_count_and_facets_use_indexes(engine):
+    class RecordingConnection:
+        def __init__(self, connection):
+            self.connection = connection
+            self.statements = []
+
+        def execute(self, stmt):
+            self.statements.append(stmt)
+            return self.connection.execute(stmt)
+
+    with engine.connect() as connection:
+        for filters in (FILTERS["tags+starred"], FILTERS["orientations+rating"]):
+            recorder = RecordingConnection(connection)
+            dialect = connection.dialect.name
+            count_assets(recorder, apply_asset_filters(select(Asset), filters, dialect))
+            compute_facets(recorder, filters, dialect)
+            for stmt in recorder.statements:
+                assert _full_scans(connection, stmt) == []
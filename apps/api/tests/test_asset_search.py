@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from packages.domain.models.assets import Asset, AssetTag
+from app.services.asset_listing import AssetFilters, apply_asset_filters, relevance_order
+from app.services.asset_search import (
+    asset_search_fts,
+    ensure_search_index,
+    refresh_search_documents,
+    search_rank,
+)
+
+
+@pytest.fixture
+def asset_seed():
+    assets = [
+        Asset(
+            id=f"asset-{index}",
+            original_path=f"/tmp/{filename}",
+            original_filename=filename,
+            mime_type="image/jpeg",
+            width=1200,
+            height=800,
+            camera_model="X100V" if index == 0 else None,
+        )
+        for index, filename in enumerate(
+            ["IMG_0412.jpg", "sunset-beach.jpg", "beach_house_beach.jpg", "50%_crop.png"]
+        )
+    ]
+    return [*assets, AssetTag(asset_id="asset-1", tag="golden hour", source="manual")]
+
+
+def _search(db, term, ranked=False):
+    stmt = apply_asset_filters(select(Asset.id), AssetFilters(search=term), "sqlite")
+    if ranked:
+        stmt = stmt.order_by(*relevance_order(search_rank(term, "sqlite")))
+    return db.execute(stmt).scalars().all()
+
+
+def test_search_matches_word_prefixes_across_document_fields(db):
+    assert _search(db, "0412") == ["asset-0"]
+    assert _search(db, "x100") == ["asset-0"]
+    assert _search(db, "gold") == ["asset-1"]
+    assert sorted(_search(db, "bea")) == ["asset-1", "asset-2"]
+    assert _search(db, "sunset bea") == ["asset-1"]
+    assert _search(db, "50%") == ["asset-3"]
+    assert _search(db, "%") == ["asset-3"]
+
+
+def test_search_ranks_denser_matches_first(db):
+    assert _search(db, "beach", ranked=True) == ["asset-2", "asset-1"]
+
+
+def test_relevance_results_page_by_cursor(client):
+    params = {"search": "bea", "sort": "relevance", "limit": 1}
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(
+            "/api/v1/assets", params={**params, **({"cursor": cursor} if cursor else {})}
+        )
+        assert response.status_code == 200
+        pages.append([asset["id"] for asset in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == [["asset-2"], ["asset-1"]]
+
+    # A cursor from another sort doesn't carry a rank.
+    first = client.get("/api/v1/assets", params={"limit": 1})
+    response = client.get(
+        "/api/v1/assets", params={**params, "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert response.status_code == 400
+
+
+def test_fts_table_follows_document_changes(db):
+    db.add(AssetTag(asset_id="asset-3", tag="coastline", source="manual"))
+    refresh_search_documents(db, ["asset-3"])
+    db.commit()
+    assert _search(db, "coast") == ["asset-3"]
+
+    db.delete(db.get(Asset, "asset-3"))
+    db.commit()
+    assert _search(db, "coast") == []
+
+
+def test_startup_indexes_assets_without_search_documents(create_asset_engine, asset_seed):
+    engine = create_asset_engine("unindexed")
+    with Session(engine) as session:
+        # Rows from before the search document existed.
+        session.add_all(asset_seed)
+        session.commit()
+        assert _search(session, "gold") == []
+
+        ensure_search_index(engine)
+        assert _search(session, "gold") == ["asset-1"]
+
+        # An emptied FTS table is rebuilt from the stored documents.
+        session.execute(asset_search_fts.delete())
+        session.commit()
+        ensure_search_index(engine)
+        assert sorted(_search(session, "bea")) == ["asset-1", "asset-2"]
+    engine.dispose()
@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import select
+
+from packages.domain.models.assets import Asset, AssetEmbedding, AssetTag
+from app.core.settings import settings
+from app.services import asset_embeddings
+from app.services.asset_embeddings import embedding_content, semantic_search, sync_asset_embeddings
+from app.services.asset_listing import AssetFilters
+
+VOCABULARY = ["beach", "sunset", "kids", "wedding", "portrait", "dog"]
+
+
+def _fake_vector(text):
+    words = text.lower().replace(",", " ").split()
+    vector = [float(words.count(word)) for word in VOCABULARY]
+    return vector + [0.0] * (1536 - len(vector))
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    calls = []
+
+    def fake_embed_texts(texts, db):
+        texts = list(texts)
+        calls.append(texts)
+        return [_fake_vector(text) for text in texts]
+
+    monkeypatch.setattr(asset_embeddings, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(asset_embeddings, "embed_text", lambda text, db: _fake_vector(text))
+    monkeypatch.setattr(settings, "assets_embedding_batch_size", 2)
+    return calls
+
+
+@pytest.fixture
+def asset_seed():
+    captions = {
+        "asset-0": ("Kids running on the beach at sunset", ["beach"]),
+        "asset-1": ("A dog asleep on the beach", ["beach"]),
+        "asset-2": ("Bride and groom portrait at the wedding", ["wedding"]),
+        "asset-3": (None, []),
+    }
+    rows = []
+    for asset_id, (caption, tags) in captions.items():
+        rows.append(
+            Asset(
+                id=asset_id,
+                original_path=f"/tmp/{asset_id}.jpg",
+                original_filename=f"{asset_id}.jpg",
+                mime_type="image/jpeg",
+                width=1200,
+                height=800,
+                caption=caption,
+                suggested_tags=["golden-hour"] if asset_id == "asset-0" else None,
+            )
+        )
+        rows.extend(AssetTag(asset_id=asset_id, tag=tag, source="auto") for tag in tags)
+    return rows
+
+
+def test_embedding_content_combines_caption_and_tags():
+    content = embedding_content("Kids on the beach", ["family.kids", "beach"], ["beach", "golden-hour"])
+    assert content == "Kids on the beach\nTags: family kids, beach\nAlso: golden hour"
+    assert embedding_content(None, [], None) == ""
+
+
+def test_sync_embeds_in_batches_and_skips_unchanged_assets(db, embed_calls):
+    asset_ids = [f"asset-{index}" for index in range(4)]
+    assert sync_asset_embeddings(db, asset_ids) == 3
+    db.commit()
+    assert [len(batch) for batch in embed_calls] == [2, 1]
+    assert db.execute(select(AssetEmbedding.asset_id)).scalars().all() == [
+        "asset-0",
+        "asset-1",
+        "asset-2",
+    ]
+
+    embed_calls.clear()
+    assert sync_asset_embeddings(db, asset_ids) == 0
+    assert embed_calls == []
+
+    db.add(AssetTag(asset_id="asset-1", tag="dog", source="manual"))
+    assert sync_asset_embeddings(db, asset_ids) == 1
+    assert "dog" in embed_calls[0][0]
+
+
+def test_semantic_search_ranks_matches_within_filters(db, embed_calls):
+    sync_asset_embeddings(db, [f"asset-{index}" for index in range(4)])
+    db.commit()
+
+    matches = semantic_search(db, "kids on the beach at sunset", AssetFilters(), 2, "sqlite")
+    assert [asset.id for asset, _ in matches] == ["asset-0", "asset-1"]
+    assert matches[0][1] > matches[1][1]
+
+    matches = semantic_search(
+        db, "kids on the beach at sunset", AssetFilters(tags=["wedding"]), 5, "sqlite"
+    )
+    assert [asset.id for asset, _ in matches] == ["asset-2"]
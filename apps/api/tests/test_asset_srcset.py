@@ -0,0 +1,78 @@
+import io
+from types import SimpleNamespace
+
+from PIL import Image
+from sqlalchemy.orm import Session
+
+from packages.domain.models.assets import AssetRole
+from app.core.settings import settings
+from app.services.derivative_jobs import claim_next_job, run_derivative_job
+from app.services.srcset import build_srcset, manifest_entries
+
+
+def _asset(**overrides):
+    values = dict(
+        id="asset-1",
+        width=1200,
+        height=800,
+        focal_x=0.5,
+        focal_y=0.5,
+        content_hash="abc",
+        orientation=None,
+        variant_manifest=None,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_build_srcset_lists_every_width_and_falls_back_to_a_rendered_one(monkeypatch):
+    monkeypatch.setattr(settings, "assets_derivative_widths", [800, 1200])
+    asset = _asset()
+    rendered = [
+        entry
+        for entry in manifest_entries(asset, "3:2")
+        if entry["width"] == 800 or entry["format"] == "webp"
+    ]
+    # A manifest entry whose fingerprint is outdated (the crop moved) doesn't count.
+    stale = {**rendered[0], "width": 1200, "format": "jpg", "fingerprint": "old"}
+    entry = build_srcset(_asset(variant_manifest={"3:2": [*rendered, stale]}), "3:2")
+
+    webp, jpg = entry["sources"]
+    assert webp["type"] == "image/webp"
+    assert webp["srcset"].index(" 800w") < webp["srcset"].index(" 1200w")
+    assert jpg["srcset"].count("&v=") == 2
+    assert "v=old" not in jpg["srcset"]
+    assert (entry["width"], entry["height"]) == (800, 533)
+    assert entry["src"] == jpg["srcset"].split(", ")[0].removesuffix(" 800w")
+
+
+def test_build_srcset_falls_back_to_configured_widths(monkeypatch):
+    monkeypatch.setattr(settings, "assets_derivative_widths", [400, 800])
+    entry = build_srcset(_asset(), "1:1")
+
+    assert [source["format"] for source in entry["sources"]] == ["webp", "jpg"]
+    assert entry["sources"][0]["srcset"].count("&v=") == 2
+    assert (entry["width"], entry["height"]) == (800, 800)
+
+
+def test_uploaded_asset_srcset_lists_every_configured_width(client, db):
+    buffer = io.BytesIO()
+    Image.new("RGB", (900, 600), (40, 90, 160)).save(buffer, format="JPEG")
+    upload = client.post(
+        "/api/v1/assets/upload", files={"file": ("harbor.jpg", buffer.getvalue(), "image/jpeg")}
+    )
+    asset_id = upload.json()["id"]
+    # Upload pre-renders just the thumbnail.
+    with Session(db.get_bind()) as worker:
+        run_derivative_job(worker, claim_next_job(worker))
+    db.add(AssetRole(asset_id=asset_id, role="portfolio", is_published=True))
+    db.commit()
+
+    response = client.get("/api/v1/assets/srcset", params={"ids": asset_id})
+    item = response.json()["items"][0]
+    assert item["ratio"] == settings.assets_derivative_ratios[0]
+    for source in item["sources"]:
+        widths = [int(part.rsplit(" ", 1)[1][:-1]) for part in source["srcset"].split(", ")]
+        assert widths == sorted(settings.assets_derivative_widths)
+    # <img src> points at the thumbnail that exists rather than an unrendered size.
+    assert f"width={settings.assets_derivative_widths[0]}&" in item["src"]
@@ -0,0 +1,69 @@
+import os
+from contextlib import contextmanager
+
+from PIL import Image
+
+from app.services import tiles
+
+
+def test_generate_tiles_writes_every_level_with_overlap(tmp_path):
+    source = tmp_path / "source.png"
+    Image.new("RGB", (600, 300), (30, 90, 150)).save(source)
+    output = tmp_path / "tiles"
+
+    count = tiles.generate_tiles(str(source), str(output), (600, 300), None)
+
+    max_level = tiles.max_tile_level(600, 300)
+    assert max_level == 10
+    assert sorted(int(name) for name in os.listdir(output)) == list(range(max_level + 1))
+    expected = 0
+    for level in range(max_level + 1):
+        columns, rows = tiles.tile_grid(tiles.level_size(600, 300, level))
+        expected += columns * rows
+        assert len(os.listdir(output / str(level))) == columns * rows
+    assert count == expected
+
+    with Image.open(output / "10" / "0_0.webp") as first:
+        assert first.size == (257, 257)
+    with Image.open(output / "10" / "1_1.webp") as inner:
+        assert inner.size == (258, 45)
+    with Image.open(output / "10" / "2_0.webp") as edge:
+        assert edge.size == (89, 257)
+    with Image.open(output / "0" / "0_0.webp") as smallest:
+        assert smallest.size == (1, 1)
+
+
+def test_generate_tiles_matches_an_upright_decode_and_reserves_its_cost(tmp_path, monkeypatch):
+    import numpy as np
+
+    from app.core.settings import settings
+    from app.services.assets import load_source
+
+    # Lossless tiles and narrow bands so the band-wise reduce is exercised.
+    monkeypatch.setattr(tiles, "TILE_PARAMS", {"format": "PNG"})
+    monkeypatch.setattr(settings, "assets_bounded_decode_strip_rows", 7)
+    reserved = []
+
+    @contextmanager
+    def record(amount):
+        reserved.append(amount)
+        yield
+
+    monkeypatch.setattr(tiles.render_memory_budget, "reserve", record)
+    source = tmp_path / "source.png"
+    pixels = np.random.default_rng(3).integers(0, 256, (333, 601, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(source)
+
+    # Orientation 6 stores the frame rotated; tiles are cut from the upright view.
+    tiles.generate_tiles(str(source), str(tmp_path / "tiles"), (333, 601), 6)
+
+    assert reserved == [tiles.estimate_tile_bytes((333, 601))]
+    upright = load_source(str(source), None, 6)
+    for level in (10, 9):
+        columns, rows = tiles.tile_grid(upright.size)
+        for col in range(columns):
+            for row in range(rows):
+                expected = upright.crop(tiles.tile_box(upright.size, col, row))
+                with Image.open(tmp_path / "tiles" / str(level) / f"{col}_{row}.webp") as tile:
+                    assert np.array_equal(np.asarray(tile), np.asarray(expected))
+        upright = upright.reduce(2)
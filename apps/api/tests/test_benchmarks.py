@@ -0,0 +1,27 @@
+from benchmarks import derivatives as bench
+
+
+def test_run_case_reports_every_stage(tmp_path, monkeypatch):
+    from app.core.settings import settings
+
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path / "derived"))
+    source = bench.synthetic_original(str(tmp_path), 0.05, "jpeg")
+    assert bench.synthetic_original(str(tmp_path), 0.05, "jpeg") == source
+
+    result = bench.run_case(source, ["1:1"], [120], repeat=1, workers=1)
+
+    assert set(result["stages"]) == set(bench.STAGES)
+    assert result["variants"] == 2
+    assert result["peak_rss_mb"] > 0
+
+    def report(median):
+        stages = {stage: {"median": median} for stage in bench.STAGES}
+        return {
+            "environment": {"settings": {}},
+            "results": [{"case": "jpeg-0.05mp", "stages": stages, "peak_rss_mb": 100.0}],
+        }
+
+    assert bench.compare(report(1.0), report(1.05), 0.1) == []
+    assert len(bench.compare(report(1.0), report(2.0), 0.1)) == len(bench.STAGES)
+    # Sub-threshold stages are too noisy to call.
+    assert bench.compare(report(0.001), report(0.01), 0.1) == []
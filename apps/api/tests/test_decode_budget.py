@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from app.cli import derivatives as derivatives_cli
+from app.core.settings import settings
+from app.services import decode_budget
+from app.services.decode_budget import MemoryBudget
+from app.services.image_metadata import extract_image_metadata
+
+
+def test_memory_budget_blocks_until_bytes_are_released():
+    budget = MemoryBudget(100)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with budget.reserve(50):
+            entered.set()
+            release.wait(timeout=1)
+
+    with budget.reserve(70):
+        worker = threading.Thread(target=hold)
+        worker.start()
+        time.sleep(0.05)
+        assert not entered.is_set()
+    assert entered.wait(timeout=1)
+    assert budget.in_use == 50
+    release.set()
+    worker.join(timeout=1)
+    assert budget.in_use == 0
+
+
+def test_oversized_reservations_are_clamped_to_the_budget():
+    budget = MemoryBudget(100)
+    with budget.reserve(10_000):
+        assert budget.in_use == 100
+    assert budget.in_use == 0
+
+
+def test_cli_workers_split_the_budget(monkeypatch):
+    monkeypatch.setattr(decode_budget.render_memory_budget, "limit_bytes", 1000)
+    share = decode_budget.render_memory_budget.share(4)
+    assert share == 250
+    # What each spawned worker process runs before its first asset.
+    derivatives_cli._init_worker(share)
+    assert decode_budget.render_memory_budget.limit_bytes == 250
+    assert MemoryBudget(0).share(4) == 0
+
+
+def test_ingest_rejects_images_over_the_pixel_limit(tmp_path, monkeypatch):
+    path = tmp_path / "wide.png"
+    Image.new("RGB", (400, 300)).save(path)
+    monkeypatch.setattr(settings, "assets_max_image_pixels", 100_000)
+
+    with pytest.raises(ValueError, match="limit"):
+        extract_image_metadata(str(path))
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from packages.domain.models.assets import Asset, AssetDerivativeJob
+from app.core.settings import settings
+from app.services import derivative_jobs
+from app.services.derivative_jobs import (
+    claim_next_job,
+    enqueue_derivative_job,
+    enqueue_derivative_jobs,
+    run_derivative_job,
+)
+
+
+@pytest.fixture
+def asset_seed():
+    return [
+        Asset(
+            id=f"asset-{index}",
+            original_path=f"/tmp/{index}.jpg",
+            original_filename=f"{index}.jpg",
+            mime_type="image/jpeg",
+            width=1200,
+            height=800,
+        )
+        for index in range(3)
+    ]
+
+
+@pytest.fixture
+def synced(monkeypatch):
+    calls = []
+
+    def fake_sync(db, asset, ratios=None, widths=None, prune=True):
+        calls.append((asset.id, ratios, widths))
+
+    monkeypatch.setattr(derivative_jobs, "sync_asset_variants", fake_sync)
+    monkeypatch.setattr(
+        derivative_jobs, "sync_asset_tiles", lambda db, asset: calls.append((asset.id, "tiles"))
+    )
+    monkeypatch.setattr(settings, "assets_tiles_enabled", False)
+    monkeypatch.setattr(settings, "assets_derivative_job_concurrency", 2)
+    monkeypatch.setattr(settings, "assets_derivative_job_max_attempts", 2)
+    return calls
+
+
+@pytest.fixture
+def worker(db):
+    """Opens a session per worker, as each derivative worker thread has its own."""
+    sessions = []
+
+    def open_session():
+        session = Session(db.get_bind())
+        sessions.append(session)
+        return session
+
+    yield open_session
+    for session in sessions:
+        session.close()
+
+
+def _job(db, asset_id):
+    db.expire_all()
+    return db.query(AssetDerivativeJob).filter_by(asset_id=asset_id).one()
+
+
+def _age(db, asset_id):
+    stale = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.assets_derivative_job_timeout_seconds + 60
+    )
+    db.execute(
+        update(AssetDerivativeJob)
+        .where(AssetDerivativeJob.asset_id == asset_id)
+        .values(started_at=stale)
+    )
+    db.commit()
+
+
+def test_claim_respects_the_concurrency_cap(db, synced, worker):
+    enqueue_derivative_jobs(db, ["asset-0", "asset-1", "asset-2"], ["3:2"], [800])
+
+    first_worker = worker()
+    first = claim_next_job(first_worker)
+    second = claim_next_job(worker())
+    assert [first.asset_id, second.asset_id] == ["asset-0", "asset-1"]
+    assert (first.status, first.attempts) == ("running", 1)
+    assert claim_next_job(worker()) is None
+
+    run_derivative_job(first_worker, first)
+    assert _job(db, "asset-0").status == "completed"
+    assert claim_next_job(worker()).asset_id == "asset-2"
+    assert synced == [("asset-0", ["3:2"], [800])]
+
+
+def test_stale_jobs_are_reclaimed_then_failed_after_max_attempts(db, synced, worker):
+    enqueue_derivative_job(db, "asset-0")
+    claim_next_job(worker())
+
+    _age(db, "asset-0")
+    second_worker = worker()
+    reclaimed = claim_next_job(second_worker)
+    assert (reclaimed.asset_id, reclaimed.attempts) == ("asset-0", 2)
+
+    _age(db, "asset-0")
+    assert claim_next_job(worker()) is None
+    job = _job(db, "asset-0")
+    assert (job.status, job.error_message) == ("failed", "Timed out")
+
+    # The worker that lost its claim can no longer complete the job.
+    run_derivative_job(second_worker, reclaimed)
+    assert _job(db, "asset-0").status == "failed"
+
+
+def test_failed_render_records_the_error(db, synced, worker, monkeypatch):
+    def broken_sync(db, asset, ratios=None, widths=None, prune=True):
+        raise OSError("decoder exploded")
+
+    monkeypatch.setattr(derivative_jobs, "sync_asset_variants", broken_sync)
+    enqueue_derivative_job(db, "asset-0")
+    session = worker()
+    run_derivative_job(session, claim_next_job(session))
+
+    job = _job(db, "asset-0")
+    assert (job.status, job.error_message) == ("failed", "OSError: decoder exploded")
+    assert claim_next_job(worker()) is None
+
+
+def test_requests_for_a_running_job_wait_for_it_to_finish(db, synced, worker):
+    enqueue_derivative_job(db, "asset-0", ["3:2"], [800])
+    first_worker = worker()
+    running = claim_next_job(first_worker)
+
+    enqueue_derivative_job(db, "asset-0", ["1:1"], [1200])
+    enqueue_derivative_jobs(db, ["asset-0"], ["1:1"], [800])
+    job = _job(db, "asset-0")
+    assert (job.status, job.attempts, job.requeue) == ("running", 1, True)
+    # A second worker must not pick up the asset while the first renders it.
+    assert claim_next_job(worker()) is None
+
+    run_derivative_job(first_worker, running)
+    job = _job(db, "asset-0")
+    assert (job.status, job.attempts, job.requeue) == ("queued", 0, False)
+    assert (job.ratios, job.widths) == (["3:2", "1:1"], [800, 1200])
+
+    second_worker = worker()
+    run_derivative_job(second_worker, claim_next_job(second_worker))
+    assert _job(db, "asset-0").status == "completed"
+    assert synced == [
+        ("asset-0", ["3:2"], [800]),
+        ("asset-0", ["3:2", "1:1"], [800, 1200]),
+    ]
+
+    # Finished jobs start over from the new request alone.
+    enqueue_derivative_job(db, "asset-0", ["5:7"], [800])
+    assert (_job(db, "asset-0").ratios, _job(db, "asset-0").widths) == (["5:7"], [800])
+
+
+def test_tile_requests_leave_variant_targets_alone(db, synced, worker):
+    enqueue_derivative_job(db, "asset-0", ["3:2"], [800])
+    enqueue_derivative_job(db, "asset-0", [], [], tiles=True)
+    job = _job(db, "asset-0")
+    assert (job.ratios, job.widths, job.tiles) == (["3:2"], [800], True)
+
+    session = worker()
+    run_derivative_job(session, claim_next_job(session))
+    assert synced == [("asset-0", ["3:2"], [800]), ("asset-0", "tiles")]
+
+    synced.clear()
+    enqueue_derivative_job(db, "asset-1", [], [], tiles=True)
+    session = worker()
+    run_derivative_job(session, claim_next_job(session))
+    assert synced == [("asset-1", "tiles")]
+    assert _job(db, "asset-1").status == "completed"
@@ -0,0 +1,136 @@
+import json
+
+import pytest
+from PIL import Image
+from sqlalchemy import select, update
+
+from packages.domain.models.assets import Asset, AssetVariant
+from app.cli.derivatives import Checkpoint, _asset_filter
+from app.core.settings import settings
+from app.services.assets import DERIVATIVE_FORMATS
+from app.services.derivatives import sync_asset_variants
+
+RATIOS = ["3:2", "1:1"]
+WIDTHS = [800, 1200]
+
+
+def _variants(asset_id, version=1, on_demand=False, skip=0):
+    variants = [
+        AssetVariant(
+            asset_id=asset_id,
+            ratio=ratio,
+            width=width,
+            height=width,
+            format=fmt,
+            path=f"/tmp/{asset_id}-{ratio}-{width}.{fmt}",
+            version=version,
+            on_demand=on_demand,
+        )
+        for ratio in RATIOS
+        for width in WIDTHS
+        for fmt in DERIVATIVE_FORMATS
+    ]
+    return variants[skip:]
+
+
+@pytest.fixture
+def asset_seed():
+    assets = [
+        Asset(
+            id=f"asset-{index}",
+            original_path=f"/tmp/{index}.jpg",
+            original_filename=f"{index}.jpg",
+            mime_type="image/jpeg",
+            width=1200,
+            height=800,
+        )
+        for index in range(6)
+    ]
+    return [
+        *assets,
+        *_variants("asset-0"),
+        *_variants("asset-1", skip=1),
+        *_variants("asset-2", version=0),
+        *_variants("asset-3", on_demand=True),
+        # Extra sizes beyond the requested set don't count towards it.
+        *_variants("asset-4"),
+        AssetVariant(
+            asset_id="asset-4", ratio="5:7", width=2000, height=2800, format="jpg", path="/tmp/x"
+        ),
+    ]
+
+
+def _matching(db, conditions):
+    return db.execute(select(Asset.id).where(*conditions).order_by(Asset.id)).scalars().all()
+
+
+def test_only_missing_selects_assets_without_every_current_variant(db, monkeypatch):
+    monkeypatch.setattr(settings, "assets_derivatives_version", 1)
+    conditions = _asset_filter(RATIOS, WIDTHS, True, None, None)
+    assert _matching(db, conditions) == ["asset-1", "asset-2", "asset-3", "asset-5"]
+
+    # Asking for a subset that asset-1 has in full drops it from the run.
+    conditions = _asset_filter(["1:1"], WIDTHS, True, None, None)
+    assert "asset-1" not in _matching(db, conditions)
+
+    assert len(_matching(db, _asset_filter(RATIOS, WIDTHS, False, None, None))) == 6
+
+
+def test_only_missing_converges_once_on_demand_renders_are_current(
+    db, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "assets_derivatives_version", 1)
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path / "derived"))
+    Image.new("RGB", (300, 200), (90, 140, 60)).save(tmp_path / "5.jpg")
+    asset = db.get(Asset, "asset-5")
+    asset.original_path = str(tmp_path / "5.jpg")
+    db.commit()
+    sync_asset_variants(db, asset, RATIOS, WIDTHS)
+    # As if every variant had been rendered through /render instead.
+    db.execute(update(AssetVariant).where(AssetVariant.asset_id == "asset-5").values(on_demand=True))
+    db.commit()
+    conditions = _asset_filter(RATIOS, WIDTHS, True, None, None)
+    assert "asset-5" in _matching(db, conditions)
+
+    result = sync_asset_variants(db, asset, RATIOS, WIDTHS)
+    assert result.rendered == 0
+    assert "asset-5" not in _matching(db, conditions)
+
+
+def test_asset_filter_resumes_after_checkpoint_and_retries_failures(db, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"), {})
+    checkpoint.last_asset_id = "asset-3"
+    checkpoint.failed = ["asset-1"]
+    conditions = _asset_filter(RATIOS, WIDTHS, True, None, checkpoint)
+    assert _matching(db, conditions) == ["asset-1", "asset-5"]
+
+
+def test_checkpoint_only_advances_past_contiguous_completions(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    params = {"ratios": RATIOS, "widths": WIDTHS}
+    checkpoint = Checkpoint(str(path), params)
+    for asset_id in ("asset-1", "asset-2", "asset-3", "asset-4"):
+        checkpoint.submitted(asset_id)
+
+    checkpoint.finished("asset-3", ok=True)
+    checkpoint.finished("asset-2", ok=False)
+    assert checkpoint.last_asset_id is None
+    assert not path.exists()
+
+    checkpoint.finished("asset-1", ok=True)
+    assert checkpoint.last_asset_id == "asset-3"
+    assert json.loads(path.read_text()) == {
+        "params": params,
+        "last_asset_id": "asset-3",
+        "failed": ["asset-2"],
+    }
+
+    resumed = Checkpoint(str(path), params)
+    assert resumed.load()
+    assert (resumed.last_asset_id, resumed.failed) == ("asset-3", ["asset-2"])
+    # A retried failure that succeeds leaves the list; the mark never moves back.
+    resumed.submitted("asset-2")
+    resumed.finished("asset-2", ok=True)
+    assert (resumed.last_asset_id, resumed.failed) == ("asset-3", [])
+
+    assert not Checkpoint(str(path), {"ratios": ["1:1"]}).load()
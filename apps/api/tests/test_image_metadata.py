@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+from PIL import ExifTags, Image
+
+from app.services.assets import load_source
+from app.services.image_metadata import extract_image_metadata
+
+
+def _rotated_jpeg(path):
+    # Stored sideways: 60x40 pixels with a red left half, tagged "rotate 90 CW".
+    image = Image.new("RGB", (60, 40), (0, 0, 255))
+    image.paste((255, 0, 0), (0, 0, 30, 40))
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    exif[ExifTags.Base.Make] = "Fujifilm"
+    exif[ExifTags.Base.Model] = "X-T5"
+    exif[ExifTags.IFD.Exif] = {
+        ExifTags.Base.DateTimeOriginal: "2024:05:06 07:08:09",
+        ExifTags.Base.OffsetTimeOriginal: "+02:00",
+        ExifTags.Base.ISOSpeedRatings: 400,
+    }
+    image.save(path, format="JPEG", exif=exif, quality=95)
+
+
+def test_extract_image_metadata_reads_exif_and_orientation(tmp_path):
+    path = tmp_path / "sideways.jpg"
+    _rotated_jpeg(path)
+
+    metadata = extract_image_metadata(str(path))
+
+    assert (metadata.width, metadata.height) == (40, 60)
+    assert metadata.orientation == 6
+    assert metadata.camera_make == "Fujifilm"
+    assert metadata.camera_model == "X-T5"
+    assert metadata.captured_at == datetime(
+        2024, 5, 6, 7, 8, 9, tzinfo=timezone(timedelta(hours=2))
+    )
+    assert metadata.details["exif"]["iso"] == 400
+
+
+def test_load_source_applies_stored_orientation(tmp_path):
+    path = tmp_path / "sideways.jpg"
+    _rotated_jpeg(path)
+
+    with load_source(str(path), None, 6) as image:
+        assert image.size == (40, 60)
+        # Rotating 90 degrees clockwise moves the red left half to the top.
+        red, _, blue = image.getpixel((20, 5))
+        assert red > 200 and blue < 60
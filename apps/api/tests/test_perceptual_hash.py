@@ -0,0 +1,121 @@
+import random
+from itertools import combinations
+
+import numpy as np
+import pytest
+from PIL import Image
+from sqlalchemy import or_, select
+
+from packages.domain.models.assets import Asset
+from app.services.asset_listing import AssetFilters
+from app.services.perceptual_hash import (
+    DHASH_COLUMNS,
+    compute_dhash,
+    find_duplicate_clusters,
+    find_similar,
+    flip_masks,
+    hash_chunks,
+    join_chunks,
+)
+
+
+def _planted_hashes():
+    rng = random.Random(11)
+    hashes = {}
+    for index in range(400):
+        if index % 10 == 0 or not hashes:
+            value = rng.getrandbits(64)
+        else:
+            # Mostly near copies of an earlier hash, a few bits flipped.
+            value = rng.choice(list(hashes.values()))
+            for bit in rng.sample(range(64), rng.randint(0, 9)):
+                value ^= 1 << bit
+        hashes[f"asset-{index:03d}"] = value
+    return hashes
+
+
+HASHES = _planted_hashes()
+
+
+def _save(path, pixels, quality=90):
+    Image.fromarray(pixels.astype("uint8")).save(path, format="JPEG", quality=quality)
+    return str(path)
+
+
+def test_dhash_survives_reencoding_but_separates_different_images(tmp_path):
+    rng = np.random.default_rng(7)
+    base = rng.integers(0, 256, (16, 24, 3)).repeat(40, 0).repeat(40, 1)
+    original = compute_dhash(_save(tmp_path / "base.jpg", base))
+    reexport = compute_dhash(_save(tmp_path / "reexport.jpg", base * 0.85 + 20, quality=55))
+    other = compute_dhash(_save(tmp_path / "other.jpg", rng.integers(0, 256, base.shape)))
+
+    assert (original ^ reexport).bit_count() <= 3
+    assert (original ^ other).bit_count() > 16
+    assert join_chunks(hash_chunks(original)) == original
+    assert len(flip_masks(1)) == 17
+
+
+@pytest.fixture
+def asset_seed():
+    return [
+        Asset(
+            id=asset_id,
+            original_path=f"/tmp/{asset_id}.jpg",
+            original_filename=f"{asset_id}.jpg",
+            mime_type="image/jpeg",
+            width=1200,
+            height=800,
+            **{column.key: chunk for column, chunk in zip(DHASH_COLUMNS, hash_chunks(value))},
+        )
+        for asset_id, value in HASHES.items()
+    ]
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 7, 11])
+def test_similar_matches_brute_force(db, max_distance):
+    for asset_id in ["asset-000", "asset-123", "asset-399"]:
+        value = HASHES[asset_id]
+        expected = sorted(
+            ((other_id, (value ^ other).bit_count()) for other_id, other in HASHES.items()),
+            key=lambda match: (match[1], match[0]),
+        )
+        expected = [
+            match for match in expected if match[1] <= max_distance and match[0] != asset_id
+        ]
+        assert find_similar(db, value, max_distance, 1000, exclude_id=asset_id) == expected
+
+
+@pytest.mark.parametrize("max_distance", [3, 7])
+def test_duplicate_clusters_match_brute_force(db, max_distance):
+    parent = {asset_id: asset_id for asset_id in HASHES}
+
+    def find(asset_id):
+        while parent[asset_id] != asset_id:
+            asset_id = parent[asset_id]
+        return asset_id
+
+    for left, right in combinations(HASHES, 2):
+        if (HASHES[left] ^ HASHES[right]).bit_count() <= max_distance:
+            parent[find(right)] = find(left)
+    expected = {}
+    for asset_id in HASHES:
+        expected.setdefault(find(asset_id), set()).add(asset_id)
+    expected = sorted(sorted(group) for group in expected.values() if len(group) > 1)
+
+    clusters = find_duplicate_clusters(db, AssetFilters(), max_distance, "sqlite")
+    assert sorted(sorted(asset_id for asset_id, _ in cluster) for cluster in clusters) == expected
+    for cluster in clusters:
+        first = HASHES[cluster[0][0]]
+        assert all((first ^ HASHES[asset_id]).bit_count() == d for asset_id, d in cluster)
+
+
+def test_similar_lookup_probes_the_chunk_indexes(db):
+    probes = [column.in_([1, 2]) for column in DHASH_COLUMNS]
+    stmt = select(Asset.id).where(or_(*probes))
+    compiled = stmt.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = " ".join(
+        row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+    )
+    assert "SCAN assets" not in plan
+    for column in DHASH_COLUMNS:
+        assert f"ix_assets_{column.key}" in plan
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+from sqlalchemy import event
+
+from packages.domain.models.assets import Asset, AssetVariant
+from app.core.settings import settings
+from app.services import derivatives, thumbnail_cache
+from app.services.render_cache import RenderCache
+from app.services.thumbnail_cache import ThumbnailCache, ThumbnailEntry
+
+
+def _write(path, size):
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(max_bytes=250)
+    first = _write(tmp_path / "a.webp", 100)
+    second = _write(tmp_path / "b.webp", 100)
+    cache.seed([first, second])
+
+    cache.touch(first)
+    evicted = cache.add(_write(tmp_path / "c.webp", 100))
+
+    assert evicted == [second]
+    assert not os.path.exists(second)
+    assert cache.total_bytes == 200
+
+
+def test_render_cache_coalesces_concurrent_work():
+    cache = RenderCache(max_bytes=1)
+    renders = []
+    rendered = set()
+
+    def worker():
+        with cache.coalesce(("asset", "3:2", 800, "webp")):
+            if "variant" not in rendered:
+                time.sleep(0.05)
+                renders.append(1)
+                rendered.add("variant")
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert renders == [1]
+
+
+def test_thumbnail_cache_is_bounded_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(thumbnail_cache.time, "monotonic", lambda: now[0])
+    cache = ThumbnailCache(max_entries=2, ttl_seconds=10)
+    for asset_id in ("a", "b", "c"):
+        cache.put(asset_id, ThumbnailEntry(path=f"/{asset_id}.webp", etag_token=asset_id))
+
+    assert cache.get("a") is None
+    assert cache.get("c").path == "/c.webp"
+    now[0] += 11
+    assert cache.get("b") is None
+
+
+@pytest.fixture
+def asset_seed(tmp_path):
+    Image.new("RGB", (1200, 800), (30, 90, 160)).save(tmp_path / "rendered.jpg")
+    _write(tmp_path / "unreadable.jpg", 64)
+    return [
+        Asset(
+            id=name,
+            original_path=str(tmp_path / f"{name}.jpg"),
+            original_filename=f"{name}.jpg",
+            mime_type="image/jpeg",
+            width=1200,
+            height=800,
+        )
+        for name in ("rendered", "unreadable")
+    ]
+
+
+def test_thumbnail_misses_only_write_changed_pointers(client, db):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE assets") and "thumbnail_path" in statement:
+            statements.append(parameters)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        for _ in range(3):
+            thumbnail_cache.thumbnail_cache.clear()
+            response = client.get("/api/v1/assets/unreadable/thumbnail")
+            assert response.status_code == 200
+        # Falling back to the original leaves nothing to record.
+        assert statements == []
+
+        for _ in range(3):
+            thumbnail_cache.thumbnail_cache.clear()
+            response = client.get("/api/v1/assets/rendered/thumbnail")
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "image/webp"
+        # The on-demand render sets the pointer once; later misses read it.
+        assert len(statements) == 1
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+
+def test_evicted_renders_release_their_rows_and_pointers(db, tmp_path, monkeypatch):
+    # A symlinked storage root: stored paths and resolved paths differ.
+    (tmp_path / "real").mkdir()
+    os.symlink(tmp_path / "real", tmp_path / "storage")
+    monkeypatch.setattr(settings, "assets_derived_dir", str(tmp_path / "storage" / "derived"))
+    monkeypatch.setattr(derivatives, "render_cache", RenderCache(max_bytes=1))
+    asset = db.get(Asset, "rendered")
+
+    first = derivatives.ensure_variant(db, asset, "3:2", 800, "webp")
+    first_path = first.path
+    assert derivatives.refresh_variant_pointers(db, asset.id).path == first_path
+    thumbnail_cache.thumbnail_cache.put(asset.id, ThumbnailEntry(first_path, "old"))
+
+    # The cap only fits one render, so the next one evicts the first.
+    second = derivatives.ensure_variant(db, asset, "1:1", 800, "webp")
+    assert not os.path.exists(first_path)
+    db.expire_all()
+    assert [variant.path for variant in db.query(AssetVariant)] == [second.path]
+    assert asset.thumbnail_path == second.path
+    assert list(asset.variant_manifest) == ["1:1"]
+    assert thumbnail_cache.thumbnail_cache.get(asset.id) is None
@@ -23,6 +23,23 @@ type AssetVariant = {
   version: number;
 };
 
+type FacetCount = {
+  value: string;
+  count: number;
+};
+
+type AssetFacets = {
+  total: number;
+  tags: FacetCount[];
+  roles: FacetCount[];
+  orientations: FacetCount[];
+  ratings: FacetCount[];
+  starred: FacetCount[];
+};
+
+const facetCount = (counts: FacetCount[] | undefined, value: string) =>
+  counts?.find((item) => item.value === value)?.count ?? 0;
+
 type TagTaxonomy = {
   tag: string;
   status: string;
@@ -52,6 +69,9 @@ type Asset = {
   height: number;
   focal_x: number;
   focal_y: number;
+  placeholder?: string | null;
+  dominant_color?: string | null;
+  captured_at?: string | null;
   rating: number;
   starred: boolean;
   tags: AssetTag[];
@@ -62,6 +82,13 @@ type Asset = {
 
 type Lane = "all" | "inbox" | "review" | "publish";
 
+const placeholderStyle = (asset: Asset) => ({
+  backgroundColor: asset.dominant_color ?? undefined,
+  backgroundImage: asset.placeholder ? `url(${asset.placeholder})` : undefined,
+  backgroundSize: "cover",
+  backgroundPosition: "center",
+});
+
 type ViewMode = "grid" | "detail";
 
 type Density = "compact" | "comfortable";
@@ -102,6 +129,11 @@ type RoleKey = (typeof ROLE_OPTIONS)[number]["key"];
 
 const PUBLISHABLE_ROLES = new Set<RoleKey>(["logo", "showcase", "hero_main"]);
 
+// Matches the API's default page size; reloads after edits may ask for more,
+// up to the API's cap, so already loaded pages stay on screen.
+const ASSET_PAGE_SIZE = 100;
+const ASSET_PAGE_MAX = 500;
+
 export default function AdminPhotosPage() {
   const apiBaseUrl =
     process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8001";
@@ -132,6 +164,8 @@ export default function AdminPhotosPage() {
   const [assets, setAssets] = useState<Asset[]>([]);
   const [uploading, setUploading] = useState(false);
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [actionError, setActionError] = useState<string | null>(null);
   const [actionMessage, setActionMessage] = useState<string | null>(null);
@@ -168,6 +202,7 @@ export default function AdminPhotosPage() {
   const [ratingFilter, setRatingFilter] = useState<number | null>(null);
   const [starredOnly, setStarredOnly] = useState(false);
   const [sortMode, setSortMode] = useState("newest");
+  const [facets, setFacets] = useState<AssetFacets | null>(null);
 
   const [selectedAssets, setSelectedAssets] = useState<Set<string>>(new Set());
   const [autoTagJobs, setAutoTagJobs] = useState<Record<string, AutoTagJob>>({});
@@ -199,7 +234,7 @@ export default function AdminPhotosPage() {
     return selectedAssetIds[0] ?? null;
   }, [selectedAssets, selectedAssetIds]);
 
-  const buildAssetsQuery = () => {
+  const buildAssetsQuery = (page?: { limit: number; cursor?: string | null }) => {
     const params = new URLSearchParams();
     const trimmedSearch = searchTerm.trim();
     if (trimmedSearch) {
@@ -219,22 +254,36 @@ export default function AdminPhotosPage() {
     if (sortMode) {
       params.set("sort", sortMode);
     }
+    if (page) {
+      params.set("limit", page.limit.toString());
+      if (page.cursor) {
+        params.set("cursor", page.cursor);
+      }
+    }
     const query = params.toString();
     return query ? `?${query}` : "";
   };
 
-  const loadAssets = async () => {
+  const loadAssets = async (resetPages = false) => {
     try {
       setError(null);
       setLoading(true);
-      const response = await apiFetch(
-        `${apiBaseUrl}/api/v1/assets${buildAssetsQuery()}`
-      );
+      const limit = resetPages
+        ? ASSET_PAGE_SIZE
+        : Math.min(Math.max(assets.length, ASSET_PAGE_SIZE), ASSET_PAGE_MAX);
+      const [response, facetResponse] = await Promise.all([
+        apiFetch(`${apiBaseUrl}/api/v1/assets${buildAssetsQuery({ limit })}`),
+        apiFetch(`${apiBaseUrl}/api/v1/assets/facets${buildAssetsQuery()}`),
+      ]);
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}`);
       }
       const data = (await response.json()) as Asset[];
       setAssets(data);
+      setNextCursor(response.headers.get("X-Next-Cursor"));
+      setFacets(
+        facetResponse.ok ? ((await facetResponse.json()) as AssetFacets) : null
+      );
     } catch (err) {
       setError((err as Error).message);
     } finally {
@@ -242,6 +291,33 @@ export default function AdminPhotosPage() {
     }
   };
 
+  const loadMoreAssets = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setError(null);
+      setLoadingMore(true);
+      const response = await apiFetch(
+        `${apiBaseUrl}/api/v1/assets${buildAssetsQuery({
+          limit: ASSET_PAGE_SIZE,
+          cursor: nextCursor,
+        })}`
+      );
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+      }
+      const data = (await response.json()) as Asset[];
+      setAssets((prev) => {
+        const seen = new Set(prev.map((asset) => asset.id));
+        return [...prev, ...data.filter((asset) => !seen.has(asset.id))];
+      });
+      setNextCursor(response.headers.get("X-Next-Cursor"));
+    } catch (err) {
+      setError((err as Error).message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadPendingTags = async () => {
     try {
       const response = await apiFetch(
@@ -298,7 +374,7 @@ export default function AdminPhotosPage() {
   };
 
   useEffect(() => {
-    void loadAssets();
+    void loadAssets(true);
   }, [
     apiBaseUrl,
     searchTerm,
@@ -416,14 +492,7 @@ export default function AdminPhotosPage() {
       result = result.filter((asset) => getLane(asset) === lane);
     }
 
-    if (searchTerm.trim()) {
-      const term = searchTerm.toLowerCase();
-      result = result.filter((asset) => {
-        const inName = asset.original_filename.toLowerCase().includes(term);
-        const inTags = asset.tags.some((tag) => tag.tag.toLowerCase().includes(term));
-        return inName || inTags;
-      });
-    }
+    // Search is matched and ranked server-side (filename, tags, roles, camera).
 
     if (selectedTags.size) {
       result = result.filter((asset) =>
@@ -464,12 +533,20 @@ export default function AdminPhotosPage() {
     if (sortMode === "rating") {
       result.sort((a, b) => (b.rating ?? 0) - (a.rating ?? 0));
     }
+    if (sortMode === "captured") {
+      const capturedTime = (asset: Asset) =>
+        asset.captured_at ? new Date(asset.captured_at).getTime() : -Infinity;
+      result.sort(
+        (a, b) =>
+          capturedTime(b) - capturedTime(a) ||
+          new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
+      );
+    }
 
     return result;
   }, [
     assets,
     lane,
-    searchTerm,
     selectedTags,
     selectedRoles,
     selectedOrientations,
@@ -1122,6 +1199,7 @@ export default function AdminPhotosPage() {
             src={`${apiBaseUrl}/api/v1/assets/${asset.id}/thumbnail`}
             alt={asset.original_filename}
             className="h-full w-full object-cover"
+            style={placeholderStyle(asset)}
           />
         </button>
         <div className="mt-3 space-y-2">
@@ -1328,6 +1406,9 @@ export default function AdminPhotosPage() {
                         }
                       />
                       {role.label}
+                      <span className="ml-auto text-[10px] text-zinc-400">
+                        {facetCount(facets?.roles, role.key)}
+                      </span>
                     </label>
                   ))
                 ) : (
@@ -1415,6 +1496,9 @@ export default function AdminPhotosPage() {
                         onChange={() => toggleFilterSet(setSelectedTags, tag)}
                       />
                       {tag}
+                      <span className="ml-auto text-[10px] text-zinc-400">
+                        {facetCount(facets?.tags, tag)}
+                      </span>
                     </label>
                   ))
                 ) : (
@@ -1454,6 +1538,9 @@ export default function AdminPhotosPage() {
                         }
                       />
                       {value}
+                      <span className="ml-auto text-[10px] text-zinc-400">
+                        {facetCount(facets?.orientations, value)}
+                      </span>
                     </label>
                   )
                 )}
@@ -1499,6 +1586,9 @@ export default function AdminPhotosPage() {
                     onChange={(event) => setStarredOnly(event.target.checked)}
                   />
                   Starred only
+                  <span className="ml-auto text-[10px] text-zinc-400">
+                    {facetCount(facets?.starred, "true")}
+                  </span>
                 </label>
               </div>
             ) : null}
@@ -1573,6 +1663,10 @@ export default function AdminPhotosPage() {
                   <option value="newest">Newest</option>
                   <option value="oldest">Oldest</option>
                   <option value="rating">Rating</option>
+                  <option value="captured">Date taken</option>
+                  <option value="relevance" disabled={!searchTerm.trim()}>
+                    Best match
+                  </option>
                 </select>
               </label>
             </div>
@@ -1865,6 +1959,7 @@ export default function AdminPhotosPage() {
                                       src={`${apiBaseUrl}/api/v1/assets/${asset.id}/thumbnail`}
                                       alt={asset.original_filename}
                                       className="h-full w-full object-cover"
+                                      style={placeholderStyle(asset)}
                                     />
                                   </button>
                                   <div>
@@ -2222,6 +2317,19 @@ export default function AdminPhotosPage() {
               );
             })}
           </div>
+
+          {nextCursor ? (
+            <div className="flex justify-center">
+              <button
+                type="button"
+                onClick={() => void loadMoreAssets()}
+                disabled={loadingMore}
+                className="rounded-full border border-zinc-200 px-4 py-2 text-xs font-semibold text-zinc-600 transition hover:border-zinc-300"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          ) : null}
         </section>
       </div>
 
@@ -0,0 +1,28 @@
+"""Flag asset variants rendered on demand.
+
+Revision ID: 0018_asset_variant_on_demand
+Revises: 0017_guardrails_harness
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0018_asset_variant_on_demand"
+down_revision = "0017_guardrails_harness"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "asset_variants",
+        sa.Column("on_demand", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+    )
+    op.alter_column("asset_variants", "on_demand", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("asset_variants", "on_demand")
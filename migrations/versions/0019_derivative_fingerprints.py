@@ -0,0 +1,28 @@
+"""Add content hashes and render fingerprints for derivatives.
+
+Revision ID: 0019_derivative_fingerprints
+Revises: 0018_asset_variant_on_demand
+Create Date: 2026-10-17 10:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0019_derivative_fingerprints"
+down_revision = "0018_asset_variant_on_demand"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_index("ix_assets_content_hash", "assets", ["content_hash"])
+    op.add_column("asset_variants", sa.Column("fingerprint", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("asset_variants", "fingerprint")
+    op.drop_index("ix_assets_content_hash", table_name="assets")
+    op.drop_column("assets", "content_hash")
@@ -0,0 +1,52 @@
+"""Add asset derivative job queue.
+
+Revision ID: 0020_asset_derivative_jobs
+Revises: 0019_derivative_fingerprints
+Create Date: 2026-10-17 11:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0020_asset_derivative_jobs"
+down_revision = "0019_derivative_fingerprints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "asset_derivative_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("asset_id", sa.String(length=36), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default=sa.text("'queued'")),
+        sa.Column("ratios", sa.JSON(), nullable=True),
+        sa.Column("widths", sa.JSON(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["asset_id"], ["assets.id"], ondelete="CASCADE"),
+        sa.UniqueConstraint("asset_id", name="uix_asset_derivative_job_asset"),
+    )
+    op.create_index("ix_asset_derivative_jobs_status", "asset_derivative_jobs", ["status"])
+    op.alter_column("asset_derivative_jobs", "status", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_asset_derivative_jobs_status", table_name="asset_derivative_jobs")
+    op.drop_table("asset_derivative_jobs")
@@ -0,0 +1,37 @@
+"""Make asset content hashes unique and track filename aliases.
+
+Revision ID: 0021_asset_content_addressing
+Revises: 0020_asset_derivative_jobs
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0021_asset_content_addressing"
+down_revision = "0020_asset_derivative_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the hash on the oldest copy of any duplicate so the unique index applies.
+    op.execute(
+        "UPDATE assets SET content_hash = NULL "
+        "WHERE content_hash IS NOT NULL AND EXISTS ("
+        "SELECT 1 FROM assets AS other "
+        "WHERE other.content_hash = assets.content_hash "
+        "AND (other.created_at < assets.created_at "
+        "OR (other.created_at = assets.created_at AND other.id < assets.id)))"
+    )
+    op.drop_index("ix_assets_content_hash", table_name="assets")
+    op.create_unique_constraint("uix_asset_content_hash", "assets", ["content_hash"])
+    op.add_column("assets", sa.Column("filename_aliases", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("assets", "filename_aliases")
+    op.drop_constraint("uix_asset_content_hash", "assets", type_="unique")
+    op.create_index("ix_assets_content_hash", "assets", ["content_hash"])
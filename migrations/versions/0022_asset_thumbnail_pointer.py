@@ -0,0 +1,35 @@
+"""Store the preferred thumbnail variant on each asset.
+
+Revision ID: 0022_asset_thumbnail_pointer
+Revises: 0021_asset_content_addressing
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0022_asset_thumbnail_pointer"
+down_revision = "0021_asset_content_addressing"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("thumbnail_path", sa.Text(), nullable=True))
+    op.add_column("assets", sa.Column("thumbnail_fingerprint", sa.String(length=64), nullable=True))
+    for column in ("path", "fingerprint"):
+        op.execute(
+            f"UPDATE assets SET thumbnail_{column} = ("
+            f"SELECT v.{column} FROM asset_variants AS v "
+            "WHERE v.asset_id = assets.id "
+            "ORDER BY CASE WHEN v.format = 'webp' THEN 0 ELSE 1 END, "
+            "abs(v.width - 800), v.version DESC "
+            "LIMIT 1)"
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("assets", "thumbnail_fingerprint")
+    op.drop_column("assets", "thumbnail_path")
@@ -0,0 +1,30 @@
+"""Add low-quality image placeholders to assets.
+
+Revision ID: 0023_asset_placeholders
+Revises: 0022_asset_thumbnail_pointer
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0023_asset_placeholders"
+down_revision = "0022_asset_thumbnail_pointer"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("placeholder", sa.Text(), nullable=True))
+    op.add_column("assets", sa.Column("dominant_color", sa.String(length=7), nullable=True))
+    op.add_column(
+        "assets", sa.Column("placeholder_fingerprint", sa.String(length=64), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("assets", "placeholder_fingerprint")
+    op.drop_column("assets", "dominant_color")
+    op.drop_column("assets", "placeholder")
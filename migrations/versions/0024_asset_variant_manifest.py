@@ -0,0 +1,24 @@
+"""Store a precomputed srcset manifest of each asset's variants.
+
+Revision ID: 0024_asset_variant_manifest
+Revises: 0023_asset_placeholders
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0024_asset_variant_manifest"
+down_revision = "0023_asset_placeholders"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("variant_manifest", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("assets", "variant_manifest")
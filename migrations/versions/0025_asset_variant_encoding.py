@@ -0,0 +1,26 @@
+"""Record encoder quality and byte size on asset variants.
+
+Revision ID: 0025_asset_variant_encoding
+Revises: 0024_asset_variant_manifest
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0025_asset_variant_encoding"
+down_revision = "0024_asset_variant_manifest"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("asset_variants", sa.Column("quality", sa.Integer(), nullable=True))
+    op.add_column("asset_variants", sa.Column("byte_size", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("asset_variants", "byte_size")
+    op.drop_column("asset_variants", "quality")
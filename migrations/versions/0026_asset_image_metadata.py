@@ -0,0 +1,38 @@
+"""Store ingest-time image metadata on assets.
+
+Revision ID: 0026_asset_image_metadata
+Revises: 0025_asset_variant_encoding
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0026_asset_image_metadata"
+down_revision = "0025_asset_variant_encoding"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("orientation", sa.Integer(), nullable=True))
+    op.add_column(
+        "assets", sa.Column("captured_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column("assets", sa.Column("camera_make", sa.String(length=100), nullable=True))
+    op.add_column("assets", sa.Column("camera_model", sa.String(length=100), nullable=True))
+    op.add_column("assets", sa.Column("image_metadata", sa.JSON(), nullable=True))
+    op.create_index("ix_assets_captured_at", "assets", ["captured_at"])
+    op.create_index("ix_assets_camera_model", "assets", ["camera_model"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_assets_camera_model", table_name="assets")
+    op.drop_index("ix_assets_captured_at", table_name="assets")
+    op.drop_column("assets", "image_metadata")
+    op.drop_column("assets", "camera_model")
+    op.drop_column("assets", "camera_make")
+    op.drop_column("assets", "captured_at")
+    op.drop_column("assets", "orientation")
@@ -0,0 +1,30 @@
+"""Track deep-zoom tile pyramids.
+
+Revision ID: 0027_asset_tiles
+Revises: 0026_asset_image_metadata
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0027_asset_tiles"
+down_revision = "0026_asset_image_metadata"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("tiles_fingerprint", sa.String(length=64), nullable=True))
+    op.add_column(
+        "asset_derivative_jobs",
+        sa.Column("tiles", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+    )
+    op.alter_column("asset_derivative_jobs", "tiles", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("asset_derivative_jobs", "tiles")
+    op.drop_column("assets", "tiles_fingerprint")
@@ -0,0 +1,46 @@
+"""Composite indexes for keyset pagination of the asset list.
+
+Revision ID: 0028_asset_list_keyset_indexes
+Revises: 0027_asset_tiles
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0028_asset_list_keyset_indexes"
+down_revision = "0027_asset_tiles"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_assets_created_at_id", "assets", ["created_at", "id"])
+    op.create_index("ix_assets_rating_created_at_id", "assets", ["rating", "created_at", "id"])
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Match ORDER BY captured_at DESC NULLS LAST; a backward scan of an
+        # ascending index would put NULLs first.
+        op.create_index(
+            "ix_assets_captured_at_created_at_id",
+            "assets",
+            [
+                sa.text("captured_at DESC NULLS LAST"),
+                sa.text("created_at DESC"),
+                sa.text("id DESC"),
+            ],
+        )
+    else:
+        op.create_index(
+            "ix_assets_captured_at_created_at_id",
+            "assets",
+            ["captured_at", "created_at", "id"],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_assets_captured_at_created_at_id", table_name="assets")
+    op.drop_index("ix_assets_rating_created_at_id", table_name="assets")
+    op.drop_index("ix_assets_created_at_id", table_name="assets")
@@ -0,0 +1,83 @@
+"""Indexed search document for assets.
+
+Revision ID: 0029_asset_search_document
+Revises: 0028_asset_list_keyset_indexes
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0029_asset_search_document"
+down_revision = "0028_asset_list_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+# Existing assets get the document asset_search.build_search_document() would
+# build: each value lowercased whole, plus its words. Word order differs, which
+# only nudges ranking until the next edit rebuilds it.
+BACKFILL_SQL = r"""
+WITH parts AS (
+    SELECT assets.id AS asset_id, lower(fields.part) AS part
+    FROM assets
+    CROSS JOIN LATERAL (
+        VALUES
+            (assets.original_filename),
+            (assets.camera_make),
+            (assets.camera_model),
+            (assets.image_metadata -> 'exif' ->> 'lens_model'),
+            (assets.image_metadata -> 'xmp' ->> 'label'),
+            (CAST(CAST(EXTRACT(YEAR FROM assets.captured_at) AS integer) AS text))
+    ) AS fields (part)
+    UNION ALL
+    SELECT assets.id, lower(alias.value)
+    FROM assets
+    CROSS JOIN LATERAL json_array_elements_text(assets.filename_aliases) AS alias (value)
+    WHERE json_typeof(assets.filename_aliases) = 'array'
+    UNION ALL
+    SELECT asset_id, lower(tag) FROM asset_tags
+    UNION ALL
+    SELECT asset_id, lower(role) FROM asset_roles
+),
+words AS (
+    SELECT asset_id, part AS word FROM parts WHERE part <> ''
+    UNION
+    SELECT parts.asset_id, split.word
+    FROM parts
+    CROSS JOIN LATERAL regexp_split_to_table(parts.part, '(\W|_)+') AS split (word)
+    WHERE split.word <> ''
+)
+UPDATE assets
+SET search_document = documents.document
+FROM (
+    SELECT asset_id, string_agg(word, ' ') AS document FROM words GROUP BY asset_id
+) AS documents
+WHERE assets.id = documents.asset_id
+"""
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("search_document", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    # SQLite builds its FTS5 table at startup (asset_search.ensure_search_index).
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # The expression must match asset_search._search_vector() exactly.
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_assets_search_vector ON assets "
+            "USING gin (to_tsvector('simple', coalesce(search_document, '')))"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_assets_search_trgm ON assets "
+            "USING gin (search_document gin_trgm_ops)"
+        )
+        op.execute(BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_assets_search_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_assets_search_vector")
+    op.drop_column("assets", "search_document")
@@ -0,0 +1,56 @@
+"""Stored aspect columns and indexes for asset list filters.
+
+Revision ID: 0030_asset_filter_indexes
+Revises: 0029_asset_search_document
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0030_asset_filter_indexes"
+down_revision = "0029_asset_search_document"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "assets",
+        sa.Column(
+            "aspect_orientation",
+            sa.String(length=10),
+            sa.Computed(
+                "CASE WHEN width > height THEN 'landscape' "
+                "WHEN height > width THEN 'portrait' ELSE 'square' END",
+                persisted=True,
+            ),
+        ),
+    )
+    op.add_column(
+        "assets",
+        sa.Column(
+            "aspect_ratio",
+            sa.Float(),
+            sa.Computed("CAST(width AS FLOAT) / NULLIF(height, 0)", persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_assets_aspect_orientation_created_at_id",
+        "assets",
+        ["aspect_orientation", "created_at", "id"],
+    )
+    op.create_index("ix_assets_starred_created_at_id", "assets", ["starred", "created_at", "id"])
+    op.create_index("ix_asset_tags_tag_asset_id", "asset_tags", ["tag", "asset_id"])
+    op.create_index("ix_asset_roles_role_asset_id", "asset_roles", ["role", "asset_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_asset_roles_role_asset_id", table_name="asset_roles")
+    op.drop_index("ix_asset_tags_tag_asset_id", table_name="asset_tags")
+    op.drop_index("ix_assets_starred_created_at_id", table_name="assets")
+    op.drop_index("ix_assets_aspect_orientation_created_at_id", table_name="assets")
+    op.drop_column("assets", "aspect_ratio")
+    op.drop_column("assets", "aspect_orientation")
@@ -0,0 +1,64 @@
+"""Asset captions and embeddings for semantic search.
+
+Revision ID: 0031_asset_embeddings
+Revises: 0030_asset_filter_indexes
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from pgvector.sqlalchemy import Vector
+
+revision = "0031_asset_embeddings"
+down_revision = "0030_asset_filter_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("assets", sa.Column("caption", sa.Text(), nullable=True))
+    op.add_column("assets", sa.Column("suggested_tags", sa.JSON(), nullable=True))
+    op.create_table(
+        "asset_embeddings",
+        sa.Column(
+            "asset_id",
+            sa.String(length=36),
+            sa.ForeignKey("assets.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=80), nullable=False),
+        sa.Column("embedding", Vector(1536), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    # HNSW needs no training data, so it is built correctly on an empty table
+    # and stays accurate as the library grows (unlike ivfflat's fixed lists).
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_asset_embeddings_embedding "
+        "ON asset_embeddings USING hnsw (embedding vector_cosine_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_asset_embeddings_embedding")
+    op.drop_table("asset_embeddings")
+    op.drop_column("assets", "suggested_tags")
+    op.drop_column("assets", "caption")
@@ -0,0 +1,30 @@
+"""Perceptual hash chunks for near-duplicate lookups.
+
+Revision ID: 0032_asset_perceptual_hash
+Revises: 0031_asset_embeddings
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0032_asset_perceptual_hash"
+down_revision = "0031_asset_embeddings"
+branch_labels = None
+depends_on = None
+
+CHUNK_COLUMNS = ("dhash_0", "dhash_1", "dhash_2", "dhash_3")
+
+
+def upgrade() -> None:
+    for column in CHUNK_COLUMNS:
+        op.add_column("assets", sa.Column(column, sa.Integer(), nullable=True))
+        op.create_index(f"ix_assets_{column}", "assets", [column])
+
+
+def downgrade() -> None:
+    for column in reversed(CHUNK_COLUMNS):
+        op.drop_index(f"ix_assets_{column}", table_name="assets")
+        op.drop_column("assets", column)
@@ -0,0 +1,28 @@
+"""Let derivative jobs take new requests while they run.
+
+Revision ID: 0033_asset_derivative_job_requeue
+Revises: 0032_asset_perceptual_hash
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0033_asset_derivative_job_requeue"
+down_revision = "0032_asset_perceptual_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "asset_derivative_jobs",
+        sa.Column("requeue", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+    )
+    op.alter_column("asset_derivative_jobs", "requeue", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("asset_derivative_jobs", "requeue")
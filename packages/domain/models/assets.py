@@ -3,7 +3,21 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
+from pgvector.sqlalchemy import Vector
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from packages.domain.db.base import Base
@@ -11,13 +25,63 @@ from packages.domain.db.base import Base
 
 class Asset(Base):
     __tablename__ = "assets"
+    __table_args__ = (
+        UniqueConstraint("content_hash", name="uix_asset_content_hash"),
+        # Keyset pagination: one index per list sort, ending in the id tiebreaker.
+        Index("ix_assets_created_at_id", "created_at", "id"),
+        Index("ix_assets_rating_created_at_id", "rating", "created_at", "id"),
+        # Equality filters lead so the list sort can follow from the index.
+        Index(
+            "ix_assets_aspect_orientation_created_at_id", "aspect_orientation", "created_at", "id"
+        ),
+        Index("ix_assets_starred_created_at_id", "starred", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     original_path: Mapped[str] = mapped_column(Text, nullable=False)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     original_filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    filename_aliases: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
     mime_type: Mapped[str] = mapped_column(String(100), nullable=False)
     width: Mapped[int] = mapped_column(Integer, nullable=False)
     height: Mapped[int] = mapped_column(Integer, nullable=False)
+    orientation: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Derived from the display size; the EXIF value above is ``orientation``.
+    aspect_orientation: Mapped[str] = mapped_column(
+        String(10),
+        Computed(
+            "CASE WHEN width > height THEN 'landscape' "
+            "WHEN height > width THEN 'portrait' ELSE 'square' END",
+            persisted=True,
+        ),
+    )
+    aspect_ratio: Mapped[float | None] = mapped_column(
+        Float, Computed("CAST(width AS FLOAT) / NULLIF(height, 0)", persisted=True)
+    )
+    captured_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    camera_make: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    camera_model: Mapped[str | None] = mapped_column(String(100), nullable=True, index=True)
+    image_metadata: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Maintained by app.services.asset_search, which also owns its indexes.
+    search_document: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Written by auto-tagging; embedded with the tags for semantic search.
+    caption: Mapped[str | None] = mapped_column(Text, nullable=True)
+    suggested_tags: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
+    # 64-bit dHash as four 16-bit chunks, each indexed for multi-index
+    # Hamming lookups; see app.services.perceptual_hash.
+    dhash_0: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    dhash_1: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    dhash_2: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    dhash_3: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    thumbnail_path: Mapped[str | None] = mapped_column(Text, nullable=True)
+    thumbnail_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    variant_manifest: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    placeholder: Mapped[str | None] = mapped_column(Text, nullable=True)
+    dominant_color: Mapped[str | None] = mapped_column(String(7), nullable=True)
+    placeholder_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    tiles_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
     focal_x: Mapped[float] = mapped_column(Float, nullable=False, default=0.5)
     focal_y: Mapped[float] = mapped_column(Float, nullable=False, default=0.5)
     rating: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -34,11 +98,33 @@ class Asset(Base):
     tags: Mapped[list["AssetTag"]] = relationship(back_populates="asset", cascade="all, delete-orphan")
     roles: Mapped[list["AssetRole"]] = relationship(back_populates="asset", cascade="all, delete-orphan")
     variants: Mapped[list["AssetVariant"]] = relationship(back_populates="asset", cascade="all, delete-orphan")
+    derivative_job: Mapped["AssetDerivativeJob | None"] = relationship(
+        back_populates="asset", cascade="all, delete-orphan", uselist=False
+    )
+
+
+# The "captured" sort orders captured_at DESC NULLS LAST. Postgres needs that
+# spelled out in the index (a backward scan of an ascending one puts NULLs
+# first); SQLite can't declare null placement, but its ascending order keeps
+# NULLs first, so a backward scan already matches. Same as migration 0028.
+Index(
+    "ix_assets_captured_at_created_at_id",
+    Asset.captured_at.desc().nulls_last(),
+    Asset.created_at.desc(),
+    Asset.id.desc(),
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_assets_captured_at_created_at_id", Asset.captured_at, Asset.created_at, Asset.id
+).ddl_if(callable_=lambda ddl, target, bind, dialect, **kw: dialect.name != "postgresql")
 
 
 class AssetTag(Base):
     __tablename__ = "asset_tags"
-    __table_args__ = (UniqueConstraint("asset_id", "tag", "source", name="uix_asset_tag_source"),)
+    __table_args__ = (
+        UniqueConstraint("asset_id", "tag", "source", name="uix_asset_tag_source"),
+        # Tag filters and facets look assets up by tag.
+        Index("ix_asset_tags_tag_asset_id", "tag", "asset_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     asset_id: Mapped[str] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), nullable=False)
@@ -72,6 +158,51 @@ class AssetAutoTagJob(Base):
     asset: Mapped["Asset"] = relationship()
 
 
+class AssetEmbedding(Base):
+    __tablename__ = "asset_embeddings"
+
+    asset_id: Mapped[str] = mapped_column(
+        ForeignKey("assets.id", ondelete="CASCADE"), primary_key=True
+    )
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Hash of the embedded text and model; unchanged rows are never re-embedded.
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    model: Mapped[str] = mapped_column(String(80), nullable=False)
+    embedding: Mapped[list[float]] = mapped_column(Vector(1536), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+
+class AssetDerivativeJob(Base):
+    __tablename__ = "asset_derivative_jobs"
+    __table_args__ = (UniqueConstraint("asset_id", name="uix_asset_derivative_job_asset"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    asset_id: Mapped[str] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued", index=True)
+    ratios: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
+    widths: Mapped[list[int] | None] = mapped_column(JSON, nullable=True)
+    tiles: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Set when a request arrives mid-run; the job is queued again once it finishes.
+    requeue: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    asset: Mapped["Asset"] = relationship(back_populates="derivative_job")
+
+
 class TagTaxonomy(Base):
     __tablename__ = "tag_taxonomy"
     __table_args__ = (UniqueConstraint("tag", name="uix_tag_taxonomy_tag"),)
@@ -87,7 +218,10 @@ class TagTaxonomy(Base):
 
 class AssetRole(Base):
     __tablename__ = "asset_roles"
-    __table_args__ = (UniqueConstraint("asset_id", "role", "scope", name="uix_asset_role_scope"),)
+    __table_args__ = (
+        UniqueConstraint("asset_id", "role", "scope", name="uix_asset_role_scope"),
+        Index("ix_asset_roles_role_asset_id", "role", "asset_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     asset_id: Mapped[str] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), nullable=False)
@@ -117,6 +251,10 @@ class AssetVariant(Base):
     format: Mapped[str] = mapped_column(String(10), nullable=False)
     path: Mapped[str] = mapped_column(Text, nullable=False)
     version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    on_demand: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    quality: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    byte_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
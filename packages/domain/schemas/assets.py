@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -68,6 +69,20 @@ class AssetAutoTagJobOut(BaseModel):
     completed_at: datetime | None
 
 
+class AssetDerivativeJobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    asset_id: str
+    status: str
+    tiles: bool = False
+    attempts: int
+    error_message: str | None
+    created_at: datetime
+    updated_at: datetime
+    started_at: datetime | None
+    completed_at: datetime | None
+
+
 class AssetVariantOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -77,6 +92,8 @@ class AssetVariantOut(BaseModel):
     format: str
     path: str
     version: int
+    quality: int | None = None
+    byte_size: int | None = None
 
 
 class TagTaxonomyOut(BaseModel):
@@ -98,11 +115,19 @@ class AssetOut(BaseModel):
     id: str
     original_path: str
     original_filename: str
+    filename_aliases: list[str] | None = None
     mime_type: str
     width: int
     height: int
+    orientation: int | None = None
+    captured_at: datetime | None = None
+    camera_make: str | None = None
+    camera_model: str | None = None
+    caption: str | None = None
     focal_x: float
     focal_y: float
+    placeholder: str | None = None
+    dominant_color: str | None = None
     rating: int
     starred: bool
     usage_count: int
@@ -112,3 +137,107 @@ class AssetOut(BaseModel):
     tags: list[AssetTagOut] = []
     roles: list[AssetRoleOut] = []
     variants: list[AssetVariantOut] = []
+
+
+class AssetSummaryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    original_filename: str
+    mime_type: str
+    width: int
+    height: int
+    orientation: int | None = None
+    captured_at: datetime | None = None
+    focal_x: float
+    focal_y: float
+    placeholder: str | None = None
+    dominant_color: str | None = None
+    rating: int
+    starred: bool
+    created_at: datetime
+    updated_at: datetime
+    thumbnail_url: str | None = None
+    tags: list[AssetTagOut] = []
+    roles: list[AssetRoleOut] = []
+
+
+class AssetSemanticMatchOut(AssetSummaryOut):
+    score: float
+
+
+class AssetSimilarOut(AssetSummaryOut):
+    distance: int
+
+
+class AssetDuplicateClusterOut(BaseModel):
+    assets: list[AssetSimilarOut]
+
+
+class AssetUploadOut(AssetOut):
+    derivative_job: AssetDerivativeJobOut | None = None
+    duplicate: bool = False
+
+
+class AssetBatchUploadItemOut(BaseModel):
+    filename: str
+    status: Literal["created", "duplicate", "failed"]
+    asset_id: str | None = None
+    error: str | None = None
+
+
+class AssetBatchUploadOut(BaseModel):
+    items: list[AssetBatchUploadItemOut]
+    created: int
+    duplicates: int
+    failed: int
+
+
+class AssetSrcsetSourceOut(BaseModel):
+    format: str
+    type: str
+    srcset: str
+
+
+class AssetSrcsetOut(BaseModel):
+    asset_id: str
+    ratio: str
+    width: int
+    height: int
+    src: str
+    sizes: str
+    sources: list[AssetSrcsetSourceOut]
+    placeholder: str | None = None
+    dominant_color: str | None = None
+
+
+class AssetFacetCountOut(BaseModel):
+    value: str
+    count: int
+
+
+class AssetFacetsOut(BaseModel):
+    total: int
+    tags: list[AssetFacetCountOut] = []
+    roles: list[AssetFacetCountOut] = []
+    orientations: list[AssetFacetCountOut] = []
+    ratings: list[AssetFacetCountOut] = []
+    starred: list[AssetFacetCountOut] = []
+
+
+class AssetSrcsetManifestOut(BaseModel):
+    items: list[AssetSrcsetOut]
+    missing: list[str] = []
+
+
+class AssetTilesOut(BaseModel):
+    asset_id: str
+    status: Literal["ready", "pending", "missing"]
+    width: int
+    height: int
+    tile_size: int
+    overlap: int
+    format: str
+    max_level: int
+    fingerprint: str | None = None
+    url_template: str | None = None